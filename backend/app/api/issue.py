@@ -1,64 +1,205 @@
 # app/api/issue.py
-import os, json
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel
-from app.chains.issue_chain import get_issue_chain
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, Field
+from app.chains.issue_chain import ISSUE_OUTPUT, get_issue_chain, issue_cache
 from app.chains.research_chain import answer_question
-from app.services.notify import post_slack
-from starlette.concurrency import run_in_threadpool
+from app.services.issue_store import COLUMNS, ISSUE_DEDUP_ENABLED, issue_store
+from app.services.notify import post_slack, post_slack_digest
+from app.services.llm_limits import LLMLimitError, ainvoke_limited
+from app.services.structured import StructuredOutputError, parse
+from app.services.jobs import jobs
+from app.services.telemetry import annotate
+from app.api.jobs import accepted
 
 router = APIRouter()
 
+# /batch 한 요청 안에서 동시에 돌릴 issue chain 수 (글로벌 LLM 세마포어와 별개의 상한)
+ISSUE_BATCH_CONCURRENCY = int(os.getenv("ISSUE_BATCH_CONCURRENCY", "8"))
+ISSUE_BATCH_MAX = int(os.getenv("ISSUE_BATCH_MAX", "100"))
+
 
 class IssueIn(BaseModel):
     question: str
     content: Optional[str] = None  # backward compatibility; ignored
     use_tools: bool = False  # default: do NOT use tools like pdf_search
+    no_cache: bool = False  # True 면 캐시를 건너뛰고 새로 생성
 
 
-@router.post("", summary="Insight ▶ Issue")
-async def create_issue(payload: IssueIn, request: Request):
+async def _build_issue(payload: IssueIn) -> dict:
+    """QA(옵션) → 중복 확인 → issue chain → 저장. Slack 전송은 호출자가 담당.
+
+    비슷한 이슈가 이미 있으면 LLM 을 부르지 않고 기존 이슈(merged=True)를 돌려준다.
+    """
+    dedupe = ISSUE_DEDUP_ENABLED and not payload.no_cache
+    if dedupe and payload.use_tools:
+        # 리서치(LLM) 전에 인사이트 문장만으로 먼저 확인
+        existing, _ = await issue_store.dedupe((payload.question,), reserve=False)
+        if existing is not None:
+            annotate(issue_merged=existing["id"])
+            return existing
+
+    # ① QA 생성 (옵션)
+    #    - use_tools=True 인 경우에만 research 에이전트(도구) 사용
+    #    - 실패 시/끄면, 질문 자체를 요약 텍스트로 사용 (도구 미사용 경로)
     try:
-        # ① QA 생성 (옵션)
-        #    - use_tools=True 인 경우에만 research 에이전트(도구) 사용
-        #    - 실패 시/끄면, 질문 자체를 요약 텍스트로 사용 (도구 미사용 경로)
-        try:
-            if getattr(payload, "use_tools", False):
-                qa = await answer_question({"question": payload.question})
-            else:
-                qa = payload.question  # 도구 미사용: 질문을 요약 텍스트로 간주
-        except Exception as _:
-            qa = payload.question  # 툴 실패시 안전한 폴백
-        print("🔍 QA content:", qa)
-
-        # ② Issue JSON 파싱 (이미 dict)
-        raw_issue = await run_in_threadpool(get_issue_chain().invoke, {"answer": qa})
-
-        if isinstance(raw_issue, (dict, list)):
-            issue = raw_issue
-        elif isinstance(raw_issue, str):
-            try:
-                issue = json.loads(raw_issue)
-            except json.JSONDecodeError as e:
-                raise ValueError(
-                    f"Failed to parse issue string as JSON: {raw_issue}"
-                ) from e
-        elif hasattr(raw_issue, "content") and isinstance(
-            getattr(raw_issue, "content", None), str
-        ):
-            try:
-                issue = json.loads(getattr(raw_issue, "content", None))
-            except json.JSONDecodeError as e:
-                raise ValueError(
-                    f"Failed to parse issue content as JSON: {getattr(raw_issue, 'content', None)}"
-                ) from e
+        if getattr(payload, "use_tools", False):
+            qa = await answer_question(
+                {"question": payload.question}, fresh=payload.no_cache
+            )
         else:
-            raise ValueError(f"Unexpected issue type: {type(raw_issue)}")
+            qa = payload.question  # 도구 미사용: 질문을 요약 텍스트로 간주
+    except LLMLimitError:
+        raise
+    except Exception as _:
+        qa = payload.question  # 툴 실패시 안전한 폴백
+    annotate(qa_chars=len(str(qa)), use_tools=payload.use_tools)
+
+    reservation = None
+    if dedupe:
+        existing, reservation = await issue_store.dedupe((payload.question, str(qa)))
+        if existing is not None:
+            annotate(issue_merged=existing["id"])
+            return existing
+
+    # ② Issue JSON (체인이 스키마 검증/수리까지 끝낸 dict, 이전 버전 캐시 값도 같은 스키마로 확인)
+    try:
+        raw_issue = await issue_cache.get_or_compute(
+            {"answer": qa},
+            lambda: ainvoke_limited(get_issue_chain(), {"answer": qa}),
+            bypass=payload.no_cache,
+        )
+        issue, _ = parse(ISSUE_OUTPUT, raw_issue)
+    except BaseException:
+        if reservation is not None:
+            issue_store.release(reservation)
+        raise
+    return await issue_store.save(issue, payload.question, str(qa), reservation)
+
+
+async def _issue_job(payload: dict) -> dict:
+    issue = await _build_issue(IssueIn(**payload))
+    if not issue.get("merged"):
+        await post_slack(issue)
+    return issue
+
 
-        # 3) 슬랙 공유
-        await post_slack(issue)  # issue 는 dict
+jobs.register("issue", _issue_job)
+
+
+@router.post("", summary="Insight ▶ Issue")
+async def create_issue(
+    payload: IssueIn,
+    request: Request,
+    mode: str = Query("sync", pattern="^(sync|async)$"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    """mode=async 이면 job 으로 실행하고 202 + job_id 를 즉시 반환 (use_tools=True 권장)."""
+    if mode == "async":
+        job = await jobs.submit("issue", payload.model_dump(), idempotency_key)
+        return accepted(job)
+    try:
+        issue = await _build_issue(payload)
+
+        # 3) 슬랙 공유 — outbox 에 넣고 바로 반환 (전송/재시도는 백그라운드)
+        #    기존 이슈에 합쳐진 경우는 이미 공유됐으므로 생략
+        if not issue.get("merged"):
+            await post_slack(issue)  # issue 는 dict
 
         return issue
+    except LLMLimitError as e:
+        raise HTTPException(e.status_code, str(e), headers=e.headers)
+    except StructuredOutputError as e:
+        raise HTTPException(502, f"Invalid LLM output: {e}")
     except Exception as e:
         raise HTTPException(500, f"Issue Error: {e}")
+
+
+class IssueBatchIn(BaseModel):
+    items: List[IssueIn] = Field(..., min_length=1, max_length=ISSUE_BATCH_MAX)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+
+
+@router.post("/batch", summary="Insights ▶ Issues (batch)")
+async def create_issues_batch(payload: IssueBatchIn):
+    """여러 인사이트를 한 번에 이슈로 변환.
+
+    - abatch(max_concurrency) 로 병렬 실행, 항목별 실패는 error 로 반환 (배치 전체는 200)
+    - Slack 은 성공한 이슈를 outbox 에 넣고, sender 가 digest 로 묶어 전송
+    """
+    max_concurrency = min(
+        payload.max_concurrency or ISSUE_BATCH_CONCURRENCY, ISSUE_BATCH_CONCURRENCY
+    )
+    outputs = await RunnableLambda(_build_issue).abatch(
+        payload.items,
+        config={"max_concurrency": max_concurrency},
+        return_exceptions=True,
+    )
+
+    results, issues = [], []
+    for i, out in enumerate(outputs):
+        if isinstance(out, Exception):
+            results.append({"index": i, "ok": False, "error": str(out)})
+        else:
+            results.append({"index": i, "ok": True, "issue": out})
+            issues.append(out)
+
+    await post_slack_digest([x for x in issues if not x.get("merged")])
+    return {
+        "total": len(results),
+        "succeeded": len(issues),
+        "failed": len(results) - len(issues),
+        "merged": sum(1 for x in issues if x.get("merged")),
+        "results": results,
+    }
+
+
+def _db_error(e: Exception) -> HTTPException:
+    return HTTPException(503, f"Issue store unavailable: {e}")
+
+
+@router.get("", summary="Issues (paginated)")
+async def list_issues(
+    severity: Optional[str] = Query(None, pattern="^(High|Medium|Low)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = Query(None, ge=1, description="이전 응답의 next_cursor"),
+):
+    """최신순 이슈 목록 (severity 필터, keyset 페이지)."""
+    try:
+        return await issue_store.list_issues(severity, limit, cursor)
+    except Exception as e:
+        raise _db_error(e)
+
+
+@router.get("/board", summary="Issue board (Dev/PM/Design)")
+async def issue_board(
+    column: Optional[str] = Query(None, pattern="^(Dev|PM|Design)$"),
+    severity: Optional[str] = Query(None, pattern="^(High|Medium|Low)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = Query(None, ge=1, description="column 지정 시 이전 응답의 next_cursor"),
+):
+    """column 을 주면 그 column 의 카드 한 페이지, 없으면 세 column 의 첫 페이지."""
+    try:
+        if column:
+            return await issue_store.board(column, severity, limit, cursor)
+        return {c: await issue_store.board(c, severity, limit) for c in COLUMNS}
+    except Exception as e:
+        raise _db_error(e)
+
+
+@router.get("/stats", summary="Issue store / dedup stats")
+async def issue_stats():
+    return issue_store.stats()
+
+
+@router.get("/{issue_id}", summary="Issue detail")
+async def get_issue(issue_id: int):
+    try:
+        issue = await issue_store.get(issue_id)
+    except Exception as e:
+        raise _db_error(e)
+    if issue is None:
+        raise HTTPException(404, "issue not found")
+    return issue
@@ -0,0 +1,63 @@
+# app/api/jobs.py
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.services.jobs import jobs
+from app.services.sse import SSE_HEADERS, sse_stream
+
+router = APIRouter()
+
+
+def _public(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
+
+def accepted(job: dict) -> JSONResponse:
+    """async 모드 POST 응답 (202 + 상태 조회 URL)."""
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": f"/api/jobs/{job['id']}",
+            "events_url": f"/api/jobs/{job['id']}/events",
+        },
+        headers={"Location": f"/api/jobs/{job['id']}"},
+    )
+
+
+@router.get("/stats", tags=["jobs"])
+async def job_stats():
+    """queue depth / 처리량 / 평균 대기·실행 시간."""
+    return await jobs.stats()
+
+
+@router.get("/{job_id}", tags=["jobs"])
+async def get_job(job_id: str):
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "job not found")
+    return _public(job)
+
+
+@router.get("/{job_id}/events", tags=["jobs"])
+async def job_events(job_id: str):
+    """text/event-stream: 상태가 바뀔 때마다 job 이벤트, 종료 상태에서 스트림 종료."""
+    if await jobs.get(job_id) is None:
+        raise HTTPException(404, "job not found")
+
+    async def events():
+        async for job in jobs.watch(job_id):
+            yield "job", _public(job)
+
+    return StreamingResponse(
+        sse_stream(events()), media_type="text/event-stream", headers=SSE_HEADERS
+    )
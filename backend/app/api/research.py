@@ -1,18 +1,59 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.chains.research_chain import answer_question
+from starlette.background import BackgroundTask
+from app.chains.research_chain import answer_question, stream_answer
+from app.services.llm_limits import LLMLimitError
+from app.services.sse import SSE_HEADERS, sse_stream
+from app.services.jobs import jobs
+from app.api.jobs import accepted
 
 router = APIRouter()
 
 
 class QuestionIn(BaseModel):
     question: str
+    no_cache: bool = False  # True 면 캐시를 건너뛰고 새로 답변
+
+
+async def _research_job(payload: dict) -> dict:
+    ans = await answer_question(payload["question"], fresh=payload.get("no_cache", False))
+    return {"answer": ans}
+
+
+jobs.register("research", _research_job)
 
 
 @router.post("", tags=["research"])
-async def research_qa(payload: QuestionIn):
+async def research_qa(
+    payload: QuestionIn,
+    mode: str = Query("sync", pattern="^(sync|async)$"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    """mode=async 이면 job 으로 실행하고 202 + job_id 를 즉시 반환."""
+    if mode == "async":
+        job = await jobs.submit("research", payload.model_dump(), idempotency_key)
+        return accepted(job)
     try:
-        ans = await answer_question(payload.question)
+        ans = await answer_question(payload.question, fresh=payload.no_cache)
+    except LLMLimitError as e:
+        raise HTTPException(e.status_code, str(e), headers=e.headers)
     except Exception as e:
         raise HTTPException(500, f"QA Error: {e}")
     return {"answer": ans}
+
+
+@router.post("/stream", tags=["research"])
+async def research_qa_stream(payload: QuestionIn):
+    """text/event-stream: tool / tool_end / retrieval → token … → done."""
+    try:
+        events, release = await stream_answer(payload.question, fresh=payload.no_cache)
+    except LLMLimitError as e:
+        raise HTTPException(e.status_code, str(e), headers=e.headers)
+    return StreamingResponse(
+        sse_stream(events),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+        background=BackgroundTask(release),
+    )
@@ -1,27 +1,295 @@
-import os, json
+import os, io, csv, json, asyncio
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any
-from app.chains.template_chain import get_template_chain
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from starlette.background import BackgroundTask
+from typing import List, Dict, Any, Optional, Tuple
+from app.chains.template_chain import (
+    PROMPT_VERSION,
+    cache_payload,
+    get_template_chain,
+    log_generation,
+    stream_templates,
+    template_cache,
+)
+from app.services import feedback
+from app.services.bulk import bulk, run_id_for
+from app.services.singleflight import flight
+from app.services.llm_limits import LLMLimitError, ainvoke_limited
+from app.services.structured import StructuredOutputError
+from app.services.sse import SSE_HEADERS, sse_stream
 
 router = APIRouter()
 
 load_dotenv()
 
+# /bulk: 한 run 안에서 동시에 돌릴 셀 수 (글로벌 LLM 세마포어와 별개의 상한)
+TEMPLATE_BULK_CONCURRENCY = int(os.getenv("TEMPLATE_BULK_CONCURRENCY", "8"))
+TEMPLATE_BULK_MAX_CELLS = int(os.getenv("TEMPLATE_BULK_MAX_CELLS", "1000"))
+TEMPLATE_BULK_RETRIES = int(os.getenv("TEMPLATE_BULK_RETRIES", "2"))  # 셀별 LLM 혼잡(429/503/504) 재시도
+DEFAULT_FUNNEL_STAGES = ("Acquisition", "Retention", "Win-back")
+NDJSON_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 
 class TemplateIn(BaseModel):
     business_desc: str
     funnel_stage: str
     tone: str
     insight: str
+    no_cache: bool = False  # True 면 캐시를 건너뛰고 새로 생성
+
+
+class SegmentIn(BaseModel):
+    name: str = Field(min_length=1)
+    insight: Optional[str] = None  # 없으면 matrix 공통 insight
+    funnel_stage: Optional[str] = None  # 지정하면 이 세그먼트는 해당 stage 만
+    tone: Optional[str] = None  # 지정하면 이 세그먼트는 해당 tone 만
+
+
+class TemplateMatrixIn(BaseModel):
+    """segments × funnel_stages × tones 로 펼쳐지는 대량 생성 요청."""
+
+    business_desc: str = Field(min_length=1)
+    insight: str = ""
+    segments: List[SegmentIn] = Field(default_factory=list)  # 비우면 세그먼트 구분 없이 stage × tone
+    funnel_stages: List[str] = Field(default_factory=lambda: list(DEFAULT_FUNNEL_STAGES))
+    tones: List[str] = Field(default_factory=list)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+    no_cache: bool = False  # True 면 캐시와 이전 run 결과를 무시하고 전부 새로 생성
+
+    @field_validator("segments", mode="before")
+    @classmethod
+    def _segment_names(cls, value):
+        # ["VIP", "휴면"] 처럼 이름만 줘도 된다
+        return [{"name": v} if isinstance(v, str) else v for v in value or []]
+
+
+class ABResult(BaseModel):
+    funnel_stage: str
+    tone: str
+    copy_: str = Field(alias="copy", min_length=1)  # BaseModel.copy 와 이름 충돌 회피
+    rationale: str = ""
+    sends: int = Field(ge=0)
+    opens: int = Field(0, ge=0)
+    clicks: int = Field(0, ge=0)
+
+
+class ABResultsIn(BaseModel):
+    results: List[ABResult] = Field(max_length=10000)
+
+
+async def _generate(inputs: Dict[str, Any], no_cache: bool = False) -> Tuple[Any, bool]:
+    """(카피 목록, 새로 생성했는지). 캐시 → 동일 brief 합치기 → LLM."""
+    computed = False
+
+    async def compute():
+        nonlocal computed
+        computed = True
+        # 같은 brief 로 동시에 들어온 요청은 LLM 호출 1회를 공유
+        return await flight("template").do(
+            inputs, lambda: ainvoke_limited(get_template_chain(), inputs)
+        )
+
+    result = await template_cache.get_or_compute(cache_payload(inputs), compute, bypass=no_cache)
+    return result, computed
 
 
 @router.post("", response_model=List[Dict[str, Any]])
 async def generate_templates(payload: TemplateIn):
     try:
-        # LCEL pipeline → 바로 list[dict] 반환
-        result = get_template_chain().invoke(payload.model_dump())
+        # LCEL pipeline → 바로 list[dict] 반환 (이벤트 루프 비차단)
+        inputs = payload.model_dump(exclude={"no_cache"})
+        result, computed = await _generate(inputs, payload.no_cache)
+    except LLMLimitError as e:
+        raise HTTPException(e.status_code, str(e), headers=e.headers)
+    except StructuredOutputError as e:
+        raise HTTPException(502, f"Invalid LLM output: {e}")
     except Exception as e:
         raise HTTPException(500, f"LLM Error: {e}")
+    log_generation(inputs, result, cached=not computed)
     return result
+
+
+@router.post("/stream")
+async def generate_templates_stream(payload: TemplateIn):
+    """text/event-stream: 완성된 {copy, rationale} 객체마다 template 이벤트 → done."""
+    inputs = payload.model_dump(exclude={"no_cache"})
+    try:
+        events, release = await stream_templates(inputs, fresh=payload.no_cache)
+    except LLMLimitError as e:
+        raise HTTPException(e.status_code, str(e), headers=e.headers)
+    return StreamingResponse(
+        sse_stream(events),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+        background=BackgroundTask(release),
+    )
+
+
+def expand_matrix(matrix: TemplateMatrixIn) -> List[dict]:
+    """세그먼트 × funnel stage × tone → 셀 목록 (체인 입력 + segment)."""
+    cells = []
+    for segment in matrix.segments or [SegmentIn(name="-")]:
+        stages = [segment.funnel_stage] if segment.funnel_stage else matrix.funnel_stages
+        tones = [segment.tone] if segment.tone else matrix.tones
+        if not stages or not tones:
+            raise HTTPException(422, f"segment {segment.name!r}: funnel_stages/tones required")
+        for stage in stages:
+            for tone in tones:
+                cells.append({
+                    "segment": segment.name if matrix.segments else None,
+                    "funnel_stage": stage,
+                    "tone": tone,
+                    "business_desc": matrix.business_desc,
+                    "insight": segment.insight if segment.insight is not None else matrix.insight,
+                })
+    if len(cells) > TEMPLATE_BULK_MAX_CELLS:
+        raise HTTPException(422, f"{len(cells)} cells > TEMPLATE_BULK_MAX_CELLS ({TEMPLATE_BULK_MAX_CELLS})")
+    return cells
+
+
+def _cell_inputs(cell: dict) -> Dict[str, Any]:
+    # 체인 프롬프트는 그대로 두고 세그먼트는 인사이트 앞에 붙인다 (세그먼트 없는 셀은 단건 API 와 캐시 공유)
+    insight = cell["insight"]
+    if cell.get("segment"):
+        insight = f"[타깃 세그먼트: {cell['segment']}] {insight}".strip()
+    return {
+        "business_desc": cell["business_desc"],
+        "funnel_stage": cell["funnel_stage"],
+        "tone": cell["tone"],
+        "insight": insight,
+    }
+
+
+async def _generate_cell(cell: dict, no_cache: bool) -> Dict[str, Any]:
+    inputs = _cell_inputs(cell)
+    for attempt in range(TEMPLATE_BULK_RETRIES + 1):
+        try:
+            result, computed = await _generate(inputs, no_cache)
+            break
+        except LLMLimitError as e:
+            if attempt == TEMPLATE_BULK_RETRIES:
+                raise
+            await asyncio.sleep(e.retry_after * (attempt + 1))
+    log_generation(inputs, result, cached=not computed)
+    return {"templates": result, "cached": not computed}
+
+
+def _parse_csv(body: bytes, params: dict) -> TemplateMatrixIn:
+    """CSV 한 줄 = 세그먼트 (segment, insight, funnel_stage, tone 열). 공통 값은 query 로."""
+    rows = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+    segments = []
+    for row in rows:
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        name = row.get("segment") or row.get("name")
+        if not name:
+            continue
+        segments.append({
+            "name": name,
+            "insight": row.get("insight") or None,
+            "funnel_stage": row.get("funnel_stage") or None,
+            "tone": row.get("tone") or None,
+        })
+    split = lambda v: [x.strip() for x in v.split(",") if x.strip()] if v else None
+    data = {
+        "business_desc": params.get("business_desc") or "",
+        "insight": params.get("insight") or "",
+        "segments": segments,
+        "tones": split(params.get("tones")) or [],
+    }
+    if split(params.get("funnel_stages")):
+        data["funnel_stages"] = split(params.get("funnel_stages"))
+    return TemplateMatrixIn(**data)
+
+
+def _ndjson(records) -> StreamingResponse:
+    async def lines():
+        async for record in records:
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=NDJSON_HEADERS)
+
+
+def _run_bulk(cells: List[dict], run_id: str, no_cache: bool, max_concurrency: Optional[int]):
+    concurrency = min(max_concurrency or TEMPLATE_BULK_CONCURRENCY, TEMPLATE_BULK_CONCURRENCY)
+    return _ndjson(
+        bulk.run(
+            "template",
+            cells,
+            lambda cell: _generate_cell(cell, no_cache),
+            concurrency,
+            run_id,
+            fresh=no_cache,
+        )
+    )
+
+
+@router.post("/bulk")
+async def generate_templates_bulk(
+    request: Request,
+    business_desc: Optional[str] = Query(None, description="CSV 본문일 때 공통 비즈니스 설명"),
+    insight: Optional[str] = Query(None, description="CSV 본문일 때 공통 인사이트"),
+    funnel_stages: Optional[str] = Query(None, description="CSV 본문일 때 쉼표 구분 (기본 Acquisition,Retention,Win-back)"),
+    tones: Optional[str] = Query(None, description="CSV 본문일 때 쉼표 구분"),
+    max_concurrency: Optional[int] = Query(None, ge=1),
+    no_cache: bool = False,
+):
+    """segment × funnel stage × tone matrix → 셀이 끝날 때마다 NDJSON 한 줄.
+
+    본문: TemplateMatrixIn JSON, 또는 text/csv (한 줄 = 세그먼트).
+    첫 줄 {"type":"run","run_id"}, 셀마다 {"type":"cell",...,"ok","templates"|"error"}, 끝에 {"type":"done"}.
+    같은 matrix 를 다시 보내거나 /bulk/{run_id}/resume 하면 성공한 셀은 저장된 결과로 (resumed) 건너뛴다.
+    """
+    body = await request.body()
+    try:
+        if "csv" in request.headers.get("content-type", ""):
+            params = {"business_desc": business_desc, "insight": insight, "funnel_stages": funnel_stages, "tones": tones}
+            matrix = _parse_csv(body, params)
+        else:
+            matrix = TemplateMatrixIn.model_validate_json(body or b"{}")
+    except ValidationError as e:
+        raise HTTPException(422, json.loads(e.json(include_url=False)))
+    except UnicodeDecodeError:
+        raise HTTPException(422, "CSV must be UTF-8")
+    cells = expand_matrix(matrix)
+    no_cache = no_cache or matrix.no_cache
+    return _run_bulk(
+        cells,
+        run_id_for("template", cells, PROMPT_VERSION),
+        no_cache,
+        max_concurrency or matrix.max_concurrency,
+    )
+
+
+@router.get("/bulk/{run_id}")
+async def bulk_progress(run_id: str):
+    """run 진행 상황 (셀별 ok/error, 미완료 수)."""
+    progress = await bulk.progress(run_id)
+    if progress is None:
+        raise HTTPException(404, "bulk run not found")
+    return progress
+
+
+@router.post("/bulk/{run_id}/resume")
+async def resume_templates_bulk(run_id: str, max_concurrency: Optional[int] = Query(None, ge=1)):
+    """중단된 run 을 저장된 matrix 로 이어서 실행 (실패/미완료 셀만 LLM 호출)."""
+    run = await asyncio.to_thread(bulk.store.get, run_id)
+    if run is None or run["kind"] != "template":
+        raise HTTPException(404, "bulk run not found")
+    return _run_bulk(run["cells"], run_id, False, max_concurrency)
+
+
+@router.post("/ab-results")
+async def ingest_ab_results(payload: ABResultsIn):
+    """A/B 발송 결과 일괄 수집 (같은 카피는 누적). 상위 카피 캐시도 즉시 갱신."""
+    try:
+        return await feedback.record_results(r.model_dump(by_alias=True) for r in payload.results)
+    except Exception as e:
+        raise HTTPException(503, f"DB Error: {e}")
+
+
+@router.get("/top")
+async def top_templates(funnel_stage: str, tone: str):
+    """퍼널/톤별 상위 카피 (few-shot 으로 쓰이는 것과 동일한 메모리 캐시)."""
+    return feedback.top_copies.get(funnel_stage, tone)
@@ -1,6 +1,8 @@
-import os
+import os, asyncio
+from typing import List
 from fastapi import APIRouter, HTTPException, UploadFile, File
-from azure.storage.blob import BlobServiceClient, ContentSettings
+from app.services.clients import registry
+from app.services.ingest import ingestor
 
 router = APIRouter()
 
@@ -10,32 +12,13 @@ AZURE_CONTAINER_NAME = os.getenv("AZURE_CONTAINER") or os.getenv(
     "AZURE_CONTAINER_NAME", "uploads"
 )
 AZURE_STORAGE_ACCOUNT = os.getenv("AZURE_STORAGE_ACCOUNT")  # for building public URL
+# /batch 에서 동시에 업로드하는 파일 수
+VOC_PARALLEL_FILES = int(os.getenv("VOC_PARALLEL_FILES", "4"))
+# 업로드 직후 검색 인덱스로 백그라운드 색인 (chunk → embed → index)
+VOC_AUTO_INGEST = os.getenv("VOC_AUTO_INGEST", "1") == "1"
 
 
-def _get_container_client():
-    if not AZURE_STORAGE_CONN_STR:
-        raise HTTPException(
-            status_code=500, detail="storage connection string not configured"
-        )
-    try:
-        bsc = BlobServiceClient.from_connection_string(AZURE_STORAGE_CONN_STR)
-        container = bsc.get_container_client(AZURE_CONTAINER_NAME)
-        try:
-            container.create_container()
-        except Exception:
-            pass
-        return container
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"blob client error: {e}")
-
-
-@router.post("", tags=["voc"])
-async def upload_voc(file: UploadFile = File(...)):
-    """Direct upload endpoint for VOC files (server-side upload using connection string).
-    Accepts multipart/form-data with field name 'file'.
-    Constraints: filename must include '_voc' and end with .pdf or .txt
-    Returns: { fileUrl }
-    """
+def _validate(file: UploadFile) -> str:
     if not file or not file.filename:
         raise HTTPException(status_code=400, detail="file is required")
 
@@ -48,32 +31,77 @@ async def upload_voc(file: UploadFile = File(...)):
             status_code=400,
             detail="filename must include _voc and end with .pdf or .txt",
         )
+    return filename
 
-    container = _get_container_client()
+
+def _get_blob_service():
+    if not AZURE_STORAGE_CONN_STR:
+        raise HTTPException(
+            status_code=500, detail="storage connection string not configured"
+        )
+    return registry.blob_service()
+
+
+async def _upload_one(file: UploadFile) -> str:
+    """UploadFile 을 청크 단위로 읽어 staged block 업로드. 반환: fileUrl."""
+    filename = _validate(file)
+    service = _get_blob_service()
 
     try:
-        data = await file.read()
-        content_type = "text/plain" if lower.endswith(".txt") else "application/pdf"
-        blob = container.get_blob_client(filename)
-        blob.upload_blob(
-            data,
-            overwrite=True,
-            content_settings=ContentSettings(content_type=content_type),
+        content_type = (
+            "text/plain" if filename.lower().endswith(".txt") else "application/pdf"
+        )
+        # 파일 전체를 메모리에 올리지 않고 BLOB_CHUNK_SIZE 씩 스트리밍
+        blob, content_hash = await service.upload_stream(
+            filename, file.read, content_type
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"upload failed: {e}")
     finally:
         await file.close()
 
+    if VOC_AUTO_INGEST:
+        ingestor.schedule(filename, content_hash)
+
     if not AZURE_STORAGE_ACCOUNT:
         # build from container client url as fallback
         try:
-            file_url = f"{blob.url}"
+            return f"{blob.url}"
         except Exception:
             raise HTTPException(
                 status_code=500, detail="AZURE_STORAGE_ACCOUNT not configured"
             )
-    else:
-        file_url = f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{AZURE_CONTAINER_NAME}/{filename}"
+    return f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{AZURE_CONTAINER_NAME}/{filename}"
+
+
+@router.post("", tags=["voc"])
+async def upload_voc(file: UploadFile = File(...)):
+    """Direct upload endpoint for VOC files (server-side upload using connection string).
+    Accepts multipart/form-data with field name 'file'.
+    Constraints: filename must include '_voc' and end with .pdf or .txt
+    Returns: { fileUrl }
+    """
+    return {"fileUrl": await _upload_one(file)}
+
+
+@router.post("/batch", tags=["voc"])
+async def upload_voc_batch(files: List[UploadFile] = File(...)):
+    """Multi-file VOC upload (field name 'files'), uploaded in parallel.
+    Returns: { results: [{ filename, ok, fileUrl | error }] } — one entry per file.
+    """
+    sem = asyncio.Semaphore(VOC_PARALLEL_FILES)
+
+    async def run(file: UploadFile) -> dict:
+        async with sem:
+            try:
+                return {
+                    "filename": file.filename,
+                    "ok": True,
+                    "fileUrl": await _upload_one(file),
+                }
+            except HTTPException as e:
+                return {"filename": file.filename, "ok": False, "error": e.detail}
 
-    return {"fileUrl": file_url}
+    return {"results": await asyncio.gather(*(run(f) for f in files))}
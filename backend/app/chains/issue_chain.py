@@ -1,8 +1,19 @@
 import os
+from functools import lru_cache
+from typing import Any, List, Literal, Tuple
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI
-from langchain.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain_core.output_parsers.json import JsonOutputParser
+from pydantic import BaseModel, Field
+from app.services.cache import get_cache, prompt_fingerprint
+from app.services.clients import registry
+from app.services.structured import OutputSpec, structured_chain
+from app.services.prompts import (
+    CONTEXT_TOKEN_BUDGET,
+    static_prompt,
+    truncate_tokens,
+    usage_handler,
+)
 
 
 load_dotenv()
@@ -46,37 +57,91 @@ EXAMPLES = (
     "}\n"
 )
 
-issue_prompt = PromptTemplate(
-    input_variables=["answer"],
-    template=r"""
-You are a product owner who converts UX insight into a triage-ready issue.
+# 고정 prefix (지시문 + format + few-shot) → 매 요청 동일해 prompt caching 대상
+SYSTEM_PREFIX = f"""You are a product owner who converts UX insight into a triage-ready issue.
 Return ONLY valid JSON (UTF-8, double quotes). No extra text before/after JSON.
 Each output must be an object with keys: "title" (string), "severity" (one of High/Medium/Low), "tasks" (object with keys Dev, PM, Design; each an array of 3 concise items).
 {format_instructions}
 
-{EXAMPLES}
+{EXAMPLES}"""
 
-Answer (context):
+TASK_TEMPLATE = """Answer (context):
 {answer}
 
 Output JSON:
-""",
-    partial_variables={
-        "format_instructions": format_instructions,
-        "EXAMPLES": EXAMPLES,
-    },
-)
+"""
 
-llm = AzureChatOpenAI(
-    azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    temperature=0.7,
-    max_tokens=500,
-)
+issue_prompt = static_prompt(SYSTEM_PREFIX, TASK_TEMPLATE)
+
+
+# --- Output schema (response_format + 검증) ---
+class IssueTasks(BaseModel):
+    Dev: List[str] = Field(min_length=1, max_length=3)
+    PM: List[str] = Field(min_length=1, max_length=3)
+    Design: List[str] = Field(min_length=1, max_length=3)
+
+
+class IssueOut(BaseModel):
+    title: str = Field(min_length=1)
+    severity: Literal["High", "Medium", "Low"]
+    tasks: IssueTasks
+
+
+_SEVERITY = {
+    "high": "High", "critical": "High", "urgent": "High", "높음": "High", "긴급": "High",
+    "medium": "Medium", "normal": "Medium", "moderate": "Medium", "보통": "Medium", "중간": "Medium",
+    "low": "Low", "minor": "Low", "낮음": "Low",
+}
+_ROLES = {"dev": "Dev", "developer": "Dev", "pm": "PM", "design": "Design", "designer": "Design"}
+
+
+def _coerce_issue(obj: Any) -> Tuple[Any, bool]:
+    """키 이름/대소문자, 빠진 severity(→ Medium), 문자열 task, 3개 초과 task 를 로컬에서 맞춘다."""
+    if isinstance(obj, list) and obj and isinstance(obj[0], dict):
+        return _coerce_issue(obj[0])[0], True
+    if not isinstance(obj, dict):
+        return obj, False
+    if "title" not in obj and isinstance(obj.get("issue"), dict):
+        return _coerce_issue(obj["issue"])[0], True
+    out = {k: obj[k] for k in ("title", "severity", "tasks") if k in obj}
+    if isinstance(out.get("title"), str):
+        out["title"] = out["title"].strip()
+    severity = str(out.get("severity") or "").strip()
+    out["severity"] = _SEVERITY.get(severity.lower(), "Medium")
+    tasks = out.get("tasks")
+    if isinstance(tasks, dict):
+        fixed = {}
+        for key, items in tasks.items():
+            role = _ROLES.get(str(key).strip().lower())
+            if role is None:
+                continue
+            if isinstance(items, str):
+                items = [items]
+            if isinstance(items, list):
+                fixed[role] = [str(x).strip() for x in items if str(x).strip()][:3]
+        out["tasks"] = fixed
+    return out, out != obj
+
+
+ISSUE_OUTPUT = OutputSpec("issue", IssueOut, _coerce_issue)
+
+PROMPT_VERSION = prompt_fingerprint(SYSTEM_PREFIX, TASK_TEMPLATE)
+issue_cache = get_cache("issue", PROMPT_VERSION)
+
+
+def _compact(inputs: dict) -> dict:
+    """리서치 답변(가변 컨텍스트)을 토큰 예산에 맞춰 자른다."""
+    return {**inputs, "answer": truncate_tokens(str(inputs.get("answer", "")), CONTEXT_TOKEN_BUDGET)}
 
 
+@lru_cache(maxsize=None)
 def get_issue_chain():
-    """Issue chain for processing UX insights into actionable issues."""
-    return issue_prompt | llm | parser
+    """Issue chain for processing UX insights into actionable issues (첫 호출 때 생성)."""
+    # 공유 커넥션 풀을 쓰는 레지스트리 클라이언트 (+ 토큰 사용량 집계)
+    llm = registry.chat_llm(
+        temperature=0.7,
+        max_tokens=500,
+        callbacks=[usage_handler("issue", SYSTEM_PREFIX)],
+    )
+    # response_format(JSON schema) → 로컬 수리 → 필요할 때만 재요청. 결과는 검증된 dict
+    return RunnableLambda(_compact) | structured_chain(issue_prompt, llm, ISSUE_OUTPUT)
@@ -1,23 +1,35 @@
-import os, datetime as dt, asyncio
-from datetime import timezone
-from typing import List
-from typing import Optional
+import os, re, asyncio
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, List, Tuple, Union
 
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import tool
 from langchain_core.prompts import MessagesPlaceholder
-from langchain.agents import create_tool_calling_agent, AgentExecutor
 
 from langchain.schema import Document
-from langchain_community.retrievers.azure_ai_search import AzureAISearchRetriever
-from langchain_tavily import TavilySearch
 
-from azure.storage.blob import BlobProperties
-from app.services.blob import BlobService
+from app.services.clients import registry
+from app.services.llm_limits import (
+    LLMTimeoutError,
+    acquire_slot,
+    ainvoke_limited,
+    deadline_after,
+    until_deadline,
+)
+from app.services.cache import MISSING, get_cache, prompt_fingerprint
+from app.services.retrieval import RETRIEVAL_CANDIDATES, hybrid_retrieve
+from app.services.singleflight import flight
+from app.services.telemetry import Counter, annotate, traced
+from app.services.web_cache import web_cache
+from app.services.prompts import (
+    CONTEXT_TOKEN_BUDGET,
+    fit_context,
+    static_prompt,
+    usage_handler,
+)
 
 load_dotenv()
 
@@ -41,115 +53,140 @@ def wrap_doc(item) -> Document:
     raise ValueError("Unsupported doc type")
 
 
-def format_docs(docs: List[Document]) -> str:
-    return "\n\n".join(d.page_content for d in docs if d.page_content)
+def format_docs(docs: List[Document], budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """검색 문서를 순서대로 이어 붙이되 토큰 예산을 넘기지 않는다."""
+    return fit_context((d.page_content for d in docs), budget)
 
 
 # ─────────────────────────── Tools ────────────────────────────────────────────
+def _retrievers():
+    """(전체 인덱스, PDF) retriever — 레지스트리 memo 라 첫 호출 때만 생성."""
+    # 후보는 RETRIEVAL_CANDIDATES 개씩 (retrieval 단계에서 rerank 로 줄임)
+    return (
+        registry.search_retriever("search", top_k=RETRIEVAL_CANDIDATES, content_key="chunk"),
+        registry.search_retriever("pdf", top_k=RETRIEVAL_CANDIDATES),  # Azure Search retriever for PDFs
+    )
 
-_blob = BlobService()
 
-search_retriever = AzureAISearchRetriever(
-    service_name=os.getenv("AZURE_SEARCH_NAME"),
-    index_name=os.getenv("AZURE_SEARCH_INDEX"),
-    api_key=os.getenv("AZURE_SEARCH_KEY"),
-    top_k=5,
-    content_key="chunk",
+# Few-shot examples injected into the prompt (structure-preserving)
+PDF_EXAMPLES = (
+    "# Examples\n"
+    "Example 1\n"
+    "Context:\n"
+    "- 장바구니 이탈율이 62%로 높음\n"
+    "- 모바일에서 결제 페이지 로딩이 3.2s → 전환율 저하\n"
+    "Question: 장바구니 이탈을 낮추려면?\n"
+    "Answer (Korean):\n"
+    "• 로딩 원인(이미지/스크립트)을 줄이고 결제 페이지 TTFB 목표 1s 이하로 개선\n"
+    "• 장바구니 보존 기간을 7일로 늘리고, 이어하기 CTA를 상단 고정\n"
+    "• 실패한 결제 재시도 유도 배너 및 고객센터 진입 동선 추가\n\n"
+    "Example 2\n"
+    "Context:\n"
+    "- 신규 유입은 많으나 온보딩 튜토리얼 이탈률 45%\n"
+    "- 튜토리얼 길이 12단계, 핵심 가치 제시가 늦음\n"
+    "Question: 온보딩 완주율을 올리려면?\n"
+    "Answer (Korean):\n"
+    "• 3~5단계로 축소하고 첫 10초 내 핵심 가치(혜택)를 먼저 제시\n"
+    "• 단계별 진행률/보상 표시, 건너뛰기 후 재진입 경로 제공\n"
+    "• 마이크로 카피로 사용자의 다음 행동을 구체적으로 안내\n"
 )
 
-# Azure Search retriever for PDFs
-pdf_retriever = AzureAISearchRetriever(
-    service_name=os.getenv("AZURE_SEARCH_NAME"),
-    index_name=os.getenv("AZURE_SEARCH_INDEX"),
-    api_key=os.getenv("AZURE_SEARCH_KEY"),
+# 고정 prefix 를 앞에 두고 (prompt caching), 가변 context/question 은 뒤에
+PDF_SYSTEM_PREFIX = (
+    "You are a senior UX researcher. Use ONLY the context.\n"
+    "Answer in Korean as 3-5 concise bullet points using only facts from Context. "
+    "If information is missing, reply: '문서에서 답을 찾을 수 없습니다.'\n\n"
+    + PDF_EXAMPLES
 )
+pdf_prompt = static_prompt(PDF_SYSTEM_PREFIX, "Context:\n{context}\n\nQuestion: {question}")
 
 
-def latest_pdf_sync() -> Optional[BlobProperties]:
-    """Synchronously fetch the latest PDF using the async BlobService helper."""
-    try:
-        return asyncio.run(_blob.latest_pdf())
-    except RuntimeError:
-        # Already inside an event loop (FastAPI / agent). Use create_task + gather.
-        loop = asyncio.get_event_loop()
-        return loop.run_until_complete(_blob.latest_pdf())
+@lru_cache(maxsize=None)
+def get_summary_chain():
+    """pdf_search / fast path 요약 체인 (첫 호출 때 생성, 이후 재사용)."""
+    summary_llm = registry.chat_llm(
+        temperature=0.3,
+        max_tokens=400,
+        fallback=True,  # primary 가 모두 막히면 저렴한 fallback 모델로 요약
+        callbacks=[usage_handler("pdf_search", PDF_SYSTEM_PREFIX)],
+    )
+    return pdf_prompt | summary_llm | StrOutputParser()
 
 
-@tool
-def pdf_search(query: str) -> str:
-    """Search PDFs & Azure Search for UX research answers."""
-    latest = latest_pdf_sync()
-    pdf_age = (
-        (dt.datetime.now(timezone.utc) - latest.last_modified).days if latest else 999
-    )
+# PDF 가 최신(<=7일)이면 전체 인덱스 검색 결과는 낮은 가중치로 융합
+STALE_PDF_DAYS = 7
+FRESH_SEARCH_WEIGHT = float(os.getenv("FRESH_SEARCH_WEIGHT", "0.5"))
+# 1 이면 pdf_search 의 hybrid 검색에 Tavily 결과도 함께 융합
+HYBRID_WEB_SEARCH = os.getenv("HYBRID_WEB_SEARCH", "0") == "1"
 
-    docs = [wrap_doc(d) for d in (pdf_retriever.invoke(query) or [])]
 
-    if (not docs) or pdf_age > 7:
-        docs += [wrap_doc(d) for d in (search_retriever.invoke(query) or [])]
+def _retriever_source(retriever, name: str):
+    async def fetch(query: str) -> List[Document]:
+        docs = await flight(f"retriever:{name}").do(
+            query,
+            lambda: retriever.ainvoke(query, config={"run_name": f"retriever:{name}"}),
+        )
+        return [wrap_doc(d) for d in (docs or [])]
 
-    if not docs:
-        return "관련 문서를 찾을 수 없습니다."
+    return fetch
 
-    llm = AzureChatOpenAI(
-        azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        api_key=os.getenv("AZURE_OPENAI_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-        temperature=0.3,
-        max_tokens=400,
-    )
 
-    # Few-shot examples injected into the prompt (structure-preserving)
-    examples_text = (
-        "# Examples\n"
-        "Example 1\n"
-        "Context:\n"
-        "- 장바구니 이탈율이 62%로 높음\n"
-        "- 모바일에서 결제 페이지 로딩이 3.2s → 전환율 저하\n"
-        "Question: 장바구니 이탈을 낮추려면?\n"
-        "Answer (Korean):\n"
-        "• 로딩 원인(이미지/스크립트)을 줄이고 결제 페이지 TTFB 목표 1s 이하로 개선\n"
-        "• 장바구니 보존 기간을 7일로 늘리고, 이어하기 CTA를 상단 고정\n"
-        "• 실패한 결제 재시도 유도 배너 및 고객센터 진입 동선 추가\n\n"
-        "Example 2\n"
-        "Context:\n"
-        "- 신규 유입은 많으나 온보딩 튜토리얼 이탈률 45%\n"
-        "- 튜토리얼 길이 12단계, 핵심 가치 제시가 늦음\n"
-        "Question: 온보딩 완주율을 올리려면?\n"
-        "Answer (Korean):\n"
-        "• 3~5단계로 축소하고 첫 10초 내 핵심 가치(혜택)를 먼저 제시\n"
-        "• 단계별 진행률/보상 표시, 건너뛰기 후 재진입 경로 제공\n"
-        "• 마이크로 카피로 사용자의 다음 행동을 구체적으로 안내\n"
-    )
+async def _tavily_search(query: str) -> dict:
+    """결과 캐시 / 로컬 snippet 인덱스 → 없으면 Tavily 호출 (동일 query 동시 호출은 1회로 합침)."""
+
+    def fetch():
+        tav = registry.tavily(k=3, search_depth="basic")
+        return flight("tavily").do(query, lambda: tav.ainvoke(query))
+
+    return await web_cache.search(query, fetch)
+
+
+async def _tavily_docs(query: str) -> List[Document]:
+    raw = await _tavily_search(query)
+    return [
+        Document(
+            page_content=f"{item.get('title', '')} – {item.get('content', '')}",
+            metadata={"url": item.get("url"), "source": "web"},
+        )
+        for item in raw.get("results", [])
+        if isinstance(item, dict)
+    ]
 
-    prompt = ChatPromptTemplate.from_template(
-        "You are a senior UX researcher. Use ONLY the context.\n\n"
-        "{examples}\n\n"
-        "Context:\n{context}\n\n"
-        "Question: {question}\n"
-        "Answer in Korean as 3-5 concise bullet points using only facts from Context. "
-        "If information is missing, reply: '문서에서 답을 찾을 수 없습니다.'"
-    ).partial(examples=examples_text)
-
-    chain = (
-        {
-            "context": lambda q: format_docs(docs),
-            "question": RunnablePassthrough(),
-        }
-        | prompt
-        | llm
-        | StrOutputParser()
+
+async def retrieve_docs(query: str) -> List[Document]:
+    """pdf + 전체 인덱스 (+ 선택적으로 Tavily) hybrid 검색."""
+    # 캐시된 최신 PDF 인덱스 조회 (컨테이너 스캔 없음)
+    pdf_age = await registry.blob_service().pdf_age_days()
+
+    # 두 retriever (+ 선택적으로 Tavily) 를 동시에 조회 → 중복 제거 + RRF + 토큰 예산
+    search_retriever, pdf_retriever = _retrievers()
+    sources = {
+        "pdf": _retriever_source(pdf_retriever, "pdf"),
+        "search": _retriever_source(search_retriever, "search"),
+    }
+    if HYBRID_WEB_SEARCH:
+        sources["web"] = _tavily_docs
+    weights = {"search": 1.0 if pdf_age > STALE_PDF_DAYS else FRESH_SEARCH_WEIGHT}
+    docs, _ = await hybrid_retrieve(query, sources, weights=weights)  # 소스별 latency 는 /api/retrieval/stats
+    return docs
+
+
+@tool
+async def pdf_search(query: str) -> str:
+    """Search PDFs & Azure Search for UX research answers."""
+    docs = await retrieve_docs(query)
+    if not docs:
+        return "관련 문서를 찾을 수 없습니다."
+
+    return await get_summary_chain().ainvoke(
+        {"context": format_docs(docs), "question": query}
     )
-    return chain.invoke(query)
 
 
 @tool
-def web_search(query: str) -> str:
+async def web_search(query: str) -> str:
     """Search the public web via Tavily (returns top-k snippets)."""
-    tav = TavilySearch(k=3, search_depth="basic")
-
-    raw = tav.invoke(query)  # dict
+    raw = await _tavily_search(query)  # dict
     results = raw.get("results", [])  # 실제 문서 리스트 추출
 
     # 결과가 dict(list) → Document 변환
@@ -164,34 +201,243 @@ def web_search(query: str) -> str:
 # ───────────────────────── Agent setup ────────────────────────────────────────
 TOOLS = [pdf_search, web_search]
 
-base_llm = AzureChatOpenAI(
-    azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    temperature=0,
-    max_tokens=512,
+AGENT_SYSTEM_PREFIX = (
+    "당신은 CRM 전문가이자 UX 리서처입니다. "
+    "고객 퍼널별 UX 인사이트, CRM 메시지 템플릿과 관련된 질문은 pdf_search 도구를 우선 사용하고, "
+    "최신 일반 정보가 필요하면 web_search 도구를 사용하세요."
 )
 
 agent_prompt = ChatPromptTemplate.from_messages(
     [
-        (
-            "system",
-            "당신은 CRM 전문가이자 UX 리서처입니다. "
-            "고객 퍼널별 UX 인사이트, CRM 메시지 템플릿과 관련된 질문은 pdf_search 도구를 우선 사용하고, "
-            "최신 일반 정보가 필요하면 web_search 도구를 사용하세요.",
-        ),
+        ("system", AGENT_SYSTEM_PREFIX),
         ("user", "{input}"),
         MessagesPlaceholder("agent_scratchpad"),
     ]
 )
 
-AGENT = create_tool_calling_agent(base_llm, TOOLS, agent_prompt)
-EXECUTOR = AgentExecutor(agent=AGENT, tools=TOOLS, verbose=True)
+# 실행 단계는 telemetry span 으로 기록 — 콘솔 로그는 필요할 때만
+# 에이전트는 여러 번의 LLM turn 을 돌기 때문에 단일 호출보다 긴 deadline
+RESEARCH_TIMEOUT = float(os.getenv("RESEARCH_TIMEOUT", "90"))
+# agent 경로 예산: 도구 호출 반복 횟수 / 실행 시간 (초과 시 그때까지의 결과로 종료)
+AGENT_MAX_ITERATIONS = int(os.getenv("AGENT_MAX_ITERATIONS", "4"))
+AGENT_MAX_EXECUTION_TIME = float(os.getenv("AGENT_MAX_EXECUTION_TIME", "45"))
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    """도구 호출 에이전트 (첫 agent 경로 요청 때 생성). langchain.agents import 도 여기서."""
+    from langchain.agents import create_tool_calling_agent, AgentExecutor
+
+    base_llm = registry.chat_llm(
+        temperature=0,
+        max_tokens=512,
+        callbacks=[usage_handler("research_agent", AGENT_SYSTEM_PREFIX)],
+    )
+    agent = create_tool_calling_agent(base_llm, TOOLS, agent_prompt)
+    return AgentExecutor(
+        agent=agent,
+        tools=TOOLS,
+        max_iterations=AGENT_MAX_ITERATIONS,
+        max_execution_time=AGENT_MAX_EXECUTION_TIME,
+        verbose=os.getenv("AGENT_VERBOSE", "0") == "1",
+    )
+
+
+# ───────────────────────── Router ─────────────────────────────────────────────
+# rules: 키워드 규칙으로 rag / web / agent 선택 | agent: 항상 에이전트 (기존 동작)
+RESEARCH_ROUTER = os.getenv("RESEARCH_ROUTER", "rules")
+# 이보다 긴 질문은 여러 하위 질문일 가능성이 높아 agent 로
+ROUTER_AGENT_MIN_CHARS = int(os.getenv("ROUTER_AGENT_MIN_CHARS", "200"))
+
+_WEB_HINTS = (
+    "최신", "최근", "뉴스", "트렌드", "동향", "요즘", "올해", "작년", "경쟁사", "시장 규모",
+    "통계", "발표", "출시", "latest", "recent", "news", "trend", "today", "this year", "market",
+)
+_DOMAIN_HINTS = (
+    "ux", "퍼널", "funnel", "crm", "이탈", "전환", "온보딩", "장바구니", "리텐션", "재구매",
+    "voc", "인사이트", "페르소나", "사용성", "템플릿", "메시지", "푸시", "쿠폰", "가입", "결제",
+)
+_AGENT_HINTS = ("비교", "각각", "단계별", "동시에", " vs", "versus", "compare", "and also")
+_YEAR = re.compile(r"\b20\d\d\b")
+
+ROUTES = Counter("crm_research_route_total", "Research questions by router decision")
+
+
+def route_question(question: str) -> str:
+    """rag (사내 문서 검색 → 요약 1회) | web (Tavily → 요약 1회) | agent (도구 호출 에이전트)."""
+    if RESEARCH_ROUTER != "rules":
+        return "agent"
+    q = question.lower()
+    if (
+        any(h in q for h in _AGENT_HINTS)
+        or q.count("?") > 1
+        or len(question) > ROUTER_AGENT_MIN_CHARS
+    ):
+        return "agent"
+    web = any(h in q for h in _WEB_HINTS) or bool(_YEAR.search(q))
+    domain = any(h in q for h in _DOMAIN_HINTS)
+    if web and domain:
+        return "agent"  # 사내 문서 + 최신 정보를 같이 봐야 하는 질문
+    return "web" if web else "rag"
+
+
+async def _fast_docs(question: str, route: str) -> Tuple[str, List[Document]]:
+    """(실제 route, 문서). rag 에서 문서가 없으면 web 으로 폴백."""
+    if route == "rag":
+        docs = await retrieve_docs(question)
+        if docs:
+            return "rag", docs
+    return "web", await _tavily_docs(question)
+
+
+async def _fast_answer(inputs: dict) -> str:
+    """고정 retrieve → answer 파이프라인 (LLM 1회)."""
+    route, docs = await _fast_docs(inputs["question"], inputs["route"])
+    annotate(route=route, docs=len(docs))
+    if not docs:
+        return "관련 문서를 찾을 수 없습니다."
+    return await get_summary_chain().ainvoke(
+        {"context": format_docs(docs), "question": inputs["question"]}
+    )
+
+
+FAST_PATH = RunnableLambda(_fast_answer, name="research_fast_path")
+
+# 리서치 답변은 문서 갱신에 따라 달라지므로 짧은 TTL + 유사 질문 조회
+PROMPT_VERSION = prompt_fingerprint(
+    str(agent_prompt.messages[0].prompt.template),
+    *(f"{t.name}:{t.description}" for t in TOOLS),
+    PDF_SYSTEM_PREFIX,
+    RESEARCH_ROUTER,
+)
+research_cache = get_cache(
+    "research",
+    PROMPT_VERSION,
+    semantic=True,
+    ttl=float(os.getenv("RESEARCH_CACHE_TTL", "900")),
+)
 
 
 # ───────────────────────── Public entry ───────────────────────────────────────
-async def answer_question(question: str) -> str:
-    """Async entry for FastAPI."""
-    result = await EXECUTOR.ainvoke({"input": question})
-    return result["output"]
+async def answer_question(question: Union[str, dict], fresh: bool = False) -> str:
+    """Async entry for FastAPI (글로벌 LLM 동시성 제한 + deadline 적용).
+
+    fresh=True 이면 응답 캐시를 건너뛰고 에이전트를 새로 실행한다.
+    """
+    if isinstance(question, dict):
+        question = question.get("question", "")
+
+    async def _run() -> str:
+        route = route_question(question)
+        ROUTES.inc(route=route)
+        annotate(route=route)
+        if route != "agent":
+            return await ainvoke_limited(
+                FAST_PATH, {"question": question, "route": route}, timeout=RESEARCH_TIMEOUT
+            )
+        result = await ainvoke_limited(
+            get_executor(), {"input": question}, timeout=RESEARCH_TIMEOUT
+        )
+        return result["output"]
+
+    # 같은 질문이 동시에 들어오면 에이전트/요약 실행 1회를 공유
+    return await research_cache.get_or_compute(
+        question, lambda: flight("research").do(question, _run), bypass=fresh
+    )
+
+
+# ───────────────────────── Streaming entry ────────────────────────────────────
+async def _replay(answer: str) -> AsyncIterator[Tuple[str, Any]]:
+    yield "token", {"text": answer}
+    yield "done", {"answer": answer, "cached": True}
+
+
+async def _agent_events(
+    question: str, deadline: float, release: Callable[[], None]
+) -> AsyncIterator[Tuple[str, Any]]:
+    """에이전트 실행 이벤트 → (event, data).
+
+    tool 실행 중이 아닐 때 나오는 chat model 토큰만 최종 답변 토큰으로 본다
+    (pdf_search 내부 요약 LLM 토큰은 제외).
+    """
+    active_tools = 0
+    output = None
+    try:
+        yield "route", {"route": "agent"}
+        events = get_executor().astream_events({"input": question}, config=traced(), version="v2")
+        async for ev in until_deadline(events, deadline, RESEARCH_TIMEOUT):
+            kind = ev["event"]
+            if kind == "on_tool_start":
+                active_tools += 1
+                yield "tool", {"tool": ev["name"], "input": ev["data"].get("input")}
+            elif kind == "on_tool_end":
+                active_tools = max(active_tools - 1, 0)
+                yield "tool_end", {"tool": ev["name"]}
+            elif kind == "on_retriever_end":
+                docs = ev["data"].get("output") or []
+                yield "retrieval", {"retriever": ev["name"], "docs": len(docs)}
+            elif kind == "on_chat_model_stream" and active_tools == 0:
+                text = getattr(ev["data"].get("chunk"), "content", "")
+                if isinstance(text, str) and text:
+                    yield "token", {"text": text}
+            elif kind == "on_chain_end" and not ev.get("parent_ids"):
+                output = (ev["data"].get("output") or {}).get("output")
+    finally:
+        release()
+
+    if output is not None:
+        await research_cache.set(question, output)
+    yield "done", {"answer": output, "cached": False}
+
+
+async def _fast_events(
+    question: str, route: str, deadline: float, release: Callable[[], None]
+) -> AsyncIterator[Tuple[str, Any]]:
+    """rag/web 경로: route → retrieval → 요약 LLM 토큰 → done."""
+    loop = asyncio.get_running_loop()
+    chunks: List[str] = []
+    try:
+        route, docs = await asyncio.wait_for(
+            _fast_docs(question, route), timeout=max(deadline - loop.time(), 0)
+        )
+        yield "route", {"route": route}
+        yield "retrieval", {"retriever": route, "docs": len(docs)}
+        if not docs:
+            chunks.append("관련 문서를 찾을 수 없습니다.")
+            yield "token", {"text": chunks[0]}
+        else:
+            inputs = {"context": format_docs(docs), "question": question}
+            chunks_in = get_summary_chain().astream(inputs, config=traced())
+            async for chunk in until_deadline(chunks_in, deadline, RESEARCH_TIMEOUT):
+                if chunk:
+                    chunks.append(chunk)
+                    yield "token", {"text": chunk}
+    except asyncio.TimeoutError:
+        raise LLMTimeoutError(f"LLM deadline exceeded ({RESEARCH_TIMEOUT:.0f}s)")
+    finally:
+        release()
+
+    answer = "".join(chunks)
+    await research_cache.set(question, answer)
+    yield "done", {"answer": answer, "cached": False}
+
+
+async def stream_answer(
+    question: str, fresh: bool = False
+) -> Tuple[AsyncIterator[Tuple[str, Any]], Callable[[], None]]:
+    """SSE 용 진입점. (이벤트 이터레이터, release) 반환.
+
+    슬롯 획득은 여기서 먼저 끝내므로 LLMLimitError 는 응답 시작 전에 발생한다.
+    release 는 idempotent — 스트림이 시작되기 전에 끊겨도 호출자가 정리할 수 있다.
+    """
+    if not fresh:
+        cached = await research_cache.get(question)
+        if cached is not MISSING:
+            return _replay(cached), lambda: None
+    route = route_question(question)
+    ROUTES.inc(route=route)
+    deadline = deadline_after(RESEARCH_TIMEOUT)
+    release = await acquire_slot(deadline)
+    if route != "agent":
+        return _fast_events(question, route, deadline, release), release
+    return _agent_events(question, deadline, release), release
@@ -1,20 +1,24 @@
 import os
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI
-from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers.json import JsonOutputParser
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, Field
+from app.models import TemplateLog
+from app.services.cache import MISSING, get_cache, prompt_fingerprint
+from app.services.db import log_writer
+from app.services.feedback import format_examples, top_copies
+from app.services.llm_limits import acquire_slot, deadline_after, until_deadline
+from app.services.clients import registry
+from app.services.prompts import static_prompt, usage_handler
+from app.services.structured import (
+    OutputSpec, StructuredOutputError, parse, record, reject_format, structured_chain, with_format,
+)
+from app.services.telemetry import traced
 
 load_dotenv()
 
-llm = AzureChatOpenAI(
-    azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    temperature=0.7,
-    max_tokens=500,
-)
-
 # --- Parser & format instructions injected into the prompt ---
 parser = JsonOutputParser()
 format_instructions = parser.get_format_instructions()
@@ -22,20 +26,18 @@ format_instructions = parser.get_format_instructions()
 # --- Lightweight few-shot examples embedded directly in the template ---
 examples = (
     "Examples (format only, follow structure and tone):\n"
-    "[\n"
+    '{"templates": [\n'
     '  {"copy": "첫 방문을 환영해요! 할인 쿠폰으로 시작해보세요.", "rationale": "신규 환영 + 혜택 강조"},\n'
     '  {"copy": "지금 가입하면 첫 구매 할인 쿠폰이 기다리고 있어요!", "rationale": "즉시 혜택으로 전환 유도"},\n'
     '  {"copy": "새로운 시작, 특별한 할인으로 응원할게요!", "rationale": "긍정 톤의 심리적 설득"}\n'
-    "]\n"
+    "]}\n"
 )
 
-prompt = PromptTemplate(
-    input_variables=["business_desc", "funnel_stage", "tone", "insight"],
-    template="""
-You are a senior Korean CRM copywriter.
+# 고정 prefix (지시문 + format + few-shot) → 매 요청 동일해 prompt caching 대상
+SYSTEM_PREFIX = f"""You are a senior Korean CRM copywriter.
 
 # Output format (strict)
-Return ONLY valid JSON (an array with exactly 3 objects). Each object MUST have keys "copy" and "rationale". Use double quotes. No extra text before/after the JSON.
+Return ONLY a valid JSON object {{"templates": [...]}} whose "templates" array has exactly 3 objects. Each object MUST have keys "copy" and "rationale". Use double quotes. No extra text before/after the JSON.
 {format_instructions}
 
 # Style constraints
@@ -44,21 +46,216 @@ Return ONLY valid JSON (an array with exactly 3 objects). Each object MUST have
 - Match given funnel stage and tone
 
 # Few-shot
-{examples}
+{examples}"""
 
-# Task
+TASK_TEMPLATE = """# Task
 Business: {business_desc}
 Funnel: {funnel_stage}
 Tone: {tone}
 Insight: {insight}
-""",
-    partial_variables={
-        "format_instructions": format_instructions,
-        "examples": examples,
-    },
+{top_examples}"""
+
+prompt = static_prompt(SYSTEM_PREFIX, TASK_TEMPLATE)
+
+
+# --- Output schema: 정확히 3개, copy 는 "<80 characters" ---
+COPY_MAX_CHARS = 79
+TEMPLATE_COUNT = 3
+
+
+class TemplateCopy(BaseModel):
+    copy_: str = Field(alias="copy", min_length=1, max_length=COPY_MAX_CHARS)  # BaseModel.copy 와 이름 충돌 회피
+    rationale: str
+
+
+class TemplateSet(BaseModel):
+    # response_format 은 최상위가 object 여야 해서 배열을 templates 로 감싼다
+    templates: List[TemplateCopy] = Field(min_length=TEMPLATE_COUNT, max_length=TEMPLATE_COUNT)
+
+
+def _clip(text: str, limit: int = COPY_MAX_CHARS) -> str:
+    """길이 초과 카피는 마지막 어절 경계에서 자른다 (경계가 너무 앞이면 그냥 자름)."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return (cut[:space] if space >= limit * 0.6 else cut).rstrip(" ,")
+
+
+def coerce_copy(item: Any) -> Optional[Dict[str, str]]:
+    """카피 1개 → {"copy", "rationale"} (문자열/다른 키 이름 허용, 길이 초과는 자름). 못 쓰면 None."""
+    if isinstance(item, str):
+        item = {"copy": item}
+    if not isinstance(item, dict):
+        return None
+    copy = item.get("copy") or item.get("text") or item.get("message")
+    if not isinstance(copy, str) or not copy.strip():
+        return None
+    rationale = item.get("rationale") or item.get("reason") or ""
+    return {"copy": _clip(copy.strip()), "rationale": str(rationale).strip()}
+
+
+def template_items(obj: Any) -> Optional[list]:
+    """[...] / {"templates": [...]} / 리스트 하나만 든 object → 카피 목록."""
+    if isinstance(obj, list):
+        return obj
+    if isinstance(obj, dict):
+        if isinstance(obj.get("templates"), list):
+            return obj["templates"]
+        if "copy" in obj:
+            return [obj]
+        lists = [v for v in obj.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            return lists[0]
+    return None
+
+
+def _coerce_templates(obj: Any) -> Tuple[Any, bool]:
+    items = template_items(obj)
+    if items is None:
+        return obj, False
+    fixed = [c for c in (coerce_copy(x) for x in items) if c is not None][:TEMPLATE_COUNT]
+    unwrapped = isinstance(obj, dict) and not isinstance(obj.get("templates"), list)
+    return {"templates": fixed}, fixed != items or unwrapped
+
+
+TEMPLATE_OUTPUT = OutputSpec(
+    "template",
+    TemplateSet,
+    _coerce_templates,
+    lambda m: [t.model_dump(by_alias=True) for t in m.templates],
 )
 
+# 프롬프트가 바뀌면 버전 해시도 바뀌어 이전 캐시를 자동으로 무시
+PROMPT_VERSION = prompt_fingerprint(SYSTEM_PREFIX, TASK_TEMPLATE)
+template_cache = get_cache("template", PROMPT_VERSION)
+
 
+def cache_payload(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """응답 캐시 key: 입력 + 지금 들어갈 A/B few-shot 의 지문 (결과 수집/refresh 로 바뀌면 새 key)."""
+    return {**inputs, "top_examples": top_copies.fingerprint(inputs["funnel_stage"], inputs["tone"])}
+
+
+def _with_examples(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """A/B 상위 카피를 동적 few-shot 으로 (human 파트에만 넣어 고정 prefix 캐시 유지)."""
+    rows = top_copies.get(inputs["funnel_stage"], inputs["tone"])
+    return {**inputs, "top_examples": format_examples(rows)}
+
+
+def _llm():
+    # 공유 커넥션 풀을 쓰는 레지스트리 클라이언트 (+ 토큰 사용량 집계)
+    return registry.chat_llm(
+        temperature=0.7,
+        max_tokens=500,
+        callbacks=[usage_handler("template", SYSTEM_PREFIX)],
+    )
+
+
+@lru_cache(maxsize=None)
 def get_template_chain():
-    """Template chain for generating CRM messages based on business context."""
-    return prompt | llm | parser
+    """Template chain for generating CRM messages based on business context.
+
+    첫 호출 때 LLM 클라이언트를 만든다 (import 시점 비용/설정 의존 없음).
+    결과는 스키마(3개, <80자) 검증/로컬 수리를 거친 list[dict]. 필요할 때만 재요청.
+    """
+    return RunnableLambda(_with_examples) | structured_chain(prompt, _llm(), TEMPLATE_OUTPUT)
+
+
+@lru_cache(maxsize=None)
+def get_template_stream_chain():
+    """SSE 용: 같은 response_format 으로 partial JSON 을 흘려보낸다 (검증은 _generate_events)."""
+    return RunnableLambda(_with_examples) | prompt | with_format(_llm(), TEMPLATE_OUTPUT) | parser
+
+
+def log_generation(inputs: Dict[str, Any], items: Any, cached: bool) -> None:
+    """생성 결과를 template_logs 에 기록 (큐에만 넣고 배치 insert)."""
+    log_writer.log(TemplateLog, {
+        "funnel_stage": inputs.get("funnel_stage"),
+        "tone": inputs.get("tone"),
+        "prompt_version": PROMPT_VERSION,
+        "cached": int(cached),
+        "payload": inputs,
+        "result": items,
+    })
+
+
+# ───────────────────────── Streaming ──────────────────────────────────────────
+async def _replay(
+    inputs: Dict[str, Any], items: List[Dict[str, Any]]
+) -> AsyncIterator[Tuple[str, Any]]:
+    log_generation(inputs, items, cached=True)
+    for i, item in enumerate(items):
+        yield "template", {"index": i, **item}
+    yield "done", {"count": len(items), "cached": True}
+
+
+async def _generate_events(
+    inputs: Dict[str, Any], deadline: float, release: Callable[[], None]
+) -> AsyncIterator[Tuple[str, Any]]:
+    """JsonOutputParser 의 partial 파싱 결과에서 완성된 객체부터 하나씩 내보낸다.
+
+    배열의 i 번째 객체는 i+1 번째 객체가 시작되면(또는 스트림이 끝나면) 완성으로 본다.
+    """
+    key = cache_payload(inputs)  # 생성에 쓰일 few-shot 기준으로 저장
+    emitted: List[Dict[str, Any]] = []
+    items: list = []
+    repaired = False
+
+    def emit(item):
+        nonlocal repaired
+        fixed = coerce_copy(item)
+        repaired |= fixed != item
+        if fixed is None or len(emitted) >= TEMPLATE_COUNT:
+            return None
+        emitted.append(fixed)
+        return {"index": len(emitted) - 1, **fixed}
+
+    seen = 0
+    try:
+        for retry in (True, False):
+            try:
+                partials = get_template_stream_chain().astream(inputs, config=traced())
+                async for partial in until_deadline(partials, deadline):
+                    items = template_items(partial) or []
+                    while seen < len(items) - 1:
+                        event = emit(items[seen])
+                        seen += 1
+                        if event:
+                            yield "template", event
+                break
+            except Exception as e:
+                # response_format 거절(400)은 첫 토큰 전에 나므로 response_format 없이 한 번 더
+                if not (retry and not items and reject_format(e)):
+                    raise
+    finally:
+        release()
+
+    while seen < len(items):
+        event = emit(items[seen])
+        seen += 1
+        if event:
+            yield "template", event
+    # 이미 보낸 카피는 되돌릴 수 없으므로 스트림에서는 재요청하지 않고, 스키마에 안 맞으면 캐시하지 않는다
+    try:
+        parse(TEMPLATE_OUTPUT, {"templates": emitted})
+    except StructuredOutputError as e:
+        record(TEMPLATE_OUTPUT.name, "failed")
+        yield "done", {"count": len(emitted), "cached": False, "error": e.problems}
+        return
+    record(TEMPLATE_OUTPUT.name, "repaired" if repaired or len(items) != len(emitted) else "valid")
+    await template_cache.set(key, emitted)
+    log_generation(inputs, emitted, cached=False)
+    yield "done", {"count": len(emitted), "cached": False}
+
+
+async def stream_templates(
+    inputs: Dict[str, Any], fresh: bool = False
+) -> Tuple[AsyncIterator[Tuple[str, Any]], Callable[[], None]]:
+    """SSE 용 진입점. (이벤트 이터레이터, release) 반환 — research_chain.stream_answer 와 동일."""
+    if not fresh:
+        cached = await template_cache.get(cache_payload(inputs))
+        if cached is not MISSING:
+            return _replay(inputs, cached), lambda: None
+    deadline = deadline_after()
+    release = await acquire_slot(deadline)
+    return _generate_events(inputs, deadline, release), release
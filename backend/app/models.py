@@ -1,9 +1,83 @@
-from sqlalchemy import Column, Integer, String, JSON
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, JSON, UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
 from app.services.db import Base
 
 
+def _now():
+    return datetime.now(timezone.utc)
+
+
 class TemplateLog(Base):
+    """템플릿 생성 로그 (log_writer 로 배치 insert)."""
+
     __tablename__ = "template_logs"
     id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), default=_now, index=True)
+    funnel_stage = Column(String(64))
+    tone = Column(String(64))
+    prompt_version = Column(String(32))
+    cached = Column(Integer, default=0)
     payload = Column(JSON)
     result = Column(JSON)
+
+
+class CopyStat(Base):
+    """카피별 A/B 누적 통계. (funnel_stage, tone, score) 인덱스로 상위 카피 조회."""
+
+    __tablename__ = "copy_stats"
+    id = Column(Integer, primary_key=True)
+    funnel_stage = Column(String(64), nullable=False)
+    tone = Column(String(64), nullable=False)
+    copy_hash = Column(String(32), nullable=False)
+    copy = Column(Text, nullable=False)
+    rationale = Column(Text, default="")
+    sends = Column(Integer, nullable=False, default=0)
+    opens = Column(Integer, nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
+    score = Column(Float, nullable=False, default=0.0)  # 보정 CTR, upsert 때 갱신
+    updated_at = Column(DateTime(timezone=True), default=_now, onupdate=_now)
+
+    __table_args__ = (
+        UniqueConstraint("funnel_stage", "tone", "copy_hash", name="uq_copy_stats_copy"),
+        Index("ix_copy_stats_rank", "funnel_stage", "tone", "score"),
+    )
+
+
+class Issue(Base):
+    """생성된 이슈. 같은 인사이트가 다시 들어오면 새로 만들지 않고 duplicates 를 올린다."""
+
+    __tablename__ = "issues"
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime(timezone=True), default=_now, index=True)
+    updated_at = Column(DateTime(timezone=True), default=_now, onupdate=_now)
+    title = Column(Text, nullable=False)
+    severity = Column(String(16), nullable=False, default="Medium")
+    question = Column(Text, default="")  # 원본 인사이트
+    answer = Column(Text, default="")  # issue chain 입력 (리서치 답변 또는 질문)
+    duplicates = Column(Integer, nullable=False, default=0)
+    payload = Column(JSON)  # LLM 출력 원본
+    tasks = relationship("IssueTask", cascade="all, delete-orphan", order_by="IssueTask.position")
+
+    __table_args__ = (Index("ix_issues_severity", "severity", "id"),)
+
+
+class IssueTask(Base):
+    """보드 카드 — column(Dev/PM/Design) 별 task. 보드 조회는 (column, severity, id) keyset."""
+
+    __tablename__ = "issue_tasks"
+    id = Column(Integer, primary_key=True)
+    issue_id = Column(Integer, ForeignKey("issues.id", ondelete="CASCADE"), nullable=False, index=True)
+    column = Column(String(16), nullable=False)
+    severity = Column(String(16), nullable=False)  # issue.severity 복사 (보드 필터용)
+    position = Column(Integer, nullable=False, default=0)
+    title = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=_now)
+
+    __table_args__ = (
+        Index("ix_issue_tasks_board", "column", "severity", "id"),
+        Index("ix_issue_tasks_column", "column", "id"),
+    )
@@ -0,0 +1,45 @@
+# backend/app/server.py
+"""gunicorn 용 uvicorn 워커 (graceful drain).
+
+- SIGTERM 즉시 drain.begin() → readiness 503, job 워커는 새 job 을 가져가지 않음
+- 진행 중인 HTTP 요청(SSE 스트림 포함)은 graceful_timeout - SHUTDOWN_RESERVE 초까지 기다리고,
+  남은 SHUTDOWN_RESERVE 초 안에 lifespan 종료(LLM/job drain, 로그·알림 flush)를 끝낸다
+"""
+import os, sys, warnings
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+
+try:
+    from uvicorn_worker import UvicornWorker
+except ImportError:  # uvicorn-worker 패키지가 없으면 uvicorn 내장 (deprecated) 워커
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        from uvicorn.workers import UvicornWorker
+
+from app.services.lifecycle import drain
+
+SHUTDOWN_RESERVE = float(os.getenv("SHUTDOWN_RESERVE", "20"))
+
+
+class DrainingServer(Server):
+    def handle_exit(self, sig, frame) -> None:
+        drain.begin()
+        super().handle_exit(sig, frame)
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 기본값(None)이면 요청이 끝날 때까지 무한 대기 → gunicorn 이 SIGKILL 해 lifespan 종료를 건너뜀
+        self.config.timeout_graceful_shutdown = max(
+            self.cfg.graceful_timeout - SHUTDOWN_RESERVE, 1
+        )
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
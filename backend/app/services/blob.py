@@ -1,34 +1,205 @@
-import os, asyncio, datetime as dt
+import os, uuid, base64, asyncio, hashlib, datetime as dt
+from typing import Awaitable, Callable, Optional
 from dotenv import load_dotenv
-from azure.storage.blob.aio import ContainerClient
+from azure.core.exceptions import ResourceExistsError
 from azure.storage.blob import ContentSettings
-
-_CONTAINER = os.getenv("AZURE_CONTAINER_NAME")
+from app.services.telemetry import span
 
 load_dotenv()
 
+# 스트리밍 업로드: 블록 크기 / 파일당 동시에 올리는 블록 수
+BLOB_CHUNK_SIZE = int(os.getenv("BLOB_CHUNK_SIZE", str(4 * 1024 * 1024)))
+BLOB_UPLOAD_CONCURRENCY = int(os.getenv("BLOB_UPLOAD_CONCURRENCY", "4"))
+
+# 최신 PDF 인덱스 백그라운드 재동기화 주기(초). 업로드 경로는 즉시 반영된다.
+PDF_INDEX_REFRESH = float(os.getenv("PDF_INDEX_REFRESH", "600"))
+
 
 class BlobService:
-    def __init__(self):
-        self.client = ContainerClient.from_connection_string(
-            os.getenv("AZURE_STORAGE_CONN_STR"), container_name=_CONTAINER
-        )
+    """VOC 컨테이너 헬퍼. 컨테이너 클라이언트는 레지스트리의 공유 인스턴스를 사용.
+
+    최신 PDF(이름, last_modified)는 메모리 인덱스로 유지한다.
+    - 쓰기 경로(upload_pdf, /api/voc)는 note_upload() 로 즉시 갱신
+    - 컨테이너 전체 스캔은 백그라운드 refresh 에서만 수행
+    """
+
+    def __init__(self, client=None):
+        self._client = client
+        self._latest_name: Optional[str] = None
+        self._latest_modified: Optional[dt.datetime] = None
+        self._indexed_at: Optional[float] = None  # loop.time()
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._container_ready = False
+
+    @property
+    def client(self):
+        if self._client is None:
+            from app.services.clients import registry
+
+            self._client = registry.blob_container()
+        return self._client
 
     async def upload_pdf(self, local_path: str, blob_name: str):
-        async with self.client:
-            with open(local_path, "rb") as f:
-                await self.client.upload_blob(
-                    name=blob_name,
-                    data=f,
-                    overwrite=True,
-                    content_settings=ContentSettings(content_type="application/pdf"),
-                )
+        with open(local_path, "rb") as f:
+            resp = await self.client.upload_blob(
+                name=blob_name,
+                data=f,
+                overwrite=True,
+                content_settings=ContentSettings(content_type="application/pdf"),
+            )
+        self.note_upload(blob_name, getattr(resp, "last_modified", None))
+
+    async def ensure_container(self) -> None:
+        """컨테이너 생성은 프로세스당 한 번만 시도."""
+        if self._container_ready:
+            return
+        try:
+            await self.client.create_container()
+        except ResourceExistsError:
+            pass
+        self._container_ready = True
+
+    async def upload_stream(
+        self,
+        blob_name: str,
+        read: Callable[[int], Awaitable[bytes]],
+        content_type: str,
+        chunk_size: int = BLOB_CHUNK_SIZE,
+        concurrency: int = BLOB_UPLOAD_CONCURRENCY,
+    ):
+        """read(n) 로 청크를 읽어 staged block 업로드 → commit.
+
+        메모리에는 최대 concurrency 개 청크만 올라간다. 한 청크로 끝나는
+        작은 파일은 단일 PUT 으로 보낸다. 본문 sha256 은 metadata
+        (content_sha256)로 저장해 ingestion 중복 판단에 쓴다.
+        반환: (BlobClient, content sha256 hex).
+        """
+        await self.ensure_container()
+        blob = self.client.get_blob_client(blob_name)
+        settings = ContentSettings(content_type=content_type)
+        digest = hashlib.sha256()
+
+        first = await read(chunk_size)
+        second = await read(chunk_size) if len(first) == chunk_size else b""
+        if not second:
+            digest.update(first)
+            resp = await blob.upload_blob(
+                first,
+                overwrite=True,
+                content_settings=settings,
+                metadata={"content_sha256": digest.hexdigest()},
+            )
+            self.note_upload(blob_name, resp.get("last_modified"))
+            return blob, digest.hexdigest()
+
+        prefix = uuid.uuid4().hex[:8]  # 동시 업로드끼리 block id 충돌 방지
+        block_ids: list = []
+        pending: set = set()
+
+        async def stage(chunk: bytes) -> None:
+            digest.update(chunk)
+            block_id = base64.b64encode(f"{prefix}-{len(block_ids):08d}".encode()).decode()
+            block_ids.append(block_id)
+            pending.add(asyncio.ensure_future(blob.stage_block(block_id, chunk)))
+            if len(pending) >= concurrency:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    t.result()  # 실패 시 즉시 예외 (남은 블록은 아래에서 정리)
+                    pending.discard(t)
+
+        try:
+            await stage(first)
+            chunk = second
+            while chunk:
+                await stage(chunk)
+                chunk = await read(chunk_size)
+            if pending:
+                await asyncio.gather(*pending)
+        except BaseException:
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)  # 실패한 블록 예외까지 회수
+            raise
+
+        resp = await blob.commit_block_list(
+            block_ids,
+            content_settings=settings,
+            metadata={"content_sha256": digest.hexdigest()},
+        )
+        self.note_upload(blob_name, resp.get("last_modified"))
+        return blob, digest.hexdigest()
 
     async def latest_pdf(self):
-        async with self.client:
-            latest = None
+        """컨테이너 전체 스캔 (느림). 스캔 결과로 인덱스를 교체한다."""
+        latest = None
+        with span("blob.list_pdfs", kind="blob") as s:
+            scanned = 0
             async for b in self.client.list_blobs(name_starts_with=""):
+                scanned += 1
                 if b.name.endswith(".pdf"):
                     if not latest or b.last_modified > latest.last_modified:
                         latest = b
-            return latest  # BlobProperties
+            s.set(blobs=scanned)
+        if latest is not None:
+            self._latest_name, self._latest_modified = latest.name, latest.last_modified
+        else:
+            self._latest_name = self._latest_modified = None
+        self._indexed_at = asyncio.get_running_loop().time()
+        return latest  # BlobProperties
+
+    # ── freshness index ───────────────────────────────────────────────────────
+    def note_upload(self, name: str, last_modified: Optional[dt.datetime] = None):
+        """쓰기 경로에서 호출: 더 최신 PDF 면 인덱스 교체."""
+        if not name.lower().endswith(".pdf"):
+            return
+        when = last_modified or dt.datetime.now(dt.timezone.utc)
+        if self._latest_modified is None or when >= self._latest_modified:
+            self._latest_name, self._latest_modified = name, when
+
+    async def refresh(self) -> None:
+        """인덱스 재동기화 (동시 호출은 하나의 스캔으로 합침)."""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        started = asyncio.get_running_loop().time()
+        async with self._refresh_lock:
+            if self._indexed_at is not None and self._indexed_at >= started:
+                return  # 대기 중 다른 호출이 이미 스캔함
+            await self.latest_pdf()
+
+    async def latest_pdf_modified(self) -> Optional[dt.datetime]:
+        """캐시된 최신 PDF 수정 시각. 인덱스가 비어있을 때만 스캔."""
+        if self._indexed_at is None:
+            await self.refresh()
+        return self._latest_modified
+
+    async def pdf_age_days(self) -> int:
+        """최신 PDF 경과 일수 (PDF 가 없으면 999)."""
+        latest = await self.latest_pdf_modified()
+        if latest is None:
+            return 999
+        return (dt.datetime.now(dt.timezone.utc) - latest).days
+
+    async def _refresh_loop(self, interval: float) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("⚠️ blob index refresh failed:", e)
+            await asyncio.sleep(interval)
+
+    def start_refresh(self, interval: float = PDF_INDEX_REFRESH) -> None:
+        """백그라운드 주기 refresh 시작 (lifespan startup)."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop(interval))
+
+    async def stop_refresh(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._refresh_task = None
@@ -0,0 +1,242 @@
+# backend/app/services/bulk.py
+"""대량 생성(matrix) run 기록 + 제한 동시 실행 → 셀 단위 결과 스트림.
+
+- run_id 는 (kind, 셀 목록, 프롬프트 버전) 해시 → 같은 matrix 를 다시 보내면 끝난 셀은 저장된
+  결과를 그대로 내보내고 (resumed) 남은/실패한 셀만 실행. 중간에 연결이 끊겨도 끝난 셀은 남는다
+- 셀 하나의 실패는 그 셀의 error 로만 기록 (나머지 셀은 계속)
+- 저장소: SQLite (BULK_STORE_PATH, 워커 간 공유 가능)
+"""
+import os, json, time, asyncio, hashlib, sqlite3, threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.services.lifecycle import drain
+from app.services.telemetry import Counter
+
+BULK_STORE_PATH = os.getenv("BULK_STORE_PATH", ".cache/bulk_runs.sqlite3")
+BULK_RETENTION = float(os.getenv("BULK_RETENTION", str(7 * 86400)))  # 마지막 갱신 후 보관(초)
+
+CELLS = Counter("crm_bulk_cells_total", "Bulk generation cells by outcome")
+
+Work = Callable[[dict], Awaitable[Dict[str, Any]]]
+
+
+def run_id_for(kind: str, cells: List[dict], version: str = "") -> str:
+    raw = json.dumps([kind, version, cells], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+class BulkRunStore:
+    """runs / cells 테이블. 모든 메서드는 sync (호출자가 to_thread 로 감쌈)."""
+
+    def __init__(self, path: str = BULK_STORE_PATH):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():  # fork 된 워커는 새 연결
+            self._pid = os.getpid()
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            if self.path != ":memory:":
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS bulk_runs (
+                    id TEXT PRIMARY KEY, kind TEXT NOT NULL, cells TEXT NOT NULL,
+                    created_at REAL NOT NULL, updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS bulk_cells (
+                    run_id TEXT NOT NULL, idx INTEGER NOT NULL, ok INTEGER NOT NULL,
+                    result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 1,
+                    finished_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, idx)
+                );
+                """
+            )
+            self._db.commit()
+        return self._db
+
+    def open(self, run_id: str, kind: str, cells: List[dict], fresh: bool = False) -> None:
+        """run 이 없으면 만들고, fresh 면 이전 셀 결과를 지운다."""
+        now = time.time()
+        with self._lock:
+            conn = self._conn
+            conn.execute(
+                "INSERT OR IGNORE INTO bulk_runs VALUES (?, ?, ?, ?, ?)",
+                (run_id, kind, json.dumps(cells, ensure_ascii=False), now, now),
+            )
+            if fresh:
+                conn.execute("DELETE FROM bulk_cells WHERE run_id = ?", (run_id,))
+            conn.commit()
+
+    def get(self, run_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, cells, created_at, updated_at FROM bulk_runs WHERE id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "run_id": run_id, "kind": row[0], "cells": json.loads(row[1]),
+            "created_at": row[2], "updated_at": row[3],
+        }
+
+    def results(self, run_id: str) -> Dict[int, dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, ok, result, error, attempts FROM bulk_cells WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return {
+            idx: {
+                "ok": bool(ok),
+                "result": json.loads(result) if result is not None else None,
+                "error": error,
+                "attempts": attempts,
+            }
+            for idx, ok, result, error, attempts in rows
+        }
+
+    def record(self, run_id: str, idx: int, result: Any = None, error: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._conn
+            conn.execute(
+                "INSERT INTO bulk_cells (run_id, idx, ok, result, error, finished_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (run_id, idx) DO UPDATE SET ok = excluded.ok, result = excluded.result,"
+                " error = excluded.error, finished_at = excluded.finished_at, attempts = attempts + 1",
+                (
+                    run_id, idx, error is None,
+                    json.dumps(result, ensure_ascii=False) if error is None else None,
+                    error, now,
+                ),
+            )
+            conn.execute("UPDATE bulk_runs SET updated_at = ? WHERE id = ?", (now, run_id))
+            conn.commit()
+
+    def purge(self, older_than: float) -> None:
+        with self._lock:
+            conn = self._conn
+            conn.execute(
+                "DELETE FROM bulk_cells WHERE run_id IN (SELECT id FROM bulk_runs WHERE updated_at < ?)",
+                (older_than,),
+            )
+            conn.execute("DELETE FROM bulk_runs WHERE updated_at < ?", (older_than,))
+            conn.commit()
+
+
+class BulkRunner:
+    def __init__(self, path: str = BULK_STORE_PATH):
+        self._path = path
+        self._store: Optional[BulkRunStore] = None
+
+    @property
+    def store(self) -> BulkRunStore:
+        if self._store is None:
+            self._store = BulkRunStore(self._path)
+        return self._store
+
+    async def start(self) -> None:
+        try:
+            await asyncio.to_thread(self.store.purge, time.time() - BULK_RETENTION)
+        except Exception as e:
+            print("⚠️ bulk run store purge failed:", e)
+
+    async def progress(self, run_id: str) -> Optional[dict]:
+        run = await asyncio.to_thread(self.store.get, run_id)
+        if run is None:
+            return None
+        results = await asyncio.to_thread(self.store.results, run_id)
+        ok = sum(1 for r in results.values() if r["ok"])
+        return {
+            "run_id": run_id,
+            "kind": run["kind"],
+            "total": len(run["cells"]),
+            "succeeded": ok,
+            "failed": len(results) - ok,
+            "pending": len(run["cells"]) - len(results),
+            "created_at": run["created_at"],
+            "updated_at": run["updated_at"],
+            "cells": [
+                {"index": i, **cell, **({"ok": results[i]["ok"], "error": results[i]["error"]} if i in results else {})}
+                for i, cell in enumerate(run["cells"])
+            ],
+        }
+
+    async def run(
+        self,
+        kind: str,
+        cells: List[dict],
+        work: Work,
+        concurrency: int,
+        run_id: str,
+        fresh: bool = False,
+    ) -> AsyncIterator[dict]:
+        """run → 셀 결과(완료 순) → done 레코드.
+
+        work(cell) 은 셀 결과 dict 를 돌려주고, 예외는 그 셀의 error 로 기록된다.
+        이미 성공한 셀은 다시 실행하지 않고 저장된 결과를 먼저 내보낸다.
+        """
+        started = time.perf_counter()
+        await asyncio.to_thread(self.store.open, run_id, kind, cells, fresh)
+        previous = await asyncio.to_thread(self.store.results, run_id)
+        done = {i: r for i, r in previous.items() if r["ok"]}
+        pending = [i for i in range(len(cells)) if i not in done]
+        yield {
+            "type": "run",
+            "run_id": run_id,
+            "total": len(cells),
+            "resumed": len(done),
+            "pending": len(pending),
+        }
+
+        succeeded, failed = len(done), 0
+        for i in sorted(done):
+            CELLS.inc(kind=kind, outcome="resumed")
+            yield {"type": "cell", "index": i, **cells[i], "ok": True, **done[i]["result"], "resumed": True}
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def one(i: int) -> dict:
+            async with semaphore:
+                try:
+                    result = await work(cells[i])
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    await asyncio.to_thread(self.store.record, run_id, i, None, error)
+                    return {"type": "cell", "index": i, **cells[i], "ok": False, "error": error}
+                await asyncio.to_thread(self.store.record, run_id, i, result)
+                return {"type": "cell", "index": i, **cells[i], "ok": True, **result}
+
+        tasks = [asyncio.create_task(one(i)) for i in pending]
+        try:
+            async with drain.track("stream"):
+                for next_done in asyncio.as_completed(tasks):
+                    line = await next_done
+                    if line["ok"]:
+                        succeeded += 1
+                    else:
+                        failed += 1
+                    CELLS.inc(kind=kind, outcome="ok" if line["ok"] else "failed")
+                    yield line
+        finally:
+            # 클라이언트가 끊으면 남은 셀은 취소 (같은 matrix 로 다시 보내면 이어서 실행)
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        yield {
+            "type": "done",
+            "run_id": run_id,
+            "total": len(cells),
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+
+bulk = BulkRunner()
@@ -0,0 +1,441 @@
+# backend/app/services/cache.py
+"""LLM 응답 캐시 (exact-match + 선택적 embedding 유사도 조회).
+
+- key: 정규화된 payload + 프롬프트 버전 해시
+- backend: memory(LRU/TTL) | sqlite(로컬 디스크) | redis | off
+  멀티 워커(gunicorn)에서는 sqlite(tmpfs) 나 redis 로 워커 간 캐시를 공유한다
+"""
+import os, json, time, asyncio, hashlib, sqlite3, threading, unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.telemetry import record_cache
+
+CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")  # memory | sqlite | redis | off
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+CACHE_REDIS_URL = os.getenv("LLM_CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+# 0 이면 유사도 조회 비활성화 (cosine similarity 기준, 예: 0.95)
+SEMANTIC_THRESHOLD = float(os.getenv("LLM_CACHE_SEMANTIC_THRESHOLD", "0"))
+
+MISSING = object()
+
+
+# ─────────────────────────── key helpers ──────────────────────────────────────
+def normalize_text(text: str) -> str:
+    """공백/유니코드 정규화 (의미가 같은 입력은 같은 key)."""
+    text = unicodedata.normalize("NFC", text)
+    return " ".join(text.split()).lower()
+
+
+def normalize_payload(payload: Any) -> Any:
+    if isinstance(payload, str):
+        return normalize_text(payload)
+    if isinstance(payload, dict):
+        return {k: normalize_payload(v) for k, v in sorted(payload.items())}
+    if isinstance(payload, (list, tuple)):
+        return [normalize_payload(v) for v in payload]
+    return payload
+
+
+def prompt_fingerprint(*parts: str) -> str:
+    """프롬프트/예시 문자열로 버전 해시 생성 (프롬프트 수정 시 캐시 자동 무효화)."""
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+# ─────────────────────────── backends ─────────────────────────────────────────
+class MemoryBackend:
+    """프로세스 내 LRU + TTL 캐시."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return MISSING
+        expires_at, value = item
+        if expires_at < time.time():
+            del self._data[key]
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.time() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """로컬 디스크 SQLite 캐시 (LRU: accessed_at, TTL: expires_at).
+
+    여러 워커 프로세스가 같은 파일을 공유할 수 있다 (WAL). 연결은 프로세스별로 열어
+    preload 후 fork 된 워커가 부모의 연결을 물려 쓰지 않게 한다.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed ON llm_cache(accessed_at)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISSING
+            if row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return MISSING
+            self._conn.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + ttl, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY accessed_at DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class RedisBackend:
+    """Redis(호환) 캐시. TTL 은 서버가 만료시키고, 용량 제한은 maxmemory-policy(allkeys-lru) 에 맡긴다."""
+
+    blocking = True
+
+    def __init__(self, url: str = CACHE_REDIS_URL, prefix: str = "crm:llm:"):
+        import redis  # optional dependency
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self._client.ping()
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(self.prefix + key)
+        return MISSING if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._client.set(
+            self.prefix + key, json.dumps(value, ensure_ascii=False), px=int(ttl * 1000)
+        )
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._client.scan_iter(match=self.prefix + "*", count=1000))
+
+
+_backends: dict = {}
+
+
+def get_backend(kind: str = CACHE_BACKEND):
+    """backend 는 프로세스당 하나 (sqlite 연결 공유)."""
+    if kind not in _backends:
+        if kind == "redis":
+            try:
+                _backends[kind] = RedisBackend()
+            except Exception as e:
+                print("⚠️ redis cache unavailable, falling back to memory:", e)
+                _backends[kind] = MemoryBackend()
+        elif kind == "sqlite":
+            _backends[kind] = SQLiteBackend()
+        elif kind == "memory":
+            _backends[kind] = MemoryBackend()
+        else:
+            _backends[kind] = None  # off
+    return _backends[kind]
+
+
+# ─────────────────────────── semantic index ───────────────────────────────────
+class SemanticIndex:
+    """key → 단위 벡터 (float32 행렬 한 장). 가장 오래 전에 넣은 것부터 밀어낸다.
+
+    search 는 행렬 곱 한 번 (최대 max_entries × dim) 이라 호출자가 to_thread 로 돌린다.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._keys: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @staticmethod
+    def _unit(vector: List[float]) -> Optional[np.ndarray]:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else None
+
+    def add(self, key: str, vector: List[float]) -> None:
+        v = self._unit(vector)
+        if v is None:
+            return
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != v.shape[0]:
+                self._matrix = np.zeros((min(64, self.max_entries), v.shape[0]), dtype=np.float32)
+                self._slots.clear()
+                self._keys = [None] * len(self._matrix)
+                self._free = list(range(len(self._matrix) - 1, -1, -1))
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                if not self._free and len(self._matrix) < self.max_entries:
+                    grown = min(len(self._matrix) * 2, self.max_entries)
+                    extra = np.zeros((grown - len(self._matrix), v.shape[0]), dtype=np.float32)
+                    self._free = list(range(grown - 1, len(self._matrix) - 1, -1))
+                    self._matrix = np.vstack([self._matrix, extra])
+                    self._keys.extend([None] * len(extra))
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    _, slot = self._slots.popitem(last=False)
+                    self._keys[slot] = None
+            self._matrix[slot] = v
+            self._keys[slot] = key
+            self._slots[key] = slot
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                self._matrix[slot] = 0.0  # 빈 자리는 점수 0 → threshold(>0) 를 넘지 못함
+                self._keys[slot] = None
+                self._free.append(slot)
+
+    def search(self, vector: List[float]) -> Tuple[Optional[str], float]:
+        """(가장 가까운 key, cosine). 비었거나 차원이 다르면 (None, 0.0)."""
+        v = self._unit(vector)
+        with self._lock:
+            if v is None or not self._slots or self._matrix.shape[1] != v.shape[0]:
+                return None, 0.0
+            scores = self._matrix @ v
+            best = int(np.argmax(scores))
+            return self._keys[best], float(scores[best])
+
+
+def default_embedder():
+    """AZURE_OPENAI_EMBEDDING_DEPLOYMENT 가 있을 때만 embedding 함수 반환."""
+    if not os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT") or SEMANTIC_THRESHOLD <= 0:
+        return None
+
+    async def embed(text: str) -> List[float]:
+        # 클라이언트는 첫 조회 때 생성 (import 시점에 Azure 설정을 요구하지 않음)
+        from app.services.clients import registry
+
+        return await registry.embeddings().aembed_query(text)
+
+    return embed
+
+
+# ─────────────────────────── cache facade ─────────────────────────────────────
+class ResponseCache:
+    """namespace(체인) 단위 응답 캐시 + hit/miss 카운터."""
+
+    def __init__(
+        self,
+        namespace: str,
+        version: str,
+        backend=MISSING,
+        ttl: float = CACHE_TTL,
+        embed: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        threshold: float = SEMANTIC_THRESHOLD,
+        text_key: Optional[str] = None,
+    ):
+        self.namespace = namespace
+        self.version = version
+        self.backend = get_backend() if backend is MISSING else backend
+        self.ttl = ttl
+        self.embed = embed
+        self.threshold = threshold
+        self.text_key = text_key  # 유사도 비교에 쓸 payload 필드 (None → payload 자체)
+        self._vectors = SemanticIndex(CACHE_MAX_ENTRIES)
+        self.hits = self.misses = self.semantic_hits = self.bypassed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def key(self, payload: Any) -> str:
+        body = json.dumps(
+            {"ns": self.namespace, "v": self.version, "p": normalize_payload(payload)},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return f"{self.namespace}:{hashlib.sha256(body.encode('utf-8')).hexdigest()}"
+
+    def _text(self, payload: Any) -> str:
+        value = payload.get(self.text_key) if self.text_key else payload
+        return value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+
+    async def _backend_call(self, fn, *args):
+        if getattr(self.backend, "blocking", False):
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def _semantic_lookup(self, payload: Any):
+        if not (self.embed and self.threshold > 0 and len(self._vectors)):
+            return MISSING, None
+        try:
+            vec = await self.embed(normalize_text(self._text(payload)))
+        except Exception as e:
+            print("⚠️ semantic cache embed failed:", e)
+            return MISSING, None
+        # 최대 max_entries × dim 행렬 곱 → 이벤트 루프 밖에서
+        best_key, best = await asyncio.to_thread(self._vectors.search, vec)
+        if best_key and best >= self.threshold:
+            value = await self._backend_call(self.backend.get, best_key)
+            if value is not MISSING:
+                return value, vec
+            self._vectors.discard(best_key)
+        return MISSING, vec
+
+    async def get(self, payload: Any) -> Any:
+        """캐시 값 또는 MISSING."""
+        if not self.enabled:
+            return MISSING
+        value = await self._backend_call(self.backend.get, self.key(payload))
+        if value is not MISSING:
+            self.hits += 1
+            record_cache(self.namespace, "hit")
+            return value
+        value, _ = await self._semantic_lookup(payload)
+        if value is not MISSING:
+            self.hits += 1
+            self.semantic_hits += 1
+            record_cache(self.namespace, "semantic_hit")
+            return value
+        self.misses += 1
+        record_cache(self.namespace, "miss")
+        return MISSING
+
+    async def set(self, payload: Any, value: Any) -> None:
+        if not self.enabled:
+            return
+        key = self.key(payload)
+        await self._backend_call(self.backend.set, key, value, self.ttl)
+        if self.embed and self.threshold > 0:
+            try:
+                self._vectors.add(key, await self.embed(normalize_text(self._text(payload))))
+            except Exception:
+                return  # 유사도 인덱스는 best-effort
+
+    async def get_or_compute(
+        self,
+        payload: Any,
+        compute: Callable[[], Awaitable[Any]],
+        bypass: bool = False,
+    ) -> Any:
+        """캐시 hit 이면 바로 반환, 아니면 compute() 결과를 저장 후 반환.
+
+        bypass=True 이면 조회는 건너뛰고 새 결과로 캐시를 갱신한다.
+        """
+        if not self.enabled:
+            return await compute()
+        if bypass:
+            self.bypassed += 1
+            record_cache(self.namespace, "bypass")
+        else:
+            value = await self.get(payload)
+            if value is not MISSING:
+                return value
+        value = await compute()
+        await self.set(payload, value)
+        return value
+
+    async def stats(self) -> dict:
+        total = self.hits + self.misses
+        # sqlite COUNT / redis SCAN 은 blocking 이라 _backend_call 로 (memory 는 바로)
+        size = await self._backend_call(len, self.backend) if self.enabled else 0
+        return {
+            "namespace": self.namespace,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "semantic_hits": self.semantic_hits,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": size,
+            "semantic_index": len(self._vectors),
+        }
+
+
+_caches: dict = {}
+
+
+def get_cache(namespace: str, version: str, semantic: bool = False, **kwargs) -> ResponseCache:
+    """namespace 별 ResponseCache 싱글턴."""
+    if namespace not in _caches:
+        embed = default_embedder() if semantic else None
+        _caches[namespace] = ResponseCache(namespace, version, embed=embed, **kwargs)
+    return _caches[namespace]
+
+
+async def stats() -> List[dict]:
+    return list(await asyncio.gather(*(c.stats() for c in _caches.values())))
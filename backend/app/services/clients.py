@@ -0,0 +1,262 @@
+# backend/app/services/clients.py
+"""장수명 클라이언트 레지스트리.
+
+LLM / Search / Tavily / Blob / Slack 클라이언트를 프로세스당 한 번만 만들고
+keep-alive 커넥션 풀을 공유한다. FastAPI lifespan 종료 시 aclose() 로 정리.
+"""
+import os
+from typing import Any, Callable, Dict
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── 커넥션 풀 튜닝 ─────────────────────────────────────────────────────────────
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+BLOB_MAX_CONNECTIONS = int(os.getenv("BLOB_MAX_CONNECTIONS", "32"))
+# 1 이면 스트리밍 응답에도 token usage 를 요청 (api-version 2024-09-01 이상 필요)
+LLM_STREAM_USAGE = os.getenv("LLM_STREAM_USAGE", "0") == "1"
+
+# azure | local — local 이면 Azure AI Search 대신 프로세스 내 벡터 스토어 사용 (오프라인 테스트용)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "azure")
+
+AZURE_STORAGE_CONN_STR = os.getenv("AZURE_STORAGE_CONN_STR")
+AZURE_CONTAINER_NAME = os.getenv("AZURE_CONTAINER") or os.getenv(
+    "AZURE_CONTAINER_NAME", "uploads"
+)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+class ClientRegistry:
+    """이름 → 클라이언트 memo. 같은 설정이면 같은 인스턴스를 돌려준다."""
+
+    def __init__(self):
+        self._clients: Dict[str, Any] = {}
+        self._overrides: Dict[str, Callable[..., Any]] = {}
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        if name not in self._clients:
+            self._clients[name] = factory()
+        return self._clients[name]
+
+    def override(self, kind: str, factory: Callable[..., Any]) -> None:
+        """kind 의 클라이언트 생성을 factory 로 대체 (벤치마크/오프라인 fake 용).
+
+        kind: ahttp | chat_llm | embeddings | search_retriever | tavily | blob_container.
+        factory 는 원래 메서드와 같은 인자를 받는다. 체인 첫 호출 전에 호출할 것 (체인은 첫 호출 때 만든 클라이언트를 계속 쓴다).
+        """
+        self._overrides[kind] = factory
+        self._clients.clear()
+
+    def is_overridden(self, kind: str) -> bool:
+        return kind in self._overrides
+
+    # ── HTTP pools ────────────────────────────────────────────────────────────
+    @property
+    def http(self) -> httpx.Client:
+        return self._get(
+            "http", lambda: httpx.Client(limits=_limits(), timeout=HTTP_TIMEOUT)
+        )
+
+    @property
+    def ahttp(self) -> httpx.AsyncClient:
+        if "ahttp" in self._overrides:
+            return self._get("ahttp", self._overrides["ahttp"])
+        return self._get(
+            "ahttp",
+            lambda: httpx.AsyncClient(limits=_limits(), timeout=HTTP_TIMEOUT),
+        )
+
+    # ── LLM ───────────────────────────────────────────────────────────────────
+    def chat_llm(
+        self, temperature: float = 0.0, max_tokens: int = 512, fallback: bool = False, **kwargs
+    ):
+        """LLM gateway (deployment 라우팅/재시도/breaker, 공유 httpx 풀 사용).
+
+        fallback=True 면 primary deployment 가 모두 실패했을 때 AZURE_OPENAI_FALLBACK_DEPLOYMENTS 사용.
+        """
+        kwargs.setdefault("stream_usage", LLM_STREAM_USAGE)
+        key = f"llm:{temperature}:{max_tokens}:{fallback}:{sorted(kwargs.items())}"
+        if "chat_llm" in self._overrides:
+            return self._get(
+                key, lambda: self._overrides["chat_llm"](temperature, max_tokens, **kwargs)
+            )
+        from app.services.llm_gateway import build_chat_llm
+
+        return self._get(
+            key,
+            lambda: build_chat_llm(
+                temperature,
+                max_tokens,
+                fallback=fallback,
+                http_client=self.http,
+                http_async_client=self.ahttp,
+                **kwargs,
+            ),
+        )
+
+    def embeddings(self):
+        """AzureOpenAIEmbeddings. VECTOR_BACKEND=local 이고 deployment 가 없으면 결정적 fake."""
+        deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+        if "embeddings" in self._overrides:
+            return self._get("embeddings", self._overrides["embeddings"])
+
+        def _build():
+            if not deployment and VECTOR_BACKEND == "local":
+                from langchain_core.embeddings import DeterministicFakeEmbedding
+
+                return DeterministicFakeEmbedding(size=256)
+            from langchain_openai import AzureOpenAIEmbeddings
+
+            return AzureOpenAIEmbeddings(
+                azure_deployment=deployment,
+                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                api_key=os.getenv("AZURE_OPENAI_KEY"),
+                api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+                http_client=self.http,
+                http_async_client=self.ahttp,
+            )
+
+        return self._get("embeddings", _build)
+
+    # ── Search / Web ──────────────────────────────────────────────────────────
+    def vector_store(self):
+        """VECTOR_BACKEND=local 용 프로세스 내 벡터 스토어."""
+        from langchain_core.vectorstores import InMemoryVectorStore
+
+        return self._get("vector_store", lambda: InMemoryVectorStore(self.embeddings()))
+
+    def search_client(self):
+        """Azure AI Search 문서 업로드용 async SearchClient (ingestion)."""
+        from azure.core.credentials import AzureKeyCredential
+        from azure.search.documents.aio import SearchClient
+
+        return self._get(
+            "search_client",
+            lambda: SearchClient(
+                endpoint=f"https://{os.getenv('AZURE_SEARCH_NAME')}.search.windows.net",
+                index_name=os.getenv("AZURE_SEARCH_INDEX"),
+                credential=AzureKeyCredential(os.getenv("AZURE_SEARCH_KEY") or ""),
+            ),
+        )
+
+    def search_retriever(self, name: str = "default", **kwargs):
+        """AzureAISearchRetriever (name 별 1개). VECTOR_BACKEND=local 이면 로컬 벡터 스토어."""
+        from langchain_community.retrievers.azure_ai_search import (
+            AzureAISearchRetriever,
+        )
+
+        if "search_retriever" in self._overrides:
+            return self._get(
+                f"retriever:{name}",
+                lambda: self._overrides["search_retriever"](name, **kwargs),
+            )
+        if VECTOR_BACKEND == "local":
+            return self._get(
+                f"retriever:{name}",
+                lambda: self.vector_store().as_retriever(
+                    search_kwargs={"k": kwargs.get("top_k", 4)}
+                ),
+            )
+        return self._get(
+            f"retriever:{name}",
+            lambda: AzureAISearchRetriever(
+                service_name=os.getenv("AZURE_SEARCH_NAME"),
+                index_name=os.getenv("AZURE_SEARCH_INDEX"),
+                api_key=os.getenv("AZURE_SEARCH_KEY"),
+                **kwargs,
+            ),
+        )
+
+    def tavily(self, k: int = 3, search_depth: str = "basic"):
+        if "tavily" in self._overrides:
+            return self._get(
+                f"tavily:{k}:{search_depth}",
+                lambda: self._overrides["tavily"](k, search_depth),
+            )
+        from langchain_tavily import TavilySearch
+
+        return self._get(
+            f"tavily:{k}:{search_depth}",
+            lambda: TavilySearch(k=k, search_depth=search_depth),
+        )
+
+    # ── Blob ──────────────────────────────────────────────────────────────────
+    def blob_service_client(self):
+        """async BlobServiceClient. 공유 aiohttp 세션(커넥터 limit=BLOB_MAX_CONNECTIONS).
+
+        aiohttp 세션은 실행 중인 이벤트 루프 안에서 만들어야 하므로 async 코드에서만 호출.
+        """
+        import aiohttp
+        from azure.core.pipeline.transport import AioHttpTransport
+        from azure.storage.blob.aio import BlobServiceClient
+
+        def _build():
+            if not AZURE_STORAGE_CONN_STR:
+                raise RuntimeError("AZURE_STORAGE_CONN_STR not configured")
+            session = self._get(
+                "aiohttp",
+                lambda: aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(
+                        limit=BLOB_MAX_CONNECTIONS,
+                        keepalive_timeout=HTTP_KEEPALIVE_EXPIRY,
+                    ),
+                    auto_decompress=False,  # azure SDK 기본값과 동일
+                    trust_env=True,
+                ),
+            )
+            return BlobServiceClient.from_connection_string(
+                AZURE_STORAGE_CONN_STR,
+                transport=AioHttpTransport(session=session, session_owner=False),
+            )
+
+        return self._get("blob", _build)
+
+    def blob_container(self):
+        """VOC 컨테이너 (async ContainerClient)."""
+        if "blob_container" in self._overrides:
+            return self._get("blob_container", self._overrides["blob_container"])
+        return self._get(
+            "blob_container",
+            lambda: self.blob_service_client().get_container_client(
+                AZURE_CONTAINER_NAME
+            ),
+        )
+
+    def blob_service(self):
+        """공유 BlobService (최신 PDF 인덱스를 프로세스 내에서 공유)."""
+        from app.services.blob import BlobService
+
+        return self._get("blob_service", BlobService)
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+    async def aclose(self) -> None:
+        """모든 커넥션 풀 정리 (FastAPI shutdown). aiohttp 세션은 마지막에 닫는다."""
+        clients, self._clients = self._clients, {}
+        session = clients.pop("aiohttp", None)
+        for name, client in clients.items():
+            try:
+                if isinstance(client, httpx.AsyncClient):
+                    await client.aclose()
+                elif name in ("blob", "blob_container", "search_client"):
+                    await client.close()
+                elif isinstance(client, httpx.Client):
+                    client.close()
+            except Exception:
+                pass  # 종료 중 에러는 무시
+        if session is not None:
+            await session.close()
+
+
+registry = ClientRegistry()
@@ -0,0 +1,139 @@
+# backend/app/services/db.py
+"""Async SQLAlchemy 엔진/세션 + 배치 insert writer.
+
+DATABASE_URL: 로컬은 sqlite+aiosqlite, 운영은 postgresql+asyncpg.
+요청 경로에서는 log_writer.log() 로 큐에만 넣고, 백그라운드에서 DB_BATCH_SIZE 개씩
+(또는 DB_FLUSH_INTERVAL 마다) executemany 로 한 번에 insert 한다.
+"""
+import os, time, asyncio
+from typing import Any, Dict, List, Optional, Type
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./.cache/crm.sqlite3")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "200"))
+DB_FLUSH_INTERVAL = float(os.getenv("DB_FLUSH_INTERVAL", "1.0"))
+DB_QUEUE_MAX = int(os.getenv("DB_QUEUE_MAX", "10000"))
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+        if DATABASE_URL.startswith("sqlite"):
+            path = DATABASE_URL.split("///", 1)[-1]
+            if path and path != ":memory:" and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        else:
+            kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_POOL_SIZE)
+        _engine = create_async_engine(DATABASE_URL, **kwargs)
+    return _engine
+
+
+def session():
+    """`async with session() as s:` — expire_on_commit=False 세션."""
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = async_sessionmaker(get_engine(), expire_on_commit=False)
+    return _sessionmaker()
+
+
+async def init_db() -> None:
+    """테이블 생성 (없을 때만). 운영 스키마 변경은 별도 마이그레이션으로."""
+    import app.models  # noqa: F401  모델을 Base.metadata 에 등록
+
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def close_db() -> None:
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = _sessionmaker = None
+
+
+class BatchWriter:
+    """row dict 를 모아 모델별 bulk insert. 큐가 가득 차면 가장 새 row 를 버린다 (요청 경로 비차단)."""
+
+    def __init__(self, batch_size: int = DB_BATCH_SIZE, interval: float = DB_FLUSH_INTERVAL):
+        self.batch_size, self.interval = batch_size, interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {"queued": 0, "written": 0, "batches": 0, "dropped": 0, "errors": 0, "last_flush_ms": 0.0}
+
+    def log(self, model: Type[Base], row: Dict[str, Any]) -> None:
+        if self._queue is None:
+            return  # writer 미기동 (예: 스크립트) → 기록 생략
+        try:
+            self._queue.put_nowait((model, row))
+            self.metrics["queued"] += 1
+        except asyncio.QueueFull:
+            self.metrics["dropped"] += 1
+
+    async def _flush(self, items: List[tuple]) -> None:
+        by_model: Dict[Type[Base], List[dict]] = {}
+        for model, row in items:
+            by_model.setdefault(model, []).append(row)
+        started = time.perf_counter()
+        try:
+            async with session() as s:
+                for model, rows in by_model.items():
+                    await s.execute(insert(model), rows)  # executemany
+                await s.commit()
+            self.metrics["written"] += len(items)
+            self.metrics["batches"] += 1
+        except Exception as e:
+            self.metrics["errors"] += 1
+            print("⚠️ db batch insert failed:", e)
+        self.metrics["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.interval
+            while len(items) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(items)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=DB_QUEUE_MAX)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """남은 row 를 flush 하고 종료."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        items = []
+        while not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        if items:
+            await self._flush(items)
+        self._task = self._queue = None
+
+    def stats(self) -> dict:
+        return {**self.metrics, "pending": self._queue.qsize() if self._queue is not None else 0}
+
+
+log_writer = BatchWriter()
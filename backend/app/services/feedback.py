@@ -0,0 +1,205 @@
+# backend/app/services/feedback.py
+"""A/B 결과 누적 + 퍼널/톤별 상위 카피 캐시.
+
+- record_results(): 카피별 sends/opens/clicks 를 upsert 로 누적하고 보정 CTR(score)을 갱신
+- top_copies.get(): 메모리 캐시 조회만 (요청 경로에서 DB 를 타지 않음)
+  기동 시 전체 그룹을 한 번에 warm-up 하고, FEEDBACK_REFRESH_INTERVAL 마다 / 결과 수집 직후 갱신
+"""
+import os, asyncio, hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app.models import CopyStat
+from app.services import db
+
+FEEDBACK_FEWSHOT_K = int(os.getenv("FEEDBACK_FEWSHOT_K", "3"))
+FEEDBACK_MIN_SENDS = int(os.getenv("FEEDBACK_MIN_SENDS", "100"))  # 이보다 적게 발송된 카피는 제외
+FEEDBACK_REFRESH_INTERVAL = float(os.getenv("FEEDBACK_REFRESH_INTERVAL", "300"))
+# 베이지안 보정: 발송 수가 적은 카피의 CTR 이 과대평가되지 않도록 prior 를 섞는다
+FEEDBACK_PRIOR_SENDS = float(os.getenv("FEEDBACK_PRIOR_SENDS", "100"))
+FEEDBACK_PRIOR_CTR = float(os.getenv("FEEDBACK_PRIOR_CTR", "0.02"))
+
+Group = Tuple[str, str]
+
+
+def copy_hash(copy: str) -> str:
+    return hashlib.sha256(" ".join(copy.split()).encode("utf-8")).hexdigest()[:32]
+
+
+def _score(sends, clicks):
+    """(clicks + prior) / (sends + prior_sends). SQL 컬럼식/파이썬 값 모두 받는다."""
+    return (clicks + FEEDBACK_PRIOR_SENDS * FEEDBACK_PRIOR_CTR) / (sends + FEEDBACK_PRIOR_SENDS)
+
+
+def _insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+async def record_results(results: Iterable[dict]) -> dict:
+    """results: [{funnel_stage, tone, copy, rationale?, sends, opens, clicks}] — 같은 카피는 합산."""
+    merged: Dict[Tuple[str, str, str], dict] = {}
+    for r in results:
+        group = (r["funnel_stage"].strip(), r["tone"].strip())
+        key = (*group, copy_hash(r["copy"]))
+        row = merged.setdefault(key, {
+            "funnel_stage": group[0], "tone": group[1], "copy_hash": key[2],
+            "copy": r["copy"].strip(), "rationale": r.get("rationale") or "",
+            "sends": 0, "opens": 0, "clicks": 0,
+        })
+        for k in ("sends", "opens", "clicks"):
+            row[k] += int(r.get(k) or 0)
+    if not merged:
+        return {"rows": 0, "groups": 0}
+
+    rows = list(merged.values())
+    for row in rows:
+        row["score"] = _score(row["sends"], row["clicks"])
+
+    engine = db.get_engine()
+    stmt = _insert(engine.dialect.name)(CopyStat)
+    t, ex = CopyStat.__table__.c, stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["funnel_stage", "tone", "copy_hash"],
+        set_={
+            "sends": t.sends + ex.sends,
+            "opens": t.opens + ex.opens,
+            "clicks": t.clicks + ex.clicks,
+            "score": _score(t.sends + ex.sends, t.clicks + ex.clicks),
+            "rationale": func.coalesce(func.nullif(ex.rationale, ""), t.rationale),
+            "updated_at": func.now(),
+        },
+    )
+    async with db.session() as s:
+        await s.execute(stmt, rows)
+        await s.commit()
+
+    groups = {(r["funnel_stage"], r["tone"]) for r in rows}
+    await top_copies.refresh(groups)
+    return {"rows": len(rows), "groups": len(groups)}
+
+
+def _as_dict(row: CopyStat) -> dict:
+    return {
+        "copy": row.copy,
+        "rationale": row.rationale or "",
+        "sends": row.sends,
+        "opens": row.opens,
+        "clicks": row.clicks,
+        "ctr": round(row.clicks / row.sends, 4) if row.sends else 0.0,
+        "score": round(row.score, 4),
+    }
+
+
+async def query_top(funnel_stage: str, tone: str, limit: int = FEEDBACK_FEWSHOT_K) -> List[dict]:
+    """ix_copy_stats_rank 인덱스를 타는 그룹별 상위 카피 조회."""
+    stmt = (
+        select(CopyStat)
+        .where(
+            CopyStat.funnel_stage == funnel_stage,
+            CopyStat.tone == tone,
+            CopyStat.sends >= FEEDBACK_MIN_SENDS,
+        )
+        .order_by(CopyStat.score.desc())
+        .limit(limit)
+    )
+    async with db.session() as s:
+        return [_as_dict(r) for r in (await s.scalars(stmt)).all()]
+
+
+class TopCopies:
+    """(funnel_stage, tone) → 상위 카피 목록. get() 은 dict 조회만 한다."""
+
+    def __init__(self, k: int = FEEDBACK_FEWSHOT_K):
+        self.k = k
+        self._data: Dict[Group, List[dict]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {"hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+
+    def get(self, funnel_stage: str, tone: str) -> List[dict]:
+        rows = self._data.get((funnel_stage.strip(), tone.strip()))
+        self.metrics["hits" if rows else "misses"] += 1
+        return rows or []
+
+    def fingerprint(self, funnel_stage: str, tone: str) -> str:
+        """지금 get() 이 돌려줄 few-shot 블록의 해시 (응답 캐시 key 용, metrics 집계 안 함)."""
+        rows = self._data.get((funnel_stage.strip(), tone.strip()))
+        if not rows:
+            return ""
+        return hashlib.sha256(format_examples(rows).encode("utf-8")).hexdigest()[:12]
+
+    async def _load_all(self) -> Dict[Group, List[dict]]:
+        # 그룹별 상위 k 개를 window 함수 한 번으로 (SQLite 3.25+ / Postgres)
+        rank = func.row_number().over(
+            partition_by=(CopyStat.funnel_stage, CopyStat.tone),
+            order_by=CopyStat.score.desc(),
+        ).label("rank")
+        ranked = select(CopyStat.id, rank).where(CopyStat.sends >= FEEDBACK_MIN_SENDS).subquery()
+        stmt = (
+            select(CopyStat)
+            .join(ranked, ranked.c.id == CopyStat.id)
+            .where(ranked.c.rank <= self.k)
+            .order_by(CopyStat.funnel_stage, CopyStat.tone, CopyStat.score.desc())
+        )
+        data: Dict[Group, List[dict]] = {}
+        async with db.session() as s:
+            for row in (await s.scalars(stmt)).all():
+                data.setdefault((row.funnel_stage, row.tone), []).append(_as_dict(row))
+        return data
+
+    async def refresh(self, groups: Optional[Iterable[Group]] = None) -> None:
+        """groups 가 없으면 전체 재적재, 있으면 해당 그룹만."""
+        try:
+            if groups is None:
+                self._data = await self._load_all()
+            else:
+                for g in groups:
+                    rows = await query_top(*g, limit=self.k)
+                    if rows:
+                        self._data[g] = rows
+                    else:
+                        self._data.pop(g, None)
+            self.metrics["refreshes"] += 1
+        except Exception as e:
+            self.metrics["errors"] += 1
+            print("⚠️ top copies refresh failed:", e)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(FEEDBACK_REFRESH_INTERVAL)
+            await self.refresh()
+
+    async def start(self) -> None:
+        await self.refresh()
+        if self._task is None and FEEDBACK_REFRESH_INTERVAL > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {**self.metrics, "groups": len(self._data)}
+
+
+top_copies = TopCopies()
+
+
+def format_examples(rows: List[dict]) -> str:
+    """few-shot 블록. 데이터가 없으면 빈 문자열 (프롬프트 변화 없음)."""
+    if not rows:
+        return ""
+    lines = "\n".join(
+        f'- "{r["copy"]}" (CTR {r["ctr"]:.1%}, {r["sends"]} sends)' for r in rows
+    )
+    return (
+        "\n# Top-performing copies for this funnel/tone (A/B results)\n"
+        "Learn what worked; do not copy verbatim.\n"
+        f"{lines}\n"
+    )
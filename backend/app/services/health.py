@@ -0,0 +1,209 @@
+# backend/app/services/health.py
+"""의존성별 상태 + 기동 warm-up.
+
+체인/클라이언트는 첫 사용 때 만들어지므로 (import 시점 생성 없음) 설정이 빠지거나
+연결이 안 되는 백엔드는 그 백엔드를 쓰는 라우트만 실패한다.
+
+STARTUP_WARMUP: background (기본, 기동을 막지 않고 readiness 만 늦춤) | blocking | off
+"""
+import os, time, asyncio, importlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.services import db, llm_gateway
+from app.services.lifecycle import drain
+from app.services.clients import VECTOR_BACKEND, registry
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+# 여기 나열된 의존성이 실패하면 readiness 503, 나머지는 degraded 로만 표시
+HEALTH_REQUIRED = tuple(
+    x.strip() for x in os.getenv("HEALTH_REQUIRED", "llm").split(",") if x.strip()
+)
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "2"))
+
+_LLM_ENV = (
+    "AZURE_OPENAI_ENDPOINT",
+    "AZURE_OPENAI_KEY",
+    "AZURE_OPENAI_DEPLOYMENT",
+    "AZURE_OPENAI_API_VERSION",
+)
+_ENV = {
+    "llm": _LLM_ENV,
+    "agent": _LLM_ENV,
+    "search": ("AZURE_SEARCH_NAME", "AZURE_SEARCH_INDEX", "AZURE_SEARCH_KEY"),
+    "tavily": ("TAVILY_API_KEY",),
+    "blob": ("AZURE_STORAGE_CONN_STR",),
+}
+# fake/override 가 등록된 의존성은 설정 검사를 건너뛴다 (bench)
+_OVERRIDE_KIND = {
+    "llm": "chat_llm",
+    "agent": "chat_llm",
+    "search": "search_retriever",
+    "tavily": "tavily",
+    "blob": "blob_container",
+}
+# 무거운 import 는 스레드에서 먼저 끝내 이벤트 루프를 오래 막지 않는다
+_IMPORTS = {
+    "llm": ("langchain_openai",),
+    "agent": ("langchain.agents",),
+    "search": ("langchain_community.retrievers.azure_ai_search",),
+    "tavily": ("langchain_tavily",),
+    "blob": ("aiohttp", "azure.storage.blob.aio"),
+}
+
+
+def _build_llm() -> None:
+    from app.chains import issue_chain, research_chain, template_chain
+
+    template_chain.get_template_chain()
+    issue_chain.get_issue_chain()
+    research_chain.get_summary_chain()
+
+
+def _build_agent() -> None:
+    from app.chains import research_chain
+
+    research_chain.get_executor()
+
+
+def _build_search() -> None:
+    from app.chains import research_chain
+
+    research_chain._retrievers()
+
+
+_BUILDERS: Dict[str, Callable[[], None]] = {
+    "llm": _build_llm,
+    "agent": _build_agent,
+    "search": _build_search,
+    "tavily": lambda: registry.tavily(k=3, search_depth="basic"),
+    "blob": lambda: registry.blob_container(),
+}
+
+_state: Dict[str, dict] = {}
+_warm = {"mode": STARTUP_WARMUP, "state": "pending", "ms": None}
+_task: Optional[asyncio.Task] = None
+_started_at = time.time()
+
+
+def _missing(name: str) -> List[str]:
+    if registry.is_overridden(_OVERRIDE_KIND.get(name, "")):
+        return []
+    if name in ("llm", "agent") and os.getenv("AZURE_OPENAI_DEPLOYMENTS", "").startswith("["):
+        return []  # deployment 별 endpoint/key 는 JSON 설정에 있음
+    if name == "search" and VECTOR_BACKEND == "local":
+        return []
+    return [k for k in _ENV.get(name, ()) if not os.getenv(k)]
+
+
+def preload() -> List[str]:
+    """무거운 모듈만 import (클라이언트 생성 없음) — gunicorn master 에서 fork 전에. 실패한 모듈 목록."""
+    failed = []
+    for modules in _IMPORTS.values():
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                failed.append(f"{module}: {e}")
+    return failed
+
+
+async def _warm_one(name: str) -> None:
+    missing = _missing(name)
+    if missing:
+        _state[name] = {"status": "missing_config", "missing": missing}
+        return
+    started = time.perf_counter()
+    try:
+        for module in _IMPORTS.get(name, ()):
+            await asyncio.to_thread(importlib.import_module, module)
+        _BUILDERS[name]()
+        _state[name] = {"status": "ok", "warm_ms": round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as e:
+        _state[name] = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        print(f"⚠️ warm-up failed ({name}):", e)
+
+
+async def warm_up() -> None:
+    """모든 체인/클라이언트를 미리 생성. 실패해도 예외를 올리지 않고 상태만 기록."""
+    _warm["state"] = "running"
+    started = time.perf_counter()
+    for name in _BUILDERS:
+        await _warm_one(name)
+    _warm.update(state="done", ms=round((time.perf_counter() - started) * 1000, 1))
+
+
+async def start() -> None:
+    global _task
+    if STARTUP_WARMUP == "off":
+        _warm["state"] = "off"
+    elif STARTUP_WARMUP == "blocking":
+        await warm_up()
+    elif _task is None:
+        _task = asyncio.create_task(warm_up())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+
+
+def dependency_status(name: str) -> dict:
+    """warm-up 결과, 없으면 설정만 확인 (cold = 설정은 있고 첫 사용 때 생성)."""
+    if name in _state:
+        return _state[name]
+    missing = _missing(name)
+    if missing:
+        return {"status": "missing_config", "missing": missing}
+    return {"status": "cold"}
+
+
+async def _db_status() -> dict:
+    started = time.perf_counter()
+    try:
+        async def ping():
+            async with db.get_engine().connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        await asyncio.wait_for(ping(), HEALTH_DB_TIMEOUT)
+        return {"status": "ok", "ms": round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as e:
+        return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+def liveness() -> dict:
+    """프로세스/이벤트 루프가 응답하는지만 본다 (외부 의존성 확인 없음)."""
+    return {"status": "ok", "uptime_s": round(time.time() - _started_at, 1)}
+
+
+async def readiness() -> Tuple[bool, dict]:
+    """(ready, 본문). warm-up/drain 중이거나 HEALTH_REQUIRED 의존성이 실패면 not ready."""
+    deps = {name: dependency_status(name) for name in _BUILDERS}
+    deps["db"] = await _db_status()
+    deps["slack"] = {"status": "ok" if os.getenv("SLACK_WEBHOOK_URL") else "missing_config"}
+    open_circuits = llm_gateway.open_circuits()
+    deps["llm_gateway"] = {
+        "status": "degraded" if open_circuits else "ok",
+        "open_circuits": open_circuits,
+    }
+
+    warming = _warm["state"] in ("pending", "running")
+    failed = [n for n in HEALTH_REQUIRED if deps.get(n, {}).get("status") not in ("ok", "cold")]
+    ready = not warming and not failed and not drain.draining
+    healthy = all(d["status"] in ("ok", "cold") for d in deps.values())
+    if drain.draining:
+        status = "draining"  # SIGTERM 이후 — LB 가 새 요청을 보내지 않게
+    else:
+        status = ("ok" if healthy else "degraded") if ready else "not_ready"
+    return ready, {
+        "status": status,
+        "worker": drain.stats(),
+        "warm_up": _warm,
+        "required": list(HEALTH_REQUIRED),
+        "failed": failed,
+        "dependencies": deps,
+    }
@@ -0,0 +1,302 @@
+# backend/app/services/ingest.py
+"""VOC ingestion: blob → 텍스트 추출(stream) → overlap chunk → 배치 embedding → 인덱스 bulk upsert.
+
+- /api/voc 업로드 직후 schedule() 로 백그라운드 실행
+- 같은 내용(content sha256)이 이미 색인돼 있으면 아무것도 하지 않음
+- 백필: `python -m app.services.ingest --backfill [--prefix 2024_]`
+- VECTOR_BACKEND=local 이면 Azure AI Search 대신 로컬 벡터 스토어에 적재
+"""
+import os, json, time, asyncio, hashlib, sqlite3, tempfile, threading
+from typing import AsyncIterator, Iterator, List, Optional
+
+from langchain_core.documents import Document
+
+from app.services.clients import VECTOR_BACKEND, registry
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))  # 문자 수
+INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "150"))
+INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", "16"))
+INGEST_UPLOAD_BATCH = int(os.getenv("INGEST_UPLOAD_BATCH", "500"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "2"))  # 동시에 처리하는 파일 수
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))  # 파일 하나에서 동시 embedding 배치 수
+INGEST_STATE_PATH = os.getenv("INGEST_STATE_PATH", ".cache/ingest_state.sqlite3")
+# Azure AI Search 인덱스 필드명 (retriever 의 content_key="chunk" 와 맞춤)
+INDEX_KEY_FIELD = os.getenv("INDEX_KEY_FIELD", "chunk_id")
+INDEX_CONTENT_FIELD = os.getenv("INDEX_CONTENT_FIELD", "chunk")
+INDEX_SOURCE_FIELD = os.getenv("INDEX_SOURCE_FIELD", "title")
+INDEX_VECTOR_FIELD = os.getenv("INDEX_VECTOR_FIELD", "text_vector")
+
+
+# ─────────────────────────── extract / chunk ──────────────────────────────────
+def _pdf_pages(path: str) -> Iterator[str]:
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:  # optional dependency
+        raise RuntimeError("pypdf is required for PDF ingestion") from e
+    for page in PdfReader(path).pages:
+        yield page.extract_text() or ""
+
+
+async def extract_text(path: str, name: str) -> AsyncIterator[str]:
+    """파일에서 텍스트 조각을 순차적으로 내보낸다 (PDF: 페이지 단위, TXT: 64KB 단위)."""
+    if name.lower().endswith(".pdf"):
+        pages = _pdf_pages(path)
+        while True:
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                return
+            yield page + "\n"
+    else:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            while True:
+                piece = await asyncio.to_thread(f.read, 64 * 1024)
+                if not piece:
+                    return
+                yield piece
+
+
+async def chunk_stream(
+    pieces: AsyncIterator[str],
+    size: int = INGEST_CHUNK_SIZE,
+    overlap: int = INGEST_CHUNK_OVERLAP,
+) -> AsyncIterator[str]:
+    """텍스트 스트림 → overlap 을 둔 chunk. 가능하면 줄바꿈/공백에서 자른다."""
+    overlap = min(overlap, size // 2)
+    buf = ""
+    async for piece in pieces:
+        buf += piece
+        while len(buf) >= size:
+            window = buf[:size]
+            cut = max(window.rfind("\n", size // 2), window.rfind(" ", size // 2))
+            cut = cut if cut > overlap else size
+            chunk = buf[:cut].strip()
+            if chunk:
+                yield chunk
+            buf = buf[cut - overlap :]
+    tail = buf.strip()
+    if tail:
+        yield tail
+
+
+# ─────────────────────────── dedup state ──────────────────────────────────────
+class IngestState:
+    """blob 이름 → (content hash, chunk ids). 같은 hash 면 재색인 생략."""
+
+    def __init__(self, path: str = INGEST_STATE_PATH):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_state ("
+            " blob_name TEXT PRIMARY KEY, content_hash TEXT NOT NULL,"
+            " chunk_ids TEXT NOT NULL, ingested_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, blob_name: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, chunk_ids FROM ingest_state WHERE blob_name = ?",
+                (blob_name,),
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else (None, [])
+
+    def put(self, blob_name: str, content_hash: str, chunk_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ingest_state VALUES (?, ?, ?, ?)",
+                (blob_name, content_hash, json.dumps(chunk_ids), time.time()),
+            )
+            self._conn.commit()
+
+
+# ─────────────────────────── index sinks ──────────────────────────────────────
+class AzureSearchSink:
+    """INGEST_EMBED_BATCH 단위 embedding(최대 INGEST_EMBED_CONCURRENCY 개 동시) → SearchClient bulk upsert."""
+
+    async def upsert(self, ids: List[str], chunks: List[str], source: str) -> None:
+        emb = registry.embeddings()
+        semaphore = asyncio.Semaphore(max(INGEST_EMBED_CONCURRENCY, 1))
+
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await emb.aembed_documents(batch)
+
+        parts = await asyncio.gather(
+            *(embed(chunks[i : i + INGEST_EMBED_BATCH]) for i in range(0, len(chunks), INGEST_EMBED_BATCH))
+        )
+        vectors = [v for part in parts for v in part]
+        docs = [
+            {
+                INDEX_KEY_FIELD: doc_id,
+                INDEX_CONTENT_FIELD: chunk,
+                INDEX_SOURCE_FIELD: source,
+                INDEX_VECTOR_FIELD: vec,
+            }
+            for doc_id, chunk, vec in zip(ids, chunks, vectors)
+        ]
+        await registry.search_client().merge_or_upload_documents(documents=docs)
+
+    async def delete(self, ids: List[str]) -> None:
+        client = registry.search_client()
+        for i in range(0, len(ids), INGEST_UPLOAD_BATCH):
+            batch = ids[i : i + INGEST_UPLOAD_BATCH]
+            await client.delete_documents(documents=[{INDEX_KEY_FIELD: x} for x in batch])
+
+
+class LocalVectorSink:
+    """VECTOR_BACKEND=local: 프로세스 내 벡터 스토어 (retriever 도 같은 스토어를 봄)."""
+
+    async def upsert(self, ids: List[str], chunks: List[str], source: str) -> None:
+        docs = [
+            Document(page_content=c, metadata={"id": i, "source": source})
+            for i, c in zip(ids, chunks)
+        ]
+        await registry.vector_store().aadd_documents(docs, ids=ids)
+
+    async def delete(self, ids: List[str]) -> None:
+        await registry.vector_store().adelete(ids)
+
+
+# ─────────────────────────── pipeline ─────────────────────────────────────────
+def _chunk_id(blob_name: str, content_hash: str, i: int) -> str:
+    return hashlib.sha1(f"{blob_name}:{content_hash}:{i}".encode("utf-8")).hexdigest()
+
+
+class Ingestor:
+    def __init__(self, sink=None, state: Optional[IngestState] = None):
+        local = VECTOR_BACKEND == "local"
+        self.sink = sink or (LocalVectorSink() if local else AzureSearchSink())
+        self._state = state
+        self._local = local
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._tasks: set = set()
+        self.stats = {"ingested": 0, "skipped": 0, "failed": 0, "chunks": 0}
+
+    @property
+    def state(self) -> IngestState:
+        if self._state is None:
+            # 로컬 벡터 스토어는 휘발성이므로 상태도 메모리에만
+            self._state = IngestState(":memory:" if self._local else INGEST_STATE_PATH)
+        return self._state
+
+    async def _download(self, blob_name: str):
+        """blob 을 임시 파일로 스트리밍 다운로드하며 sha256 계산. (path, hash)."""
+        blob = registry.blob_service().client.get_blob_client(blob_name)
+        digest = hashlib.sha256()
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(blob_name)[1])
+        try:
+            with os.fdopen(fd, "wb") as f:
+                stream = await blob.download_blob()
+                async for chunk in stream.chunks():
+                    digest.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+        except BaseException:  # 취소 포함 — 받다 만 임시 파일은 남기지 않는다
+            os.unlink(path)
+            raise
+        return path, digest.hexdigest()
+
+    async def ingest_blob(self, blob_name: str, content_hash: Optional[str] = None) -> dict:
+        """blob 하나 색인. content_hash 를 알면(업로드 metadata) 다운로드 전에 중복 판단."""
+        prev_hash, prev_ids = await asyncio.to_thread(self.state.get, blob_name)
+        if content_hash is None:
+            props = await registry.blob_service().client.get_blob_client(
+                blob_name
+            ).get_blob_properties()
+            content_hash = (props.metadata or {}).get("content_sha256")
+        if content_hash and content_hash == prev_hash:
+            self.stats["skipped"] += 1
+            return {"blob": blob_name, "status": "unchanged", "chunks": len(prev_ids)}
+
+        path, actual_hash = await self._download(blob_name)
+        try:
+            if actual_hash == prev_hash:
+                self.stats["skipped"] += 1
+                return {"blob": blob_name, "status": "unchanged", "chunks": len(prev_ids)}
+
+            ids: List[str] = []
+            batch_ids: List[str] = []
+            batch: List[str] = []
+            async for chunk in chunk_stream(extract_text(path, blob_name)):
+                doc_id = _chunk_id(blob_name, actual_hash, len(ids))
+                ids.append(doc_id)
+                batch_ids.append(doc_id)
+                batch.append(chunk)
+                if len(batch) >= INGEST_UPLOAD_BATCH:
+                    await self.sink.upsert(batch_ids, batch, blob_name)
+                    batch_ids, batch = [], []
+            if batch:
+                await self.sink.upsert(batch_ids, batch, blob_name)
+        finally:
+            os.remove(path)
+
+        # 이전 버전 chunk 제거 (overwrite=True 재업로드)
+        stale = [x for x in prev_ids if x not in set(ids)]
+        if stale:
+            await self.sink.delete(stale)
+        await asyncio.to_thread(self.state.put, blob_name, actual_hash, ids)
+        self.stats["ingested"] += 1
+        self.stats["chunks"] += len(ids)
+        return {"blob": blob_name, "status": "ingested", "chunks": len(ids)}
+
+    async def _guarded(self, blob_name: str, content_hash: Optional[str]) -> dict:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(INGEST_CONCURRENCY)
+        async with self._sem:
+            try:
+                return await self.ingest_blob(blob_name, content_hash)
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"⚠️ ingest failed for {blob_name}:", e)
+                return {"blob": blob_name, "status": "failed", "error": str(e)}
+
+    def schedule(self, blob_name: str, content_hash: Optional[str] = None) -> None:
+        """업로드 경로에서 호출: 응답을 막지 않고 백그라운드로 색인."""
+        task = asyncio.create_task(self._guarded(blob_name, content_hash))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def backfill(self, prefix: str = "") -> List[dict]:
+        """컨테이너의 기존 VOC 파일 전체 색인 (이미 색인된 내용은 skip)."""
+        names = []
+        async for b in registry.blob_service().client.list_blobs(
+            name_starts_with=prefix or None, include=["metadata"]
+        ):
+            lower = b.name.lower()
+            if "_voc" in lower and lower.endswith((".pdf", ".txt")):
+                names.append((b.name, (b.metadata or {}).get("content_sha256")))
+        return await asyncio.gather(*(self._guarded(n, h) for n, h in names))
+
+    async def drain(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+ingestor = Ingestor()
+
+
+async def _main(argv=None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="VOC ingestion")
+    parser.add_argument("--backfill", action="store_true", help="index existing blobs")
+    parser.add_argument("--prefix", default="", help="blob name prefix filter")
+    parser.add_argument("blobs", nargs="*", help="specific blob names to ingest")
+    args = parser.parse_args(argv)
+
+    try:
+        results = []
+        if args.backfill:
+            results += await ingestor.backfill(args.prefix)
+        for name in args.blobs:
+            results.append(await ingestor._guarded(name, None))
+        for r in results:
+            print(json.dumps(r, ensure_ascii=False))
+        print(json.dumps(ingestor.stats))
+    finally:
+        await registry.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
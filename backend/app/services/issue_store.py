@@ -0,0 +1,406 @@
+# backend/app/services/issue_store.py
+"""이슈 보드 저장소 + near-duplicate 인덱스.
+
+- 저장: issues / issue_tasks (column=Dev|PM|Design 카드). 보드 조회는 (column, severity, id) keyset 페이지
+- 중복 탐지 (ISSUE_DEDUP_ENABLED=1 일 때만, 기본 꺼짐): issue chain 호출 전에 조회해
+  같은 이슈면 LLM 을 부르지 않고 기존 이슈에 합친다 (duplicates += 1).
+  ISSUE_DEDUP_EXACT=1 (기본) 은 정규화(공백/대소문자/유니코드)한 인사이트 문장이 같을 때만 합친다.
+  0 이면 인사이트/리서치 답변/제목의 MinHash(+LSH band) 추정 Jaccard ≥ ISSUE_DEDUP_THRESHOLD 로 합친다.
+  동시에 들어온 같은(비슷한) 요청은 먼저 온 생성 결과를 기다려 같은 이슈로 합친다.
+"""
+import os, asyncio, hashlib
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+
+from app.models import Issue, IssueTask
+from app.services import db
+from app.services.cache import normalize_text
+from app.services.rerank import tokenize
+from app.services.telemetry import Counter
+
+ISSUE_DEDUP_ENABLED = os.getenv("ISSUE_DEDUP_ENABLED", "0") == "1"
+ISSUE_DEDUP_EXACT = os.getenv("ISSUE_DEDUP_EXACT", "1") == "1"  # 정규화한 인사이트가 같을 때만 합침
+ISSUE_DEDUP_THRESHOLD = float(os.getenv("ISSUE_DEDUP_THRESHOLD", "0.9"))  # EXACT=0 일 때 MinHash 기준
+ISSUE_DEDUP_PERMS = int(os.getenv("ISSUE_DEDUP_PERMS", "64"))
+ISSUE_DEDUP_BANDS = int(os.getenv("ISSUE_DEDUP_BANDS", "16"))  # rows = PERMS / BANDS
+ISSUE_DEDUP_MAX = int(os.getenv("ISSUE_DEDUP_MAX", "20000"))  # 인덱스에 둘 최근 이슈 수
+ISSUE_DEDUP_REFRESH = float(os.getenv("ISSUE_DEDUP_REFRESH", "30"))  # 다른 워커가 만든 이슈 반영 주기
+ISSUE_BOARD_PAGE_MAX = int(os.getenv("ISSUE_BOARD_PAGE_MAX", "200"))
+
+COLUMNS = ("Dev", "PM", "Design")
+SEVERITIES = ("High", "Medium", "Low")
+
+DEDUPED = Counter("crm_issue_dedup_total", "Issue requests merged into an existing issue")
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+
+
+def _shingles(text: str) -> set:
+    """한글 음절 bigram + 단어 (rerank 와 같은 토크나이저)."""
+    return set(tokenize(text))
+
+
+class MinHashIndex:
+    """key → 여러 텍스트의 MinHash. LSH band 로 후보만 비교."""
+
+    def __init__(self, perms: int = ISSUE_DEDUP_PERMS, bands: int = ISSUE_DEDUP_BANDS):
+        self.rows = max(perms // bands, 1)
+        self.bands = bands
+        seed = hashlib.sha256(b"crm-issue-minhash").digest()
+        self._coef = [
+            (
+                int.from_bytes(hashlib.sha256(seed + bytes([i, 0])).digest()[:8], "big") % _PRIME | 1,
+                int.from_bytes(hashlib.sha256(seed + bytes([i, 1])).digest()[:8], "big") % _PRIME,
+            )
+            for i in range(self.rows * bands)
+        ]
+        self._sigs: Dict[int, List[Tuple[int, ...]]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = defaultdict(set)
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+            for s in _shingles(text)
+        ]
+        if not hashes:
+            return None
+        return tuple(min(((a * h + b) % _PRIME) & _MASK for h in hashes) for a, b in self._coef)
+
+    def _bands(self, sig: Tuple[int, ...]):
+        for i in range(self.bands):
+            yield (i, sig[i * self.rows : (i + 1) * self.rows])
+
+    @staticmethod
+    def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+        return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+    def add(self, key: int, sigs: Iterable[Optional[Tuple[int, ...]]]) -> None:
+        sigs = [s for s in sigs if s]
+        self._sigs[key] = sigs
+        for sig in sigs:
+            for band in self._bands(sig):
+                self._buckets[band].add(key)
+
+    def remove(self, key: int) -> None:
+        for sig in self._sigs.pop(key, []):
+            for band in self._bands(sig):
+                bucket = self._buckets.get(band)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._buckets[band]
+
+    def query(self, sigs: Iterable[Optional[Tuple[int, ...]]], threshold: float) -> Optional[Tuple[int, float]]:
+        """가장 비슷한 (key, 추정 Jaccard). threshold 미만이면 None."""
+        best: Optional[Tuple[int, float]] = None
+        for sig in (s for s in sigs if s):
+            candidates = set()
+            for band in self._bands(sig):
+                candidates |= self._buckets.get(band, set())
+            for key in candidates:
+                for other in self._sigs.get(key, ()):
+                    sim = self.similarity(sig, other)
+                    if sim >= threshold and (best is None or sim > best[1]):
+                        best = (key, sim)
+        return best
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+
+def _tasks(issue: dict) -> Dict[str, List[str]]:
+    tasks = issue.get("tasks") or {}
+    out = {}
+    for column in COLUMNS:
+        items = tasks.get(column) or []
+        if isinstance(items, dict):
+            items = list(items.values())
+        out[column] = [str(t) for t in items if str(t).strip()]
+    return out
+
+
+def _severity(value) -> str:
+    value = str(value or "").strip().capitalize()
+    return value if value in SEVERITIES else "Medium"
+
+
+def _issue_dict(row: Issue) -> dict:
+    tasks = {c: [] for c in COLUMNS}
+    for t in sorted(row.tasks, key=lambda t: (t.column, t.position)):
+        tasks.setdefault(t.column, []).append(t.title)
+    return {
+        "id": row.id,
+        "title": row.title,
+        "severity": row.severity,
+        "tasks": tasks,
+        "duplicates": row.duplicates,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def _task_dict(t: IssueTask) -> dict:
+    return {
+        "id": t.id,
+        "issue_id": t.issue_id,
+        "column": t.column,
+        "severity": t.severity,
+        "position": t.position,
+        "title": t.title,
+    }
+
+
+class Reservation:
+    """생성 중인 이슈 자리 (비슷한 동시 요청이 결과를 기다림)."""
+
+    def __init__(self, sigs: List[Tuple[int, ...]], text: str = ""):
+        self.sigs = sigs
+        self.text = text  # 정규화한 인사이트 (exact 모드 비교용)
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class IssueStore:
+    def __init__(
+        self,
+        threshold: float = ISSUE_DEDUP_THRESHOLD,
+        max_entries: int = ISSUE_DEDUP_MAX,
+        exact: bool = ISSUE_DEDUP_EXACT,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.exact = exact
+        self.index = MinHashIndex()
+        self._issues: "OrderedDict[int, dict]" = OrderedDict()  # index key(issue id) → 응답용 dict
+        self._texts: Dict[int, str] = {}  # issue id → 정규화한 인사이트
+        self._by_text: Dict[str, int] = {}
+        self._pending: List[Reservation] = []
+        self._last_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {"created": 0, "merged": 0, "lookups": 0, "lookup_ms": 0.0, "errors": 0}
+
+    # ── 인덱스 ────────────────────────────────────────────────────────────────
+    def _signatures(self, texts: Iterable[str]) -> List[Tuple[int, ...]]:
+        seen, sigs = set(), []
+        for text in texts:
+            text = " ".join((text or "").split())
+            if text and text not in seen:
+                seen.add(text)
+                sig = self.index.signature(text)
+                if sig:
+                    sigs.append(sig)
+        return sigs
+
+    def _remember(self, issue: dict, sigs: List[Tuple[int, ...]], question: str = "") -> None:
+        key = issue["id"]
+        self.index.add(key, sigs)
+        self._issues[key] = issue
+        text = normalize_text(question or "")
+        if text:
+            self._texts[key] = text
+            self._by_text[text] = key
+        self._last_id = max(self._last_id, key)
+        while len(self._issues) > self.max_entries:
+            old, _ = self._issues.popitem(last=False)
+            self.index.remove(old)
+            text = self._texts.pop(old, None)
+            if text is not None and self._by_text.get(text) == old:
+                del self._by_text[text]
+
+    def _lookup(self, text: str, sigs: List[Tuple[int, ...]]) -> Optional[Tuple[int, float]]:
+        if self.exact:
+            key = self._by_text.get(text)
+            return (key, 1.0) if key in self._issues else None
+        return self.index.query(sigs, self.threshold)
+
+    def _same(self, text: str, sigs: List[Tuple[int, ...]], reservation: Reservation) -> bool:
+        if self.exact:
+            return bool(text) and text == reservation.text
+        return any(MinHashIndex.similarity(a, b) >= self.threshold for a in sigs for b in reservation.sigs)
+
+    async def _load(self, after_id: int = 0) -> None:
+        stmt = select(Issue).options(selectinload(Issue.tasks)).where(Issue.id > after_id)
+        stmt = stmt.order_by(Issue.id.desc() if not after_id else Issue.id).limit(self.max_entries)
+        async with db.session() as s:
+            rows = (await s.scalars(stmt)).all()
+        for row in sorted(rows, key=lambda r: r.id):
+            if row.id not in self._issues:
+                self._remember(
+                    _issue_dict(row), self._signatures((row.question, row.answer, row.title)), row.question
+                )
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(ISSUE_DEDUP_REFRESH)
+            try:
+                await self._load(self._last_id)
+            except Exception as e:
+                print("⚠️ issue index refresh failed:", e)
+
+    async def start(self) -> None:
+        try:
+            await self._load()
+        except Exception as e:
+            print("⚠️ issue index warm-up failed (dedup starts empty):", e)
+        if self._task is None and ISSUE_DEDUP_REFRESH > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ── 중복 탐지 ─────────────────────────────────────────────────────────────
+    async def dedupe(
+        self, texts: Sequence[str], reserve: bool = True
+    ) -> Tuple[Optional[dict], Optional[Reservation]]:
+        """(기존 이슈, None) 또는 (None, reservation). reservation 은 save()/release() 로 끝낸다.
+
+        texts[0] 은 인사이트 문장 (exact 모드의 비교 대상). reserve=False 는 저장된 인덱스만 본다.
+        """
+        loop = asyncio.get_running_loop()
+        text = normalize_text(texts[0] if texts else "")
+        while True:
+            started = loop.time()
+            sigs = [] if self.exact else self._signatures(texts)
+            hit = self._lookup(text, sigs)
+            self.metrics["lookups"] += 1
+            self.metrics["lookup_ms"] += (loop.time() - started) * 1000
+            if hit is not None:
+                return await self._merge(self._issues[hit[0]], hit[1]), None
+            if not reserve:
+                return None, None
+            waiting = next((r for r in self._pending if self._same(text, sigs, r)), None)
+            if waiting is None:
+                reservation = Reservation(sigs, text)
+                self._pending.append(reservation)
+                return None, reservation
+            issue = await asyncio.shield(waiting.future)
+            if issue is not None:
+                return await self._merge(issue, 1.0), None
+            # 먼저 온 생성이 실패 → 다시 확인 후 직접 생성
+
+    async def _merge(self, issue: dict, similarity: float) -> dict:
+        self.metrics["merged"] += 1
+        DEDUPED.inc()
+        issue["duplicates"] = issue.get("duplicates", 0) + 1
+        try:
+            async with db.session() as s:
+                await s.execute(
+                    update(Issue).where(Issue.id == issue["id"]).values(duplicates=Issue.duplicates + 1)
+                )
+                await s.commit()
+        except Exception as e:
+            self.metrics["errors"] += 1
+            print("⚠️ issue merge update failed:", e)
+        return {**issue, "merged": True, "similarity": round(similarity, 3)}
+
+    def release(self, reservation: Reservation) -> None:
+        """생성 실패 — 기다리던 요청은 각자 다시 시도한다."""
+        if reservation in self._pending:
+            self._pending.remove(reservation)
+        if not reservation.future.done():
+            reservation.future.set_result(None)
+
+    # ── 저장 ──────────────────────────────────────────────────────────────────
+    async def save(
+        self, issue: dict, question: str, answer: str, reservation: Optional[Reservation] = None
+    ) -> dict:
+        """LLM 출력 → DB 저장 + 인덱스 등록. 저장 실패해도 이슈 자체는 반환 (id 없음)."""
+        tasks = _tasks(issue)
+        severity = _severity(issue.get("severity"))
+        title = str(issue.get("title") or question)[:500]
+        stored = {**issue, "title": title, "severity": severity, "tasks": tasks, "duplicates": 0}
+        try:
+            async with db.session() as s:
+                row = Issue(
+                    title=title, severity=severity, question=question, answer=answer, payload=issue,
+                )
+                row.tasks = [
+                    IssueTask(column=column, severity=severity, position=i, title=t)
+                    for column, items in tasks.items()
+                    for i, t in enumerate(items)
+                ]
+                s.add(row)
+                await s.commit()
+                stored["id"] = row.id
+                stored["created_at"] = row.created_at.isoformat() if row.created_at else None
+            self.metrics["created"] += 1
+        except Exception as e:
+            self.metrics["errors"] += 1
+            print("⚠️ issue save failed (not persisted):", e)
+        try:
+            if "id" in stored:
+                sigs = reservation.sigs if reservation and reservation.sigs else self._signatures((question, answer))
+                self._remember(stored, sigs + self._signatures((title,)), question)
+        finally:
+            if reservation is not None:
+                if reservation in self._pending:
+                    self._pending.remove(reservation)
+                if not reservation.future.done():
+                    reservation.future.set_result(stored if "id" in stored else None)
+        return stored
+
+    # ── 조회 ──────────────────────────────────────────────────────────────────
+    async def get(self, issue_id: int) -> Optional[dict]:
+        async with db.session() as s:
+            row = await s.scalar(
+                select(Issue).options(selectinload(Issue.tasks)).where(Issue.id == issue_id)
+            )
+        return _issue_dict(row) if row else None
+
+    async def list_issues(
+        self, severity: Optional[str] = None, limit: int = 50, cursor: Optional[int] = None
+    ) -> dict:
+        """최신순 이슈 목록. next_cursor 를 다음 요청의 cursor 로."""
+        limit = min(limit, ISSUE_BOARD_PAGE_MAX)
+        stmt = select(Issue).options(selectinload(Issue.tasks))
+        if severity:
+            stmt = stmt.where(Issue.severity == severity)
+        if cursor:
+            stmt = stmt.where(Issue.id < cursor)
+        stmt = stmt.order_by(Issue.id.desc()).limit(limit + 1)
+        async with db.session() as s:
+            rows = (await s.scalars(stmt)).all()
+        items = [_issue_dict(r) for r in rows[:limit]]
+        return {"items": items, "next_cursor": rows[limit - 1].id if len(rows) > limit else None}
+
+    async def board(
+        self,
+        column: str,
+        severity: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[int] = None,
+    ) -> dict:
+        """보드 한 column 의 카드 (최신순, ix_issue_tasks_board keyset)."""
+        limit = min(limit, ISSUE_BOARD_PAGE_MAX)
+        stmt = select(IssueTask).where(IssueTask.column == column)
+        if severity:
+            stmt = stmt.where(IssueTask.severity == severity)
+        if cursor:
+            stmt = stmt.where(IssueTask.id < cursor)
+        stmt = stmt.order_by(IssueTask.id.desc()).limit(limit + 1)
+        async with db.session() as s:
+            rows = (await s.scalars(stmt)).all()
+        return {
+            "column": column,
+            "items": [_task_dict(t) for t in rows[:limit]],
+            "next_cursor": rows[limit - 1].id if len(rows) > limit else None,
+        }
+
+    def stats(self) -> dict:
+        lookups = self.metrics["lookups"]
+        return {
+            **{k: v for k, v in self.metrics.items() if k != "lookup_ms"},
+            "indexed": len(self.index),
+            "pending": len(self._pending),
+            "avg_lookup_ms": round(self.metrics["lookup_ms"] / lookups, 3) if lookups else 0.0,
+            "mode": "exact" if self.exact else "minhash",
+            "threshold": self.threshold,
+        }
+
+
+issue_store = IssueStore()
@@ -0,0 +1,354 @@
+# backend/app/services/jobs.py
+"""장시간 작업(research/issue)용 비동기 job queue.
+
+- 저장소: SQLite (JOB_STORE_PATH 미설정 시 프로세스 메모리 DB)
+- 실행: in-process asyncio 워커(JOB_MODE=inprocess, 기본) 또는
+        별도 프로세스 워커(JOB_MODE=external, `python -m app.services.jobs`)가
+        같은 SQLite 파일에서 job 을 claim
+- 멱등성: (kind, idempotency_key) 가 같으면 기존 job 을 그대로 돌려준다
+"""
+import os, json, time, uuid, asyncio, sqlite3, threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from app.services.lifecycle import drain, pid_alive
+
+JOB_MODE = os.getenv("JOB_MODE", "inprocess")  # inprocess | external
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "")  # "" → :memory:
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "86400"))  # 완료 job 보관(초)
+
+TERMINAL = ("succeeded", "failed")
+
+Handler = Callable[[dict], Awaitable[Any]]
+
+
+class JobStore:
+    """SQLite job 테이블. 모든 메서드는 sync (호출자가 to_thread 로 감쌈)."""
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                idempotency_key TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner INTEGER
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_idem
+                ON jobs(kind, idempotency_key) WHERE idempotency_key IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs(status, created_at);
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row(row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def create(self, kind: str, payload: dict, idempotency_key: Optional[str]):
+        """(job, created). 같은 멱등 키가 있으면 기존 job 반환 (실패한 job 은 재생성)."""
+        with self._lock:
+            if idempotency_key:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE kind = ? AND idempotency_key = ?",
+                    (kind, idempotency_key),
+                ).fetchone()
+                if row is not None and row["status"] != "failed":
+                    return self._row(row), False
+                if row is not None:
+                    self._conn.execute("DELETE FROM jobs WHERE id = ?", (row["id"],))
+            job_id = uuid.uuid4().hex
+            # 다른 워커가 같은 키로 방금 만들었으면 (SELECT 와 INSERT 사이) 그 job 을 돌려준다
+            cur = self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, idempotency_key, created_at)"
+                " VALUES (?, ?, 'queued', ?, ?, ?) ON CONFLICT DO NOTHING",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), idempotency_key, time.time()),
+            )
+            self._conn.commit()
+            if cur.rowcount == 0:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE kind = ? AND idempotency_key = ?",
+                    (kind, idempotency_key),
+                ).fetchone()
+                return self._row(row), False
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row), True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def claim(self, job_id: Optional[str] = None) -> Optional[dict]:
+        """queued → running 으로 원자적 전환. job_id 없으면 가장 오래된 queued job."""
+        with self._lock:
+            if job_id is None:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                job_id = row["id"]
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, owner = ?"
+                " WHERE id = ? AND status = 'queued'",
+                (time.time(), os.getpid(), job_id),
+            )
+            self._conn.commit()
+            if cur.rowcount == 0:
+                return None  # 다른 워커가 먼저 가져감
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def finish(self, job_id: str, result: Any = None, error: Optional[str] = None):
+        status = "failed" if error is not None else "succeeded"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False), error, time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def requeue_running(self) -> list:
+        """비정상 종료로 running 에 남은 job 을 다시 queued 로.
+
+        같은 파일을 쓰는 다른 워커가 아직 살아서 실행 중인 job 은 건드리지 않는다.
+        """
+        with self._lock:
+            owners = [
+                r[0]
+                for r in self._conn.execute(
+                    "SELECT DISTINCT owner FROM jobs WHERE status = 'running'"
+                )
+            ]
+            dead = [o for o in owners if o is None or not pid_alive(o)]
+            for owner in dead:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL"
+                    " WHERE status = 'running' AND owner IS ?",
+                    (owner,),
+                )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        return [r["id"] for r in rows]
+
+    def purge(self, older_than: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (older_than,),
+            )
+            self._conn.commit()
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)
+            ).fetchone()[0]
+
+
+class JobQueue:
+    """kind 별 handler 를 워커 풀에서 실행."""
+
+    def __init__(self, store: Optional[JobStore] = None, workers: int = JOB_WORKERS):
+        self._store = store
+        self.workers = workers
+        self.handlers: Dict[str, Handler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+        self._events: Dict[str, Set[asyncio.Event]] = {}  # job_id → watcher 별 event
+        self._metrics = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "wait_ms_total": 0.0,
+            "run_ms_total": 0.0,
+        }
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore()
+        return self._store
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+
+    # ── producer ──────────────────────────────────────────────────────────────
+    async def submit(
+        self, kind: str, payload: dict, idempotency_key: Optional[str] = None
+    ) -> dict:
+        if kind not in self.handlers:
+            raise ValueError(f"unknown job kind: {kind}")
+        job, created = await asyncio.to_thread(
+            self.store.create, kind, payload, idempotency_key
+        )
+        if not created:
+            self._metrics["deduplicated"] += 1
+            return job
+        self._metrics["submitted"] += 1
+        if self._queue is not None:
+            self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def watch(self, job_id: str) -> AsyncIterator[dict]:
+        """상태가 바뀔 때마다 job 을 내보내고, 종료 상태에서 끝난다.
+
+        watcher 마다 event 를 등록하고 끝나면 (연결이 먼저 끊겨도) 지운다.
+        """
+        last = None
+        event = asyncio.Event()
+        self._events.setdefault(job_id, set()).add(event)
+        try:
+            while True:
+                event.clear()  # 조회 전에 비워서 조회 중 도착한 알림을 놓치지 않는다
+                job = await self.get(job_id)
+                if job is None:
+                    return
+                if job["status"] != last:
+                    last = job["status"]
+                    yield job
+                if job["status"] in TERMINAL:
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass  # 외부 워커 모드에서는 polling
+        finally:
+            watchers = self._events.get(job_id)
+            if watchers is not None:
+                watchers.discard(event)
+                if not watchers:
+                    del self._events[job_id]
+
+    # ── consumer ──────────────────────────────────────────────────────────────
+    def _notify(self, job_id: str) -> None:
+        for event in self._events.get(job_id, ()):
+            event.set()
+
+    async def _run(self, job: dict) -> None:
+        job_id = job["id"]
+        self._notify(job_id)
+        started = time.time()
+        self._metrics["wait_ms_total"] += (started - job["created_at"]) * 1000
+        try:
+            result = await self.handlers[job["kind"]](job["payload"])
+            await asyncio.to_thread(self.store.finish, job_id, result)
+            self._metrics["succeeded"] += 1
+        except Exception as e:
+            await asyncio.to_thread(self.store.finish, job_id, None, str(e) or type(e).__name__)
+            self._metrics["failed"] += 1
+        finally:
+            self._metrics["run_ms_total"] += (time.time() - started) * 1000
+            self._notify(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                if drain.draining:
+                    continue  # queued 로 남겨 다음 기동(또는 다른 워커)이 가져간다
+                job = await asyncio.to_thread(self.store.claim, job_id)
+                if job is not None:
+                    async with drain.track("job"):
+                        await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _poll_worker(self) -> None:
+        """external 모드: 공유 SQLite 에서 queued job 을 polling 으로 claim."""
+        while True:
+            job = None if drain.draining else await asyncio.to_thread(self.store.claim)
+            if job is None:
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            async with drain.track("job"):
+                await self._run(job)
+
+    async def start(self, poll: bool = False) -> None:
+        """워커 시작. poll=True 는 별도 워커 프로세스용."""
+        pending = await asyncio.to_thread(self.store.requeue_running)
+        await asyncio.to_thread(self.store.purge, time.time() - JOB_RETENTION)
+        if poll:
+            self._tasks = [asyncio.create_task(self._poll_worker()) for _ in range(self.workers)]
+            return
+        self._queue = asyncio.Queue()
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def stats(self) -> dict:
+        m = self._metrics
+        done = m["succeeded"] + m["failed"]
+        if self._queue is not None:
+            queued = self._queue.qsize()
+        else:
+            queued = await asyncio.to_thread(self.store.count, "queued")
+        running = await asyncio.to_thread(self.store.count, "running")
+        return {
+            "mode": JOB_MODE,
+            "workers": self.workers,
+            "queue_depth": queued,
+            "running": running,
+            **{k: m[k] for k in ("submitted", "deduplicated", "succeeded", "failed")},
+            "avg_wait_ms": round(m["wait_ms_total"] / done, 2) if done else 0.0,
+            "avg_run_ms": round(m["run_ms_total"] / done, 2) if done else 0.0,
+        }
+
+
+jobs = JobQueue()
+
+
+async def _main() -> None:
+    """별도 워커 프로세스 진입점 (JOB_MODE=external + JOB_STORE_PATH 공유)."""
+    import main  # noqa: F401  라우터 import 시 handler 등록
+
+    # `python -m` 으로 실행하면 이 모듈은 __main__ 이므로, handler 가 등록된
+    # app.services.jobs 쪽 인스턴스를 써야 한다
+    from app.services.jobs import jobs as queue
+
+    if not JOB_STORE_PATH:
+        raise SystemExit("JOB_STORE_PATH is required for an external job worker")
+    await queue.start(poll=True)
+    print(f"🧵 job worker started ({queue.workers} workers, store={JOB_STORE_PATH})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await queue.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
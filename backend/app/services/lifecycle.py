@@ -0,0 +1,83 @@
+# backend/app/services/lifecycle.py
+"""워커 종료(drain) 상태 + 진행 중 작업 추적.
+
+SIGTERM 을 받으면 drain.begin() → readiness 503, job 워커는 새 job 을 가져가지 않는다.
+HTTP 요청은 서버(uvicorn timeout_graceful_shutdown)가 끝날 때까지 기다리고,
+lifespan 종료 단계에서 drain.wait() 로 남은 LLM/job 작업을 DRAIN_TIMEOUT 안에서 마무리한다.
+"""
+import os, time, asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "30"))
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    """같은 호스트의 프로세스가 살아 있는지 (공유 SQLite 파일의 소유 워커 확인용)."""
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # 다른 사용자 프로세스 — 존재는 함
+    return True
+
+
+class Drain:
+    """kind(stream/llm/job) 별 in-flight 카운터 + draining 플래그."""
+
+    def __init__(self):
+        self.draining = False
+        self.started_at: Optional[float] = None
+        self._in_flight: Dict[str, int] = {}
+        self._idle: Optional[asyncio.Event] = None
+
+    def begin(self) -> None:
+        """signal handler 에서도 호출되므로 sync + 멱등."""
+        if not self.draining:
+            self.draining = True
+            self.started_at = time.time()
+            print(f"🛑 draining worker {os.getpid()} (in-flight: {self._in_flight})")
+
+    @property
+    def total(self) -> int:
+        return sum(self._in_flight.values())
+
+    @asynccontextmanager
+    async def track(self, kind: str):
+        self._in_flight[kind] = self._in_flight.get(kind, 0) + 1
+        try:
+            yield
+        finally:
+            self._in_flight[kind] -= 1
+            if self._idle is not None and self.total == 0:
+                self._idle.set()
+
+    async def wait(self, timeout: float = DRAIN_TIMEOUT) -> bool:
+        """남은 작업이 끝날 때까지 최대 timeout 초. 모두 끝났으면 True."""
+        if self.total == 0:
+            return True
+        self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            print(f"⚠️ drain timed out after {timeout:.0f}s (in-flight: {self._in_flight})")
+            return False
+        finally:
+            self._idle = None
+
+    def stats(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "draining": self.draining,
+            "draining_for_s": round(time.time() - self.started_at, 1) if self.started_at else None,
+            "in_flight": dict(self._in_flight),
+        }
+
+
+drain = Drain()
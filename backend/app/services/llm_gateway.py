@@ -0,0 +1,381 @@
+# backend/app/services/llm_gateway.py
+"""여러 Azure OpenAI deployment 를 묶는 LLM gateway.
+
+- AZURE_OPENAI_DEPLOYMENTS: 콤마 구분 deployment 이름 (같은 endpoint) 또는 JSON 배열
+  [{"name": "krc", "deployment": "gpt-4o", "endpoint": "https://…", "api_key": "…", "api_version": "…"}]
+  (비어 있는 필드는 AZURE_OPENAI_* 기본값). 없으면 AZURE_OPENAI_DEPLOYMENT 하나.
+- AZURE_OPENAI_FALLBACK_DEPLOYMENTS: 같은 형식. chat_llm(fallback=True) 인 체인만
+  primary 가 모두 실패/차단됐을 때 사용 (예: pdf_search 요약 → gpt-4o-mini).
+- 라우팅: LLM_ROUTING=round_robin | least_latency (EWMA latency × in-flight)
+- 429/5xx/연결 오류 → 다른 deployment 로 즉시 재시도, 모두 막혔으면 Retry-After/지터 backoff
+  400 등 요청 자체의 오류는 재시도하지 않고 breaker 에도 세지 않는다
+- deployment 별 circuit breaker: 연속 실패 LLM_BREAKER_THRESHOLD 회 → LLM_BREAKER_COOLDOWN 초 open
+  → half-open 에서 1건 시험 후 close/open
+"""
+import os, json, time, random, asyncio, itertools
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict
+
+from app.services.llm_limits import LLMUnavailableError
+from app.services.telemetry import Counter, Histogram
+
+LLM_ROUTING = os.getenv("LLM_ROUTING", "round_robin")
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))  # pool 당 시도 횟수
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+# Retry-After 가 이보다 길면 기다리지 않고 다음 pool(fallback) 로 / 실패 처리
+LLM_RETRY_MAX_WAIT = float(os.getenv("LLM_RETRY_MAX_WAIT", "10"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+LLM_EWMA_ALPHA = 0.2
+
+CALLS = Counter("crm_llm_gateway_calls_total", "LLM gateway calls by deployment and outcome")
+FALLBACKS = Counter("crm_llm_gateway_fallback_total", "Calls served by the fallback deployment pool")
+LATENCY = Histogram("crm_llm_gateway_latency_seconds", "LLM call latency by deployment")
+
+
+# ── deployment 설정 ────────────────────────────────────────────────────────────
+def _parse(raw: Optional[str]) -> List[dict]:
+    if not raw or not raw.strip():
+        return []
+    if raw.strip().startswith("["):
+        return json.loads(raw)
+    return [{"deployment": name.strip()} for name in raw.split(",") if name.strip()]
+
+
+def _with_defaults(cfg: dict) -> dict:
+    deployment = cfg.get("deployment") or os.getenv("AZURE_OPENAI_DEPLOYMENT")
+    return {
+        "name": cfg.get("name") or deployment,
+        "deployment": deployment,
+        "endpoint": cfg.get("endpoint") or os.getenv("AZURE_OPENAI_ENDPOINT"),
+        "api_key": cfg.get("api_key") or os.getenv("AZURE_OPENAI_KEY"),
+        "api_version": cfg.get("api_version") or os.getenv("AZURE_OPENAI_API_VERSION"),
+    }
+
+
+def primary_configs() -> List[dict]:
+    return [_with_defaults(c) for c in _parse(os.getenv("AZURE_OPENAI_DEPLOYMENTS")) or [{}]]
+
+
+def fallback_configs() -> List[dict]:
+    return [_with_defaults(c) for c in _parse(os.getenv("AZURE_OPENAI_FALLBACK_DEPLOYMENTS"))]
+
+
+# ── deployment 상태 (circuit breaker + latency) ─────────────────────────────────
+class Deployment:
+    """deployment 하나의 상태. 같은 이름이면 모든 체인/모델이 공유한다."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "closed"  # closed | open | half_open
+        self.failures = 0
+        self.open_until = 0.0
+        self.blocked_until = 0.0  # Retry-After
+        self.probing = False
+        self.in_flight = 0
+        self.ewma_ms: Optional[float] = None
+        self.metrics = {"ok": 0, "throttled": 0, "error": 0, "opened": 0}
+
+    def available(self, now: float) -> bool:
+        if now < self.blocked_until:
+            return False
+        if self.state == "open":
+            if now < self.open_until:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            return not self.probing
+        return True
+
+    def ready_at(self) -> float:
+        return max(self.blocked_until, self.open_until if self.state == "open" else 0.0)
+
+    def begin(self) -> None:
+        self.in_flight += 1
+        if self.state == "half_open":
+            self.probing = True
+
+    def end(self) -> None:
+        self.in_flight -= 1
+        self.probing = False
+
+    def on_success(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.ewma_ms = ms if self.ewma_ms is None else (
+            LLM_EWMA_ALPHA * ms + (1 - LLM_EWMA_ALPHA) * self.ewma_ms
+        )
+        self.failures = 0
+        self.state = "closed"
+        self.metrics["ok"] += 1
+        CALLS.inc(deployment=self.name, outcome="ok")
+        LATENCY.observe(seconds, deployment=self.name)
+
+    def on_failure(self, status: Optional[int], retry_after: Optional[float]) -> None:
+        now = time.monotonic()
+        outcome = "throttled" if status == 429 else "error"
+        self.metrics[outcome] += 1
+        CALLS.inc(deployment=self.name, outcome=outcome)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= LLM_BREAKER_THRESHOLD:
+            if self.state != "open":
+                self.metrics["opened"] += 1
+            self.state = "open"
+            self.open_until = now + LLM_BREAKER_COOLDOWN
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "blocked_for_s": round(max(self.blocked_until - time.monotonic(), 0), 1),
+            **self.metrics,
+        }
+
+
+_deployments: Dict[str, Deployment] = {}
+_rr = itertools.count()
+
+
+def _deployment(name: str) -> Deployment:
+    if name not in _deployments:
+        _deployments[name] = Deployment(name)
+    return _deployments[name]
+
+
+# ── 에러 분류 ─────────────────────────────────────────────────────────────────
+def _retry_after(headers) -> Optional[float]:
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+def classify(exc: BaseException) -> Tuple[bool, Optional[int], Optional[float]]:
+    """(다른/같은 deployment 로 재시도할지, status, Retry-After 초)."""
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status is None:
+        # 연결 실패 / 타임아웃 (openai.APIConnectionError, APITimeoutError, httpx 전송 오류)
+        transient = isinstance(exc, (httpx.TransportError, TimeoutError, ConnectionError)) or (
+            type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+        )
+        return transient, None, None
+    retry_after = _retry_after(getattr(response, "headers", None))
+    if status in (408, 409, 429) or status >= 500:
+        return True, status, retry_after
+    if status in (401, 403, 404):
+        return True, status, None  # 이 deployment 의 설정 문제 → 다른 deployment 로
+    return False, status, None  # 400 등 요청 자체의 문제
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+
+# ── gateway chat model ────────────────────────────────────────────────────────
+Pool = List[Tuple[Deployment, BaseChatModel]]
+
+
+class GatewayChatModel(BaseChatModel):
+    """deployment 별 AzureChatOpenAI 를 감싸 라우팅/재시도/breaker/fallback 을 처리."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    primary: List[Any]
+    fallback: List[Any] = []
+    routing: str = LLM_ROUTING
+
+    @property
+    def _llm_type(self) -> str:
+        return "azure-openai-gateway"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "deployments": [d.name for d, _ in self.primary],
+            "fallback": [d.name for d, _ in self.fallback],
+        }
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        formatted = [convert_to_openai_tool(t) for t in tools]
+        if tool_choice:
+            if tool_choice == "any":
+                tool_choice = "required"
+            elif isinstance(tool_choice, str) and tool_choice not in ("auto", "none", "required"):
+                tool_choice = {"type": "function", "function": {"name": tool_choice}}
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(tools=formatted, **kwargs)
+
+    def _pick(self, pool: Pool, tried: set) -> Optional[Tuple[Deployment, BaseChatModel]]:
+        now = time.monotonic()
+        ready = [(d, m) for d, m in pool if d.available(now)]
+        fresh = [(d, m) for d, m in ready if d not in tried] or ready
+        if not fresh:
+            return None
+        if self.routing == "least_latency":
+            # 측정 전(None) deployment 를 먼저 써 본다
+            return min(fresh, key=lambda p: (p[0].ewma_ms or 0.0) * (1 + p[0].in_flight))
+        return fresh[next(_rr) % len(fresh)]
+
+    async def _call(self, fn: Callable[[BaseChatModel], Awaitable[Any]]) -> Any:
+        last: Optional[BaseException] = None
+        for pool in (self.primary, self.fallback):
+            if not pool:
+                continue
+            if pool is self.fallback:
+                FALLBACKS.inc()
+            tried: set = set()
+            for attempt in range(LLM_MAX_ATTEMPTS):
+                picked = self._pick(pool, tried)
+                if picked is None:
+                    wait = min(d.ready_at() for d, _ in pool) - time.monotonic()
+                    if wait > LLM_RETRY_MAX_WAIT:
+                        break
+                    await asyncio.sleep(max(wait, 0) + _backoff(0))
+                    continue
+                dep, model = picked
+                tried.add(dep)
+                started = time.perf_counter()
+                dep.begin()
+                try:
+                    result = await fn(model)
+                except Exception as e:
+                    retryable, status, retry_after = classify(e)
+                    if not retryable:
+                        # 400 (content filter / context 초과 / 잘못된 response_format 등)은 요청의 문제 →
+                        # breaker 에 세지 않는다 (나쁜 프롬프트 하나가 deployment 를 막지 않게)
+                        raise
+                    dep.on_failure(status, retry_after)
+                    last = e
+                    if not any(d.available(time.monotonic()) and d not in tried for d, _ in pool):
+                        await asyncio.sleep(_backoff(attempt))
+                    continue
+                finally:
+                    dep.end()
+                dep.on_success(time.perf_counter() - started)
+                return result
+        error = LLMUnavailableError(f"all LLM deployments failed: {last}")
+        retry_at = min((d.ready_at() for d, _ in self.primary + self.fallback), default=0.0)
+        error.retry_after = max(1, int(retry_at - time.monotonic() + 0.999))
+        raise error from last
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return await self._call(
+            lambda m: m._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        )
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator:
+        # 첫 chunk 이전의 실패만 다른 deployment 로 넘긴다 (이미 보낸 토큰은 되돌릴 수 없음)
+        async def first(model):
+            stream = model._astream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+
+        stream, chunk = await self._call(first)
+        if chunk is None:
+            return
+        yield chunk
+        async for chunk in stream:
+            yield chunk
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        """동기 경로 (스크립트 용). 가능한 deployment 를 순서대로 한 번씩 시도."""
+        last: Optional[BaseException] = None
+        for dep, model in self.primary + self.fallback:
+            if not dep.available(time.monotonic()):
+                continue
+            started = time.perf_counter()
+            dep.begin()
+            try:
+                result = model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                retryable, status, retry_after = classify(e)
+                if not retryable:
+                    raise
+                dep.on_failure(status, retry_after)
+                last = e
+                continue
+            finally:
+                dep.end()
+            dep.on_success(time.perf_counter() - started)
+            return result
+        raise LLMUnavailableError(f"all LLM deployments failed: {last}") from last
+
+
+def build_chat_llm(
+    temperature: float,
+    max_tokens: int,
+    fallback: bool = False,
+    callbacks=None,
+    http_client=None,
+    http_async_client=None,
+    **kwargs,
+) -> GatewayChatModel:
+    """deployment 마다 AzureChatOpenAI 를 만들어 GatewayChatModel 로 묶는다.
+
+    SDK 자체 재시도는 끄고 (max_retries=0) gateway 가 재시도/failover 를 맡는다.
+    """
+    from langchain_openai import AzureChatOpenAI
+
+    def pool(configs: List[dict]) -> Pool:
+        return [
+            (
+                _deployment(c["name"]),
+                AzureChatOpenAI(
+                    azure_deployment=c["deployment"],
+                    azure_endpoint=c["endpoint"],
+                    api_key=c["api_key"],
+                    api_version=c["api_version"],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    max_retries=0,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                    **kwargs,
+                ),
+            )
+            for c in configs
+        ]
+
+    return GatewayChatModel(
+        primary=pool(primary_configs()),
+        fallback=pool(fallback_configs()) if fallback else [],
+        callbacks=callbacks,
+    )
+
+
+def stats() -> dict:
+    return {
+        "routing": LLM_ROUTING,
+        "deployments": {name: d.stats() for name, d in _deployments.items()},
+    }
+
+
+def open_circuits() -> int:
+    return sum(1 for d in _deployments.values() if d.state == "open")
@@ -0,0 +1,156 @@
+# backend/app/services/llm_limits.py
+import os, asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
+from app.services.lifecycle import drain
+from app.services.telemetry import traced
+
+# 워커 단위 LLM 동시 호출 제한 (in-flight Azure OpenAI round trip 수)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# 슬롯을 기다릴 수 있는 요청 수 (초과 시 즉시 429)
+LLM_MAX_WAITING = int(os.getenv("LLM_MAX_WAITING", "32"))
+# 슬롯 대기 최대 시간 (초과 시 503)
+LLM_ACQUIRE_TIMEOUT = float(os.getenv("LLM_ACQUIRE_TIMEOUT", "10"))
+# 요청 전체 deadline (대기 + 실행, 초과 시 504)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+_waiting = 0
+_in_flight = 0
+
+
+class LLMLimitError(Exception):
+    """LLM 호출이 동시성 제한/deadline 때문에 거절된 경우."""
+
+    status_code = 503
+    retry_after = 1
+
+    @property
+    def headers(self) -> dict:
+        return {"Retry-After": str(self.retry_after)}
+
+
+class LLMBusyError(LLMLimitError):
+    """대기열까지 가득 찬 경우 (HTTP 429)."""
+
+    status_code = 429
+
+
+class LLMUnavailableError(LLMLimitError):
+    """제한 시간 안에 슬롯을 얻지 못한 경우 (HTTP 503)."""
+
+    status_code = 503
+
+
+class LLMTimeoutError(LLMLimitError):
+    """요청 deadline 초과 (HTTP 504)."""
+
+    status_code = 504
+
+
+def _loop_time() -> float:
+    return asyncio.get_running_loop().time()
+
+
+async def acquire_slot(deadline: Optional[float] = None) -> Callable[[], None]:
+    """슬롯 하나를 잡고 release 함수를 돌려준다 (스트리밍처럼 수명이 긴 호출용).
+
+    deadline 은 loop.time() 기준.
+    """
+    global _waiting, _in_flight
+    if not _slots.locked():
+        await _slots.acquire()  # 여유 슬롯이 있으면 대기 없이 즉시 획득
+    else:
+        if _waiting >= LLM_MAX_WAITING:
+            raise LLMBusyError("LLM capacity exhausted, try again shortly")
+
+        wait_for = LLM_ACQUIRE_TIMEOUT
+        if deadline is not None:
+            wait_for = min(wait_for, max(deadline - _loop_time(), 0))
+
+        _waiting += 1
+        try:
+            await asyncio.wait_for(_slots.acquire(), timeout=wait_for)
+        except asyncio.TimeoutError:
+            raise LLMUnavailableError("LLM capacity unavailable, try again shortly")
+        finally:
+            _waiting -= 1
+
+    _in_flight += 1
+    released = False
+
+    def release() -> None:
+        global _in_flight
+        nonlocal released
+        if not released:
+            released = True
+            _in_flight -= 1
+            _slots.release()
+
+    return release
+
+
+@asynccontextmanager
+async def llm_slot(deadline: Optional[float] = None):
+    """글로벌 세마포어에서 슬롯 하나를 잡는다. deadline 은 loop.time() 기준."""
+    release = await acquire_slot(deadline)
+    try:
+        yield
+    finally:
+        release()
+
+
+def deadline_after(timeout: Optional[float] = None) -> float:
+    """지금부터 timeout 초 뒤의 loop.time() (기본 LLM_TIMEOUT)."""
+    return _loop_time() + (LLM_TIMEOUT if timeout is None else timeout)
+
+
+async def until_deadline(stream, deadline: float, timeout: float = LLM_TIMEOUT) -> AsyncIterator:
+    """stream 의 다음 항목마다 deadline 까지만 기다린다 (멈춘 completion/tool 호출도 끊김).
+
+    deadline 은 loop.time() 기준. 초과 시 LLMTimeoutError.
+    """
+    it = stream.__aiter__()
+    try:
+        while True:
+            try:
+                async with asyncio.timeout_at(deadline):
+                    item = await it.__anext__()
+            except StopAsyncIteration:
+                return
+            except TimeoutError:
+                raise LLMTimeoutError(f"LLM deadline exceeded ({timeout:.0f}s)")
+            yield item
+    finally:
+        aclose = getattr(it, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def run_limited(aw_factory, timeout: Optional[float] = None) -> Any:
+    """aw_factory() 가 만든 코루틴을 슬롯 + deadline 안에서 실행."""
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    deadline = deadline_after(timeout)
+    async with drain.track("llm"), llm_slot(deadline):
+        remaining = deadline - _loop_time()
+        if remaining <= 0:
+            raise LLMTimeoutError(f"LLM deadline exceeded ({timeout:.0f}s)")
+        try:
+            return await asyncio.wait_for(aw_factory(), timeout=remaining)
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError(f"LLM deadline exceeded ({timeout:.0f}s)")
+
+
+async def ainvoke_limited(runnable, inputs, timeout: Optional[float] = None, **kwargs):
+    """runnable.ainvoke 를 동시성 제한/deadline 하에서 실행 (tracing callback 포함)."""
+    kwargs["config"] = traced(kwargs.get("config"))
+    return await run_limited(lambda: runnable.ainvoke(inputs, **kwargs), timeout)
+
+
+def stats() -> dict:
+    return {
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+        "in_flight": _in_flight,
+        "waiting": _waiting,
+    }
@@ -1,25 +1,279 @@
 # backend/app/services/notify.py
-import os, httpx
+"""Slack 알림 outbox.
 
-SLACK_WEBHOOK = os.getenv("SLACK_WEBHOOK_URL")
+post_slack() 은 큐에 넣고 바로 반환한다. 백그라운드 sender 가
+- SLACK_DIGEST_WINDOW 초 동안 몰린 단건 이슈를 digest 1건으로 합치고
+  (post_slack_digest() 로 넣은 배치는 다른 알림과 섞지 않고 그대로 digest 1건)
+- 레지스트리의 공유 httpx 풀로 전송하며
+- 429(Retry-After) / 5xx / 네트워크 오류는 지수 backoff + jitter 로 재시도한다.
+SLACK_OUTBOX_SPOOL 을 지정하면 미전송 건을 SQLite 에 보관해 재시작 후 재전송.
+"""
+import os, json, time, random, asyncio, sqlite3, threading
+from typing import List, Optional, Tuple
+from app.services.clients import registry
+from app.services.lifecycle import pid_alive
 
+SLACK_WEBHOOK = os.getenv("SLACK_WEBHOOK_URL")
+SLACK_OUTBOX_SPOOL = os.getenv("SLACK_OUTBOX_SPOOL", "")  # "" → 메모리 큐만
+SLACK_DIGEST_WINDOW = float(os.getenv("SLACK_DIGEST_WINDOW", "2.0"))
+SLACK_DIGEST_MAX = int(os.getenv("SLACK_DIGEST_MAX", "50"))
+SLACK_MAX_RETRIES = int(os.getenv("SLACK_MAX_RETRIES", "5"))
+SLACK_BACKOFF_BASE = float(os.getenv("SLACK_BACKOFF_BASE", "1.0"))
+SLACK_BACKOFF_MAX = float(os.getenv("SLACK_BACKOFF_MAX", "60"))
 
-async def post_slack(issue: dict) -> None:
-    """이슈 dict를 Slack Webhook 으로 전송 (에러 나더라도 예외 전파 X)"""
-    if not SLACK_WEBHOOK:
-        return
 
+def _format_issue(issue: dict) -> List[str]:
     # 메시지 포맷
-    lines = [f"*{issue['title']}*  (Severity: {issue['severity']})"]
-    for role, tasks in issue["tasks"].items():
+    lines = [f"*{issue.get('title', '')}*  (Severity: {issue.get('severity', '-')})"]
+    for role, tasks in (issue.get("tasks") or {}).items():
         if tasks:
             lines.append(f"*{role}*")
             lines.extend([f"• {t}" for t in tasks])
+    return lines
+
+
+def format_message(issues: List[dict]) -> str:
+    """이슈 1건은 그대로, 여러 건은 digest 로."""
+    if len(issues) == 1:
+        return "\n".join(_format_issue(issues[0]))
+    blocks = [f"*🗂️ 이슈 {len(issues)}건 생성*"]
+    for i, issue in enumerate(issues, 1):
+        blocks.append("")
+        blocks.append(f"{i}. " + "\n".join(_format_issue(issue)))
+    return "\n".join(blocks)
+
+
+class _Spool:
+    """미전송 알림 SQLite 보관 (sync; to_thread 로 호출).
+
+    여러 워커가 같은 파일을 쓰면 행마다 owner(pid)를 기록하고, 기동 시에는
+    자기 것 + 종료된 워커의 것만 가져가 같은 알림을 두 번 보내지 않는다.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # preload 후 fork 된 워커는 부모 연결을 쓰지 않고 새로 연다
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS slack_outbox ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL,"
+                " created_at REAL NOT NULL, owner INTEGER)"
+            )
+            self._db.commit()
+        return self._db
+
+    def add(self, issues: List[dict]) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO slack_outbox (payload, created_at, owner) VALUES (?, ?, ?)",
+                (json.dumps(issues, ensure_ascii=False), time.time(), os.getpid()),
+            )
+            self._conn.commit()
+            return cur.lastrowid
+
+    def remove(self, ids: List[int]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM slack_outbox WHERE id = ?", [(i,) for i in ids]
+            )
+            self._conn.commit()
+
+    def pending(self) -> List[Tuple[int, List[dict]]]:
+        """종료된 워커(owner 프로세스 없음)의 미전송 건을 이 워커 소유로 옮긴 뒤 반환."""
+        me = os.getpid()
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")  # 동시에 기동한 워커끼리 같은 행을 가져가지 않게
+            try:
+                owners = [r[0] for r in conn.execute("SELECT DISTINCT owner FROM slack_outbox")]
+                for owner in owners:
+                    if owner != me and not pid_alive(owner):
+                        if owner is None:
+                            conn.execute("UPDATE slack_outbox SET owner = ? WHERE owner IS NULL", (me,))
+                        else:
+                            conn.execute("UPDATE slack_outbox SET owner = ? WHERE owner = ?", (me, owner))
+                rows = conn.execute(
+                    "SELECT id, payload FROM slack_outbox WHERE owner = ? ORDER BY id", (me,)
+                ).fetchall()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        items = [(r[0], json.loads(r[1])) for r in rows]
+        # 이전 형식 (이슈 dict 1건) 행도 그대로 보낸다
+        return [(i, p if isinstance(p, list) else [p]) for i, p in items]
+
+
+class SlackOutbox:
+    def __init__(self, webhook: Optional[str] = SLACK_WEBHOOK, spool_path: str = SLACK_OUTBOX_SPOOL):
+        self.webhook = webhook
+        self._spool = _Spool(spool_path) if spool_path else None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._held: Optional[Tuple[Optional[int], List[dict]]] = None  # 다음 digest 로 미룬 배치
+        self.metrics = {
+            "enqueued": 0,
+            "messages_sent": 0,
+            "issues_sent": 0,
+            "retries": 0,
+            "dropped": 0,
+            "errors": 0,
+            "last_latency_ms": 0.0,
+        }
+
+    # ── producer ──────────────────────────────────────────────────────────────
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+                if self._spool:
+                    # 이전 프로세스가 못 보낸 건 (기동 시 1회, 새 enqueue 보다 먼저)
+                    for item in self._spool.pending():
+                        self._queue.put_nowait(item)
+            self._task = asyncio.create_task(self._run())
 
-    # 완전 비동기 전송
-    async with httpx.AsyncClient(timeout=5) as client:
+    async def enqueue(self, issues: List[dict]) -> None:
+        """바로 반환. 여러 건이면 메시지 1건으로 보낸다. spool 이 있으면 디스크에 먼저 기록 (1행)."""
+        if not self.webhook or not issues:
+            return
+        self._ensure_started()
+        spool_id = await asyncio.to_thread(self._spool.add, issues) if self._spool else None
+        self._queue.put_nowait((spool_id, issues))
+        self.metrics["enqueued"] += len(issues)
+
+    # ── sender ────────────────────────────────────────────────────────────────
+    async def _collect(self) -> List[Tuple[Optional[int], List[dict]]]:
+        """첫 건을 기다린 뒤 digest window 동안 단건 알림을 추가로 모은다.
+
+        배치(post_slack_digest)는 단독으로 보낸다 — 모으는 중에 도착하면 다음 차례로 미룸.
+        """
+        if self._held is not None:
+            first, self._held = self._held, None
+        else:
+            first = await self._queue.get()
+        batch = [first]
+        if len(first[1]) > 1:
+            return batch
+        deadline = asyncio.get_running_loop().time() + SLACK_DIGEST_WINDOW
+        while len(batch) < SLACK_DIGEST_MAX:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if len(item[1]) > 1:
+                self._held = item
+                break
+            batch.append(item)
+        return batch
+
+    async def _post(self, text: str) -> bool:
+        """재시도 포함 전송. 최종 실패 시 False."""
+        for attempt in range(SLACK_MAX_RETRIES + 1):
+            delay = min(SLACK_BACKOFF_MAX, SLACK_BACKOFF_BASE * 2**attempt)
+            delay *= random.uniform(0.5, 1.5)  # jitter
+            started = time.perf_counter()
+            try:
+                resp = await registry.ahttp.post(self.webhook, json={"text": text}, timeout=5)
+                self.metrics["last_latency_ms"] = (time.perf_counter() - started) * 1000
+                if resp.status_code < 300:
+                    return True
+                if resp.status_code == 429:
+                    retry_after = resp.headers.get("Retry-After")
+                    if retry_after and retry_after.isdigit():
+                        delay = float(retry_after)
+                elif resp.status_code < 500:
+                    print(f"⚠️ slack rejected message ({resp.status_code}): {resp.text[:200]}")
+                    return False  # 4xx 는 재시도해도 동일
+            except Exception as e:
+                print("⚠️ slack post failed:", e)
+            if attempt < SLACK_MAX_RETRIES:
+                self.metrics["retries"] += 1
+                await asyncio.sleep(delay)
+        return False
+
+    async def _send(self, batch: List[Tuple[Optional[int], List[dict]]]) -> None:
+        issues = [issue for _, items in batch for issue in items]
+        try:
+            ok = await self._post(format_message(issues))
+        except Exception as e:
+            self.metrics["errors"] += 1
+            print("⚠️ slack message build failed:", e)
+            ok = False
+        if ok:
+            self.metrics["messages_sent"] += 1
+            self.metrics["issues_sent"] += len(issues)
+        else:
+            self.metrics["dropped"] += len(issues)
+        spool_ids = [i for i, _ in batch if i is not None]
+        if spool_ids:
+            # 최종 실패도 spool 에서 제거 (로그로 남김) — 무한 재전송 방지
+            await asyncio.to_thread(self._spool.remove, spool_ids)
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            try:
+                await self._send(batch)
+            except Exception as e:
+                # spool 정리 실패 등 — sender 는 계속 (남은 spool 행은 다음 기동 때 재전송)
+                self.metrics["errors"] += 1
+                print("⚠️ slack outbox batch failed:", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def start(self) -> None:
+        if self.webhook:
+            self._ensure_started()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """남은 알림을 timeout 안에서 최대한 보내고 종료 (spool 이 있으면 나머지는 다음 기동 때)."""
+        if self._task is None:
+            return
         try:
-            await client.post(SLACK_WEBHOOK, json={"text": "\n".join(lines)})
-        except Exception:
-            # Slack 실패해도 API 자체는 200을 주게 하려면 예외를 삼키거나 로그만 남김
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
             pass
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "spool": bool(self._spool),
+        }
+
+
+outbox = SlackOutbox()
+
+
+async def post_slack(issue: dict) -> None:
+    """이슈 dict를 Slack outbox 에 넣고 즉시 반환 (에러 나더라도 예외 전파 X)"""
+    try:
+        await outbox.enqueue([issue])
+    except Exception as e:
+        print("⚠️ slack enqueue failed:", e)
+
+
+async def post_slack_digest(issues: List[dict]) -> None:
+    """여러 이슈를 digest 메시지 1건으로 outbox 에 넣는다 (에러 나더라도 예외 전파 X)"""
+    try:
+        await outbox.enqueue(issues)
+    except Exception as e:
+        print("⚠️ slack enqueue failed:", e)
@@ -0,0 +1,180 @@
+# backend/app/services/prompts.py
+"""프롬프트 조립 + 토큰 계측.
+
+- 정적 부분(지시문 + format instructions + few-shot)은 맨 앞 SystemMessage 로 고정한다.
+  매 요청 byte 단위로 같아야 Azure OpenAI prompt caching 이 prefix 를 재사용한다.
+- 질문/컨텍스트 같은 가변 입력은 그 뒤 human 메시지에만 들어간다.
+- tiktoken 으로 토큰을 세고(인코딩을 못 불러오면 근사치), 검색 컨텍스트를 예산에 맞춰 자른다.
+- 체인별 prompt/completion/cached 토큰 사용량을 집계한다.
+"""
+import os
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import SystemMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.prompts import ChatPromptTemplate
+
+PROMPT_ENCODING = os.getenv("PROMPT_ENCODING", "o200k_base")
+# pdf_search 요약/issue 입력 등 가변 컨텍스트의 토큰 상한
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - langchain-openai 의존성으로 보통 설치됨
+    tiktoken = None
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(PROMPT_ENCODING)
+    except Exception as e:  # 오프라인 등으로 BPE 파일을 못 받으면 근사치 사용
+        print("⚠️ tiktoken encoding unavailable, using estimate:", e)
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (영문 ~4자/토큰, 한글 등 non-ascii ~1자/토큰)."""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return max(1, ascii_chars // 4 + (len(text) - ascii_chars))
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _encoding()
+    if enc is None:
+        return estimate_tokens(text)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """앞에서부터 max_tokens 까지만 남긴다."""
+    if max_tokens <= 0:
+        return ""
+    enc = _encoding()
+    if enc is not None:
+        tokens = enc.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else enc.decode(tokens[:max_tokens])
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:  # 근사치 기준 이분 탐색
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def fit_context(
+    texts: Iterable[str], budget: int = CONTEXT_TOKEN_BUDGET, sep: str = "\n\n", min_tail: int = 64
+) -> str:
+    """순서대로 예산 안에 들어가는 만큼 이어 붙인다.
+
+    넘치는 첫 조각은 남은 예산이 min_tail 이상일 때만 잘라서 넣는다.
+    """
+    parts: List[str] = []
+    used, sep_cost = 0, count_tokens(sep)
+    for text in texts:
+        if not text:
+            continue
+        cost = count_tokens(text) + (sep_cost if parts else 0)
+        if used + cost <= budget:
+            parts.append(text)
+            used += cost
+            continue
+        remaining = budget - used - (sep_cost if parts else 0)
+        if remaining >= min_tail or not parts:
+            parts.append(truncate_tokens(text, max(remaining, 0)))
+        break
+    return sep.join(p for p in parts if p)
+
+
+def static_prompt(prefix: str, human_template: str) -> ChatPromptTemplate:
+    """[고정 SystemMessage(prefix), human(template)].
+
+    prefix 는 템플릿 변수를 치환하지 않는 SystemMessage 라서 JSON 예시의 중괄호도 그대로 두면 된다.
+    """
+    return ChatPromptTemplate.from_messages(
+        [SystemMessage(content=prefix), ("human", human_template)]
+    )
+
+
+# ── 토큰 사용량 ────────────────────────────────────────────────────────────────
+_usage: Dict[str, Dict[str, Any]] = defaultdict(
+    lambda: {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_tokens": 0,
+        "prefix_tokens": 0,
+    }
+)
+
+
+def usage_from_result(response: LLMResult) -> Tuple[int, int, int]:
+    """(prompt, completion, cached) 토큰 수. usage_metadata 우선, 없으면 llm_output."""
+    for gens in response.generations:
+        for gen in gens:
+            usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if usage:
+                cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0), cached or 0
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    details = token_usage.get("prompt_tokens_details") or {}
+    return (
+        token_usage.get("prompt_tokens", 0),
+        token_usage.get("completion_tokens", 0),
+        details.get("cached_tokens", 0) or 0,
+    )
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """LLM 호출이 끝날 때 응답의 token usage 를 체인 이름 아래 누적."""
+
+    run_inline = True
+
+    def __init__(self, chain: str):
+        self.chain = chain
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        prompt, completion, cached = usage_from_result(response)
+        stat = _usage[self.chain]
+        stat["calls"] += 1
+        stat["prompt_tokens"] += prompt
+        stat["completion_tokens"] += completion
+        stat["cached_tokens"] += cached
+
+
+_handlers: Dict[str, TokenUsageHandler] = {}
+
+
+def usage_handler(chain: str, prefix: Optional[str] = None) -> TokenUsageHandler:
+    """체인별 handler (singleton). prefix 를 주면 고정 prefix 토큰 수도 기록."""
+    if prefix is not None:
+        _usage[chain]["prefix_tokens"] = count_tokens(prefix)
+    if chain not in _handlers:
+        _handlers[chain] = TokenUsageHandler(chain)
+    return _handlers[chain]
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    out = {}
+    for chain, s in _usage.items():
+        calls = s["calls"]
+        out[chain] = {
+            **s,
+            "avg_prompt_tokens": round(s["prompt_tokens"] / calls, 1) if calls else 0.0,
+            "avg_completion_tokens": round(s["completion_tokens"] / calls, 1) if calls else 0.0,
+            "cache_hit_ratio": round(s["cached_tokens"] / s["prompt_tokens"], 3)
+            if s["prompt_tokens"]
+            else 0.0,
+        }
+    return out
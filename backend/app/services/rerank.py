@@ -0,0 +1,186 @@
+# backend/app/services/rerank.py
+"""retrieval 후보 재정렬 → 적응형 개수 컷 → MMR 중복 제거 (네트워크 호출 없음).
+
+- 점수: 후보 집합 내 BM25 (한글은 음절 bigram, 영문/숫자는 단어) + 융합 순위 prior
+  RERANK_MODEL 에 로컬 cross-encoder (sentence-transformers) 경로/이름을 주면 BM25 대신 사용
+- 개수: 최고 점수 대비 RERANK_RELATIVE_CUTOFF 이상인 것만 (RERANK_MIN_K ~ RERANK_MAX_K)
+- MMR: 관련도 - 이미 고른 chunk 와의 유사도(토큰 Jaccard). RERANK_DUP_THRESHOLD 이상은 중복으로 버림
+"""
+import os, re, math
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "1") == "1"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "")  # "" → BM25
+RERANK_ALPHA = float(os.getenv("RERANK_ALPHA", "0.7"))  # 재정렬 점수 비중 (나머지는 융합 순위)
+RERANK_MIN_K = int(os.getenv("RERANK_MIN_K", "2"))
+RERANK_MAX_K = int(os.getenv("RERANK_MAX_K", "6"))
+RERANK_RELATIVE_CUTOFF = float(os.getenv("RERANK_RELATIVE_CUTOFF", "0.45"))
+RERANK_MMR_LAMBDA = float(os.getenv("RERANK_MMR_LAMBDA", "0.75"))
+RERANK_DUP_THRESHOLD = float(os.getenv("RERANK_DUP_THRESHOLD", "0.8"))
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD = re.compile(r"[가-힣]+|[a-z0-9]+(?:[.%][0-9]+)?%?")
+
+Scorer = Callable[[str, List[str]], List[float]]
+
+_stats = {"calls": 0, "candidates": 0, "kept": 0, "duplicates": 0}
+
+
+def tokenize(text: str) -> List[str]:
+    """한글 어절은 음절 bigram (조사/어미가 붙어도 겹치게), 나머지는 소문자 단어."""
+    tokens: List[str] = []
+    for word in _WORD.findall((text or "").lower()):
+        if "가" <= word[0] <= "힣":
+            tokens.extend(word[i : i + 2] for i in range(max(len(word) - 1, 1)))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def bm25_scores(query: str, texts: List[str]) -> List[float]:
+    """후보 집합을 corpus 로 한 Okapi BM25 (idf 도 후보 안에서)."""
+    docs = [Counter(tokenize(t)) for t in texts]
+    if not docs:
+        return []
+    lengths = [sum(d.values()) for d in docs]
+    avg_len = (sum(lengths) / len(lengths)) or 1.0
+    n = len(docs)
+    scores = [0.0] * n
+    for term in set(tokenize(query)):
+        df = sum(1 for d in docs if term in d)
+        if not df:
+            continue
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for i, d in enumerate(docs):
+            tf = d.get(term)
+            if tf:
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[i] / avg_len)
+                scores[i] += idf * tf * (BM25_K1 + 1) / norm
+    return scores
+
+
+_cross_encoder = None
+
+
+def _cross_encoder_scores(query: str, texts: List[str]) -> List[float]:
+    global _cross_encoder
+    if _cross_encoder is None:
+        from sentence_transformers import CrossEncoder  # optional dependency
+
+        _cross_encoder = CrossEncoder(RERANK_MODEL)
+    return [float(s) for s in _cross_encoder.predict([(query, t) for t in texts])]
+
+
+def default_scorer() -> Scorer:
+    if not RERANK_MODEL:
+        return bm25_scores
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        print("⚠️ sentence-transformers not installed, reranking with BM25")
+        return bm25_scores
+    return _cross_encoder_scores
+
+
+def _minmax(values: Sequence[float]) -> List[float]:
+    lo, hi = min(values), max(values)
+    if hi - lo < 1e-9:
+        return [1.0 if hi > 0 else 0.0] * len(values)
+    return [(v - lo) / (hi - lo) for v in values]
+
+
+def similarity(a: set, b: set) -> float:
+    """토큰 집합 Jaccard (near-duplicate 판정용)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def adaptive_depth(
+    scores: Sequence[float],
+    min_k: int = RERANK_MIN_K,
+    max_k: int = RERANK_MAX_K,
+    cutoff: float = RERANK_RELATIVE_CUTOFF,
+) -> int:
+    """내림차순 점수에서 최고 점수 × cutoff 이상인 개수 (min_k~max_k)."""
+    if not scores:
+        return 0
+    top = scores[0]
+    k = sum(1 for s in scores if s >= top * cutoff) if top > 0 else min_k
+    return max(min(min_k, len(scores)), min(k, max_k))
+
+
+def mmr(
+    docs: List[Document],
+    relevance: List[float],
+    k: int,
+    lam: float = RERANK_MMR_LAMBDA,
+    dup_threshold: float = RERANK_DUP_THRESHOLD,
+) -> List[Document]:
+    """relevance 내림차순으로 정렬된 docs 에서 k 개를 MMR 로 고른다."""
+    token_sets = [set(tokenize(d.page_content)) for d in docs]
+    remaining = list(range(len(docs)))
+    picked: List[int] = []
+    while remaining and len(picked) < k:
+        best, best_score = None, -math.inf
+        for i in list(remaining):
+            redundancy = max((similarity(token_sets[i], token_sets[j]) for j in picked), default=0.0)
+            if redundancy >= dup_threshold:
+                remaining.remove(i)  # 거의 같은 chunk (머리말/반복 페이지 등)
+                _stats["duplicates"] += 1
+                continue
+            score = lam * relevance[i] - (1 - lam) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        if best is None:
+            break
+        picked.append(best)
+        remaining.remove(best)
+    return [docs[i] for i in picked]
+
+
+def rerank(
+    query: str,
+    docs: List[Document],
+    scorer: Optional[Scorer] = None,
+    alpha: float = RERANK_ALPHA,
+    min_k: int = RERANK_MIN_K,
+    max_k: int = RERANK_MAX_K,
+    cutoff: float = RERANK_RELATIVE_CUTOFF,
+) -> List[Document]:
+    """docs 는 융합(RRF) 순서. 점수 분포에 맞춰 개수를 정하고 MMR 로 중복을 걸러 반환."""
+    if not docs:
+        return []
+    scorer = scorer or default_scorer()
+    scores = _minmax(scorer(query, [d.page_content for d in docs]))
+    n = len(docs)
+    prior = [1 - i / n for i in range(n)]  # 융합 순위 (1 → 0)
+    blended = [alpha * s + (1 - alpha) * p for s, p in zip(scores, prior)]
+
+    order = sorted(range(n), key=lambda i: blended[i], reverse=True)
+    ranked = [docs[i] for i in order]
+    relevance = [blended[i] for i in order]
+    for doc, score in zip(ranked, relevance):
+        doc.metadata = {**(doc.metadata or {}), "rerank_score": round(score, 4)}
+
+    k = adaptive_depth(relevance, min_k, max_k, cutoff)
+    # cutoff 안쪽만 MMR — 중복을 버린 자리를 cutoff 밖 문서로 채우지 않는다
+    kept = mmr(ranked[:k], relevance[:k], k)
+    _stats["calls"] += 1
+    _stats["candidates"] += n
+    _stats["kept"] += len(kept)
+    return kept
+
+
+def stats() -> Dict[str, float]:
+    calls = _stats["calls"]
+    return {
+        **_stats,
+        "scorer": "cross_encoder" if RERANK_MODEL else "bm25",
+        "avg_candidates": round(_stats["candidates"] / calls, 2) if calls else 0.0,
+        "avg_kept": round(_stats["kept"] / calls, 2) if calls else 0.0,
+    }
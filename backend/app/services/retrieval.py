@@ -0,0 +1,125 @@
+# backend/app/services/retrieval.py
+"""Hybrid retrieval: 여러 소스를 동시에 조회 → 중복 제거 → RRF 융합 → 재정렬/MMR → 토큰 예산 컷."""
+import os, time, asyncio, hashlib
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from app.services.prompts import CONTEXT_TOKEN_BUDGET, count_tokens
+from app.services.rerank import RERANK_ENABLED, RERANK_MODEL, rerank
+
+RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", "10"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# 재정렬이 켜져 있으면 소스별로 넉넉히 가져오고 rerank 가 개수를 줄인다
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20" if RERANK_ENABLED else "5"))
+
+# name → async (query) -> list[Document]
+Fetch = Callable[[str], Awaitable[List[Document]]]
+
+_latency: Dict[str, dict] = defaultdict(
+    lambda: {"calls": 0, "errors": 0, "total_ms": 0.0, "last_ms": 0.0}
+)
+
+
+def doc_key(doc: Document) -> str:
+    """검색 id 가 있으면 id, 없으면 정규화된 본문 해시."""
+    meta = doc.metadata or {}
+    for k in ("id", "chunk_id", "@search.id", "url"):
+        if meta.get(k):
+            return f"id:{meta[k]}"
+    body = " ".join((doc.page_content or "").split())
+    return "h:" + hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+async def _timed(name: str, fetch: Fetch, query: str, timeout: float):
+    """(name, docs, latency ms). 실패/타임아웃은 빈 결과로 기록."""
+    stat = _latency[name]
+    started = time.perf_counter()
+    try:
+        docs = list(await asyncio.wait_for(fetch(query), timeout=timeout) or [])
+    except Exception as e:
+        print(f"⚠️ retrieval source {name} failed:", e)
+        stat["errors"] += 1
+        docs = []
+    ms = (time.perf_counter() - started) * 1000
+    stat["calls"] += 1
+    stat["total_ms"] += ms
+    stat["last_ms"] = ms
+    return name, docs, ms
+
+
+def rrf_fuse(
+    ranked: Dict[str, List[Document]],
+    weights: Optional[Dict[str, float]] = None,
+    k: int = RRF_K,
+) -> List[Document]:
+    """Reciprocal-rank fusion. 같은 문서(doc_key)는 점수를 합산하고 한 번만 남긴다."""
+    weights = weights or {}
+    scores: Dict[str, float] = defaultdict(float)
+    first: Dict[str, Document] = {}
+    for name, docs in ranked.items():
+        w = weights.get(name, 1.0)
+        seen = set()
+        for rank, doc in enumerate(docs):
+            if not (doc.page_content or "").strip():
+                continue
+            key = doc_key(doc)
+            if key in seen:
+                continue  # 같은 소스 안의 중복은 최상위 rank 만
+            seen.add(key)
+            scores[key] += w / (k + rank + 1)
+            first.setdefault(key, doc)
+    order = sorted(scores, key=scores.get, reverse=True)
+    return [first[key] for key in order]
+
+
+def apply_budget(docs: List[Document], token_budget: int = CONTEXT_TOKEN_BUDGET, sep: str = "\n\n") -> List[Document]:
+    """융합 순서대로 토큰 예산 안에 들어가는 문서만 남긴다 (최소 1개).
+
+    예산은 프롬프트 컨텍스트와 같은 CONTEXT_TOKEN_BUDGET — 문서 사이 구분자까지 세므로
+    format_docs(fit_context) 는 첫 문서 하나가 예산보다 클 때만 자른다.
+    """
+    kept, used, sep_cost = [], 0, count_tokens(sep)
+    for doc in docs:
+        cost = count_tokens(doc.page_content) + (sep_cost if kept else 0)
+        if kept and used + cost > token_budget:
+            continue
+        kept.append(doc)
+        used += cost
+    return kept
+
+
+async def hybrid_retrieve(
+    query: str,
+    sources: Dict[str, Fetch],
+    weights: Optional[Dict[str, float]] = None,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    timeout: float = RETRIEVAL_TIMEOUT,
+    rerank_docs: bool = RERANK_ENABLED,
+) -> Tuple[List[Document], Dict[str, float]]:
+    """모든 소스를 동시에 조회. (융합·재정렬·예산 적용된 문서, 소스별 latency ms) 반환.
+
+    한 소스가 실패/타임아웃이어도 나머지 결과로 진행한다.
+    """
+    results = await asyncio.gather(
+        *(_timed(name, fetch, query, timeout) for name, fetch in sources.items())
+    )
+    ranked = {name: docs for name, docs, _ in results}
+    timings = {name: round(ms, 2) for name, _, ms in results}
+    fused = rrf_fuse(ranked, weights)
+    if rerank_docs and fused:
+        started = time.perf_counter()
+        if RERANK_MODEL:  # cross-encoder 는 CPU 연산이라 이벤트 루프 밖에서
+            fused = await asyncio.to_thread(rerank, query, fused)
+        else:
+            fused = rerank(query, fused)
+        timings["rerank"] = round((time.perf_counter() - started) * 1000, 2)
+    return apply_budget(fused, token_budget), timings
+
+
+def stats() -> Dict[str, dict]:
+    return {
+        name: {**s, "avg_ms": round(s["total_ms"] / s["calls"], 2) if s["calls"] else 0.0}
+        for name, s in _latency.items()
+    }
@@ -0,0 +1,93 @@
+# backend/app/services/singleflight.py
+"""동일한 동시 호출 합치기 (single-flight).
+
+같은 key 로 이미 진행 중인 호출이 있으면 새로 실행하지 않고 그 결과(또는 예외)를 같이 받는다.
+실제 작업은 별도 Task 로 돌리므로 먼저 온 요청이 끊겨도 나머지 대기자는 영향이 없다.
+
+SINGLEFLIGHT_NORMALIZE: key 정규화 — "whitespace", "case" 조합 (콤마 구분) 또는 "none"
+"""
+import os, json, asyncio, hashlib, unicodedata
+from typing import Any, Awaitable, Callable, Dict
+
+from app.services.telemetry import Counter
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "1") == "1"
+SINGLEFLIGHT_NORMALIZE = {
+    x.strip() for x in os.getenv("SINGLEFLIGHT_NORMALIZE", "whitespace").split(",") if x.strip()
+}
+
+DEDUPED = Counter(
+    "crm_singleflight_deduplicated_total", "Calls that joined an identical in-flight call"
+)
+
+
+def normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        value = unicodedata.normalize("NFC", value)
+        if "whitespace" in SINGLEFLIGHT_NORMALIZE:
+            value = " ".join(value.split())
+        if "case" in SINGLEFLIGHT_NORMALIZE:
+            value = value.casefold()
+        return value
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return value
+
+
+def make_key(payload: Any) -> str:
+    body = json.dumps(normalize(payload), ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """group(체인/검색 종류) 단위 in-flight 테이블."""
+
+    def __init__(self, group: str):
+        self.group = group
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.calls = self.deduped = 0
+
+    async def do(self, payload: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not SINGLEFLIGHT_ENABLED:
+            return await fn()
+        key = make_key(payload)
+        task = self._calls.get(key)
+        if task is not None:
+            self.deduped += 1
+            DEDUPED.inc(group=self.group)
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        # 대기자 하나가 취소돼도 공유 작업은 계속
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # 대기자가 모두 사라진 경우 "never retrieved" 경고 방지
+
+    def stats(self) -> dict:
+        return {
+            "group": self.group,
+            "calls": self.calls,
+            "deduplicated": self.deduped,
+            "in_flight": len(self._calls),
+        }
+
+
+_flights: Dict[str, SingleFlight] = {}
+
+
+def flight(group: str) -> SingleFlight:
+    if group not in _flights:
+        _flights[group] = SingleFlight(group)
+    return _flights[group]
+
+
+def stats() -> list:
+    return [f.stats() for f in _flights.values()]
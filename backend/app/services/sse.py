@@ -0,0 +1,31 @@
+# backend/app/services/sse.py
+"""Server-Sent Events 헬퍼."""
+import json
+from typing import Any, AsyncIterator, Tuple
+
+from app.services.lifecycle import drain
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # 프록시 버퍼링 비활성화 (TTFB)
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """event/data 한 쌍을 text/event-stream 프레임으로 직렬화."""
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    lines = "".join(f"data: {line}\n" for line in payload.split("\n"))
+    return f"event: {event}\n{lines}\n"
+
+
+async def sse_stream(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    """(event, data) 이터레이터 → SSE 프레임. 중간 예외는 error 이벤트로 전달."""
+    # 첫 바이트를 바로 흘려보내 TTFB 를 줄임 (comment frame)
+    yield ": stream-open\n\n"
+    async with drain.track("stream"):  # 종료 시 끝까지 흘려보낼 스트림 수
+        try:
+            async for event, data in events:
+                yield sse_event(event, data)
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
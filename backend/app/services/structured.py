@@ -0,0 +1,281 @@
+# backend/app/services/structured.py
+"""JSON 출력 체인: 응답 형식 강제 → 로컬 수리 → (최후) 재요청.
+
+1. LLM_STRUCTURED_OUTPUT=json_object (기본): response_format 으로 JSON object 만 강제 (스키마는 프롬프트).
+   json_schema 는 opt-in — Pydantic 모델에서 만든 strict JSON schema 를 넘긴다 (structured outputs 를 지원하는
+   API 버전/모델 필요). off 는 프롬프트만. deployment 가 response_format 을 400 으로 거절하면
+   경고 후 이 프로세스에서는 response_format 없이 (프롬프트 + 로컬 수리) 계속한다
+2. 응답이 깨졌으면 로컬에서 먼저 고친다 — 코드펜스/앞뒤 설명문, trailing comma, 잘린 문자열·괄호,
+   스키마별 coerce (키 이름/누락 기본값/개수·길이)
+3. 그래도 스키마에 안 맞으면 무엇이 틀렸는지만 짚어 LLM_STRUCTURED_REASK 회 재요청
+
+결과는 schema 별 valid / repaired / reasked / failed 로 집계 (crm_structured_output_total).
+"""
+import os, re, json
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.json import parse_partial_json
+from pydantic import BaseModel, ValidationError
+
+from app.services.telemetry import Counter
+
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "json_object")  # json_object | json_schema | off
+STRUCTURED_REASK = int(os.getenv("LLM_STRUCTURED_REASK", "1"))
+
+OUTCOMES = Counter(
+    "crm_structured_output_total", "Structured LLM outputs by schema and outcome"
+)
+
+_FENCE = re.compile(r"```(?:json)?")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+# OpenAI strict schema 가 받지 않는 키워드 (제약은 로컬 검증에서 확인)
+_UNSUPPORTED = {"title", "default", "minLength", "maxLength", "minItems", "maxItems"}
+
+_stats: Dict[str, Dict[str, int]] = {}
+_format_rejected = False  # deployment 가 response_format 을 거절한 적 있음 → 이후 프롬프트만
+
+Coerce = Callable[[Any], Tuple[Any, bool]]
+
+
+class StructuredOutputError(ValueError):
+    """로컬 수리/재요청 후에도 스키마에 맞지 않는 출력."""
+
+    def __init__(self, schema: str, problems: str):
+        super().__init__(f"{schema}: {problems}")
+        self.schema, self.problems = schema, problems
+
+
+class OutputSpec:
+    """출력 스키마 (Pydantic 모델) + 로컬 coerce + 최종 반환 형태."""
+
+    def __init__(
+        self,
+        name: str,
+        model: Type[BaseModel],
+        coerce: Optional[Coerce] = None,
+        dump: Optional[Callable[[BaseModel], Any]] = None,
+    ):
+        self.name, self.model = name, model
+        self.coerce = coerce or (lambda obj: (obj, False))
+        self.dump = dump or (lambda m: m.model_dump(by_alias=True))
+
+    def response_format(self) -> Optional[dict]:
+        if STRUCTURED_OUTPUT == "json_schema":
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": self.name, "strict": True, "schema": strict_schema(self.model)},
+            }
+        if STRUCTURED_OUTPUT == "json_object":
+            return {"type": "json_object"}
+        return None
+
+
+def strict_schema(model: Type[BaseModel]) -> dict:
+    """model_json_schema → strict 모드 형식 (모든 키 required, additionalProperties=false)."""
+
+    def fix(node):
+        if isinstance(node, list):
+            return [fix(x) for x in node]
+        if not isinstance(node, dict):
+            return node
+        out = {k: fix(v) for k, v in node.items() if k not in _UNSUPPORTED}
+        if out.get("type") == "object" and "properties" in out:
+            out["properties"] = {k: fix(v) for k, v in node["properties"].items()}
+            out["required"] = list(out["properties"])
+            out["additionalProperties"] = False
+        return out
+
+    return fix(model.model_json_schema(by_alias=True))
+
+
+def reject_format(exc: BaseException) -> bool:
+    """response_format 을 지원하지 않는 deployment/API 버전의 400 이면 기록하고 True (호출자가 재시도)."""
+    global _format_rejected
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if _format_rejected or status != 400 or "response_format" not in str(exc):
+        return False
+    _format_rejected = True
+    print(f"⚠️ response_format ({STRUCTURED_OUTPUT}) rejected, falling back to prompt-only JSON:", exc)
+    return True
+
+
+def with_format(llm, spec: OutputSpec):
+    """호출 시점에 response_format 을 붙일지 고른다 (거절된 뒤에는 llm 그대로)."""
+    fmt = spec.response_format()
+    if fmt is None:
+        return llm
+    bound = llm.bind(response_format=fmt)
+    # RunnableLambda 가 Runnable 을 돌려주면 같은 입력으로 그것을 실행 (stream 포함)
+    return RunnableLambda(lambda _: llm if _format_rejected else bound, name=f"format:{spec.name}")
+
+
+def load_json(text: str) -> Tuple[Any, bool]:
+    """(값, 고쳤는지). 코드펜스/앞뒤 텍스트/trailing comma/잘린 끝을 로컬에서 수리."""
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+    s = _FENCE.sub("", text)
+    starts = [i for i in (s.find("{"), s.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object or array in output")
+    s = _TRAILING_COMMA.sub(r"\1", s[min(starts):])
+    try:
+        value, _ = json.JSONDecoder().raw_decode(s)  # 뒤에 붙은 설명문은 무시
+        return value, True
+    except ValueError:
+        pass
+    value = parse_partial_json(s)  # max_tokens 로 잘린 문자열/괄호 닫기
+    if value is None:
+        raise ValueError("malformed JSON")
+    return value, True
+
+
+def _problems(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(x) for x in err['loc']) or '(root)'}: {err['msg']}" for err in e.errors()
+    )
+
+
+def parse(spec: OutputSpec, raw: Any) -> Tuple[Any, bool]:
+    """LLM 출력(메시지/문자열/이미 파싱된 값) → (검증된 값, 로컬 수리 여부)."""
+    if isinstance(raw, BaseMessage):
+        raw = raw.content
+    repaired = False
+    if isinstance(raw, str):
+        try:
+            raw, repaired = load_json(raw.strip())
+        except ValueError as e:
+            raise StructuredOutputError(spec.name, str(e))
+    value, changed = spec.coerce(raw)
+    try:
+        model = spec.model.model_validate(value)
+    except ValidationError as e:
+        raise StructuredOutputError(spec.name, _problems(e))
+    return spec.dump(model), repaired or changed
+
+
+_OUTCOMES = ("valid", "repaired", "reasked", "failed")
+
+
+def record(schema: str, outcome: str) -> None:
+    """outcome: valid | repaired | reasked | failed (호출당 1회), reask_calls (재요청 LLM 호출마다)."""
+    counts = _stats.setdefault(schema, {k: 0 for k in (*_OUTCOMES, "reask_calls")})
+    counts[outcome] += 1
+    if outcome in _OUTCOMES:
+        OUTCOMES.inc(schema=schema, outcome=outcome)
+
+
+def _reask(messages: List[BaseMessage], bad: Any, error: StructuredOutputError) -> List[BaseMessage]:
+    content = bad.content if isinstance(bad, BaseMessage) else str(bad)
+    return [
+        *messages,
+        AIMessage(content=content),
+        HumanMessage(
+            content=(
+                f"Your previous reply could not be used ({error.problems}). "
+                "Reply again with ONLY the corrected JSON: keep the same content and fix just these problems."
+            )
+        ),
+    ]
+
+
+def _first(spec: OutputSpec, message: Any) -> Tuple[Any, Optional[StructuredOutputError]]:
+    try:
+        value, repaired = parse(spec, message)
+    except StructuredOutputError as e:
+        return None, e
+    record(spec.name, "repaired" if repaired else "valid")
+    return value, None
+
+
+def _resolve(spec: OutputSpec, messages: List[BaseMessage], message: Any):
+    """검증 → (실패 시) 재요청 루프. 재요청할 messages 를 yield 하고 응답을 send 로 받는다."""
+    value, error = _first(spec, message)
+    if error is None:
+        return value
+    for _ in range(STRUCTURED_REASK):
+        messages = _reask(messages, message, error)
+        record(spec.name, "reask_calls")
+        message = yield messages
+        try:
+            value, _ = parse(spec, message)
+        except StructuredOutputError as e:
+            error = e
+            continue
+        record(spec.name, "reasked")
+        return value
+    record(spec.name, "failed")
+    raise error
+
+
+def resolve(spec: OutputSpec, llm, messages: List[BaseMessage], message: Any, config=None) -> Any:
+    steps = _resolve(spec, messages, message)
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(llm.invoke(request, config))
+    except StopIteration as done:
+        return done.value
+
+
+async def aresolve(spec: OutputSpec, llm, messages: List[BaseMessage], message: Any, config=None) -> Any:
+    steps = _resolve(spec, messages, message)
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(await llm.ainvoke(request, config))
+    except StopIteration as done:
+        return done.value
+
+
+def structured_chain(prompt, llm, spec: OutputSpec) -> RunnableLambda:
+    """prompt → llm(response_format) → 검증/수리/재요청. 반환은 spec.dump 형태."""
+    bound = with_format(llm, spec)
+
+    def call(messages, config):
+        try:
+            return bound.invoke(messages, config)
+        except Exception as e:
+            if not reject_format(e):
+                raise
+            return bound.invoke(messages, config)
+
+    async def acall(messages, config):
+        try:
+            return await bound.ainvoke(messages, config)
+        except Exception as e:
+            if not reject_format(e):
+                raise
+            return await bound.ainvoke(messages, config)
+
+    def run(inputs: dict, config) -> Any:
+        messages = prompt.invoke(inputs, config).to_messages()
+        return resolve(spec, bound, messages, call(messages, config), config)
+
+    async def arun(inputs: dict, config) -> Any:
+        messages = (await prompt.ainvoke(inputs, config)).to_messages()
+        return await aresolve(spec, bound, messages, await acall(messages, config), config)
+
+    return RunnableLambda(run, afunc=arun, name=f"structured:{spec.name}")
+
+
+def stats() -> Dict[str, Any]:
+    out = {
+        "mode": "off (rejected)" if _format_rejected else STRUCTURED_OUTPUT,
+        "reask_limit": STRUCTURED_REASK,
+        "schemas": {},
+    }
+    for schema, c in _stats.items():
+        total = sum(c[k] for k in _OUTCOMES)
+        rate = lambda n: round(n / total, 4) if total else 0.0
+        out["schemas"][schema] = {
+            **c,
+            "total": total,
+            "repair_rate": rate(c["repaired"]),
+            "reask_rate": rate(c["reasked"] + (c["failed"] if STRUCTURED_REASK else 0)),  # 재요청까지 간 비율
+            "failure_rate": rate(c["failed"]),
+        }
+    return out
@@ -0,0 +1,507 @@
+# backend/app/services/telemetry.py
+"""Span 기반 계측 + Prometheus 메트릭.
+
+- TelemetryMiddleware: 라우트별 server span + 요청 latency histogram
+- TracingCallbackHandler: LangChain chain/tool/retriever/LLM 실행을 하위 span 으로 기록
+  (LLM span 에는 토큰 수, 캐시 조회는 현재 span 의 attribute + counter)
+- span(): blob 스캔 등 직접 감쌀 구간용 context manager
+- exporter: none | memory | console | otlp (OTLP/HTTP JSON, 외부 SDK 불필요)
+- render_metrics(): Prometheus text exposition (GET /metrics)
+"""
+import os, json, time, asyncio, secrets, threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+TELEMETRY_EXPORTER = os.getenv(
+    "TELEMETRY_EXPORTER", "otlp" if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") else "none"
+)
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "crm-backend")
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv("TELEMETRY_FLUSH_INTERVAL", "5"))
+TELEMETRY_MAX_BUFFER = int(os.getenv("TELEMETRY_MAX_BUFFER", "2048"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+# ── Prometheus 메트릭 ──────────────────────────────────────────────────────────
+_metrics: List[Any] = []  # 생성된 Counter/Histogram (render 순서대로)
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels.items()) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, value: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(dict(key))} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.buckets = name, help, buckets
+        self._series: Dict[Tuple, list] = {}  # key → [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            labels = dict(key)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{self.name}_bucket{_labels({**labels, 'le': '+Inf'})} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(labels)} {series[-1]}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "crm_http_request_duration_seconds", "HTTP request latency by route"
+)
+SPAN_SECONDS = Histogram(
+    "crm_span_duration_seconds", "Latency of chains, tools, retrievers, LLM calls and blob scans"
+)
+LLM_TOKENS = Counter("crm_llm_tokens_total", "LLM tokens by model and type")
+CACHE_REQUESTS = Counter("crm_cache_requests_total", "Response cache lookups by result")
+
+_gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+
+def register_gauge(name: str, help: str, fn: Callable[[], float]) -> None:
+    """scrape 시점에 fn() 값을 읽는 gauge."""
+    _gauges[name] = (help, fn)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for name, (help, fn) in sorted(_gauges.items()):
+        try:
+            value = float(fn())
+        except Exception:
+            continue
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+# ── Span ──────────────────────────────────────────────────────────────────────
+# OTLP span kind: 1=INTERNAL, 2=SERVER, 3=CLIENT
+_OTLP_KIND = {"server": 2, "llm": 3, "retriever": 3, "blob": 3, "http": 3}
+
+
+class Span:
+    __slots__ = (
+        "name", "kind", "trace_id", "span_id", "parent_id",
+        "start_ns", "end_ns", "attributes", "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        kind: str = "internal",
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+    ):
+        self.name, self.kind = name, kind
+        self.trace_id = parent.trace_id if parent else (trace_id or secrets.token_hex(16))
+        self.parent_id = parent.span_id if parent else parent_id
+        self.span_id = secrets.token_hex(8)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = str(error) or type(error).__name__
+        if self.kind != "server":  # server span 은 미들웨어가 route 라벨로 기록
+            SPAN_SECONDS.observe(self.duration, kind=self.kind, name=self.name)
+        _exporter.export([self])
+
+    def to_otlp(self) -> dict:
+        def value(v):
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        attrs = {"crm.kind": self.kind, **self.attributes}
+        out = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _OTLP_KIND.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": k, "value": value(v)} for k, v in attrs.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            out["parentSpanId"] = self.parent_id
+        return out
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("telemetry_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def annotate(**attributes) -> None:
+    """현재 span 에 attribute 추가 (span 밖이면 무시)."""
+    span_ = _current.get()
+    if span_ is not None:
+        span_.set(**attributes)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes) -> Iterator[Span]:
+    """현재 span 의 자식 span. async 함수 안에서도 `with` 로 사용 (generator 안에서는 X)."""
+    s = Span(name, kind, _current.get(), attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.end(e)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def record_cache(namespace: str, result: str) -> None:
+    """result: hit | semantic_hit | miss | bypass."""
+    CACHE_REQUESTS.inc(namespace=namespace, result=result)
+    annotate(**{f"cache.{namespace}": result})
+
+
+# ── Exporters ─────────────────────────────────────────────────────────────────
+class NoopExporter:
+    def export(self, spans: List[Span]) -> None:
+        pass
+
+    async def flush(self) -> None:
+        pass
+
+
+class InMemoryExporter(NoopExporter):
+    """테스트용: 끝난 span 을 메모리에 보관."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+    def by_kind(self, kind: str) -> List[Span]:
+        return [s for s in self.spans if s.kind == kind]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class ConsoleExporter(NoopExporter):
+    def export(self, spans: List[Span]) -> None:
+        for s in spans:
+            print(json.dumps(s.to_otlp(), ensure_ascii=False))
+
+
+class OtlpHttpExporter(NoopExporter):
+    """OTLP/HTTP JSON (`{endpoint}/v1/traces`) 로 주기적으로 전송."""
+
+    def __init__(self, endpoint: str = OTEL_EXPORTER_OTLP_ENDPOINT):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self._buffer: List[Span] = []
+        self.dropped = 0
+
+    def export(self, spans: List[Span]) -> None:
+        self._buffer.extend(spans)
+        overflow = len(self._buffer) - TELEMETRY_MAX_BUFFER
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped += overflow
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        from app.services.clients import registry
+
+        batch, self._buffer = self._buffer, []
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": OTEL_SERVICE_NAME}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "app.services.telemetry"}, "spans": [s.to_otlp() for s in batch]}
+                    ],
+                }
+            ]
+        }
+        try:
+            await registry.ahttp.post(self.url, json=body, timeout=5)
+        except Exception as e:
+            self.dropped += len(batch)
+            print("⚠️ trace export failed:", e)
+
+
+def _build_exporter(name: str):
+    return {
+        "memory": InMemoryExporter,
+        "console": ConsoleExporter,
+        "otlp": OtlpHttpExporter,
+    }.get(name, NoopExporter)()
+
+
+_exporter = _build_exporter(TELEMETRY_EXPORTER)
+_flush_task: Optional[asyncio.Task] = None
+
+
+def get_exporter():
+    return _exporter
+
+
+def set_exporter(exporter) -> None:
+    """exporter 교체 (테스트에서 InMemoryExporter 주입)."""
+    global _exporter
+    _exporter = exporter
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(TELEMETRY_FLUSH_INTERVAL)
+        await _exporter.flush()
+
+
+def start_export() -> None:
+    global _flush_task
+    if isinstance(_exporter, OtlpHttpExporter) and _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_loop())
+
+
+async def stop_export() -> None:
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        await asyncio.gather(_flush_task, return_exceptions=True)
+        _flush_task = None
+    await _exporter.flush()
+
+
+# ── FastAPI (ASGI) middleware ─────────────────────────────────────────────────
+def _parse_traceparent(headers) -> Tuple[Optional[str], Optional[str]]:
+    for key, value in headers:
+        if key == b"traceparent":
+            parts = value.decode("latin-1").split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                return parts[1], parts[2]
+    return None, None
+
+
+class TelemetryMiddleware:
+    """순수 ASGI 미들웨어 — StreamingResponse 도 마지막 chunk 까지 포함해 측정."""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _route(scope) -> str:
+        """매칭된 route 의 전체 경로 템플릿 (/api/jobs/{job_id}). 라벨 카디널리티 고정용.
+
+        include_router 로 붙은 route 는 prefix 없는 path 만 갖고 있을 수 있어서,
+        실제 path 에서 route 부분을 떼어낸 나머지를 prefix 로 붙인다.
+        """
+        route = scope.get("route")
+        template = getattr(route, "path", None)
+        if template is None:
+            return "unmatched"
+        try:
+            rendered = route.path_format.format(**scope.get("path_params", {}))
+        except Exception:
+            return template
+        path = scope["path"]
+        if rendered and path.endswith(rendered):
+            return path[: len(path) - len(rendered)] + template
+        return path if not rendered else template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        trace_id, parent_id = _parse_traceparent(scope.get("headers") or [])
+        s = Span(f"{method} {scope['path']}", "server", trace_id=trace_id, parent_id=parent_id)
+        s.set(**{"http.method": method, "http.target": scope["path"]})
+        status = 500
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current.set(s)
+        error = None
+        try:
+            await self.app(scope, receive, _send)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            route = self._route(scope)
+            s.name = f"{method} {route}"
+            s.set(**{"http.route": route, "http.status_code": status})
+            s.end(error)
+            REQUEST_SECONDS.observe(s.duration, method=method, route=route, status=str(status))
+
+
+# ── LangChain callback ────────────────────────────────────────────────────────
+class TracingCallbackHandler(BaseCallbackHandler):
+    """run_id ↔ span 매핑. 최상위 run 은 현재 요청 span 의 자식이 된다."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._spans: Dict[UUID, Span] = {}
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: str, **attrs):
+        parent = self._spans.get(parent_run_id) if parent_run_id else None
+        self._spans[run_id] = Span(name, kind, parent or _current.get(), attrs)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attrs):
+        s = self._spans.pop(run_id, None)
+        if s is not None:
+            s.set(**attrs)
+            s.end(error)
+
+    @staticmethod
+    def _name(serialized: Optional[dict], kwargs: dict, default: str) -> str:
+        return kwargs.get("name") or (serialized or {}).get("name") or default
+
+    # chain
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chain"), "chain")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # tool
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "tool"), "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # retriever
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "retriever"), "retriever")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents or []))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # llm
+    def _llm_start(self, serialized, run_id, parent_run_id, kwargs):
+        meta = kwargs.get("metadata") or {}
+        model = meta.get("ls_model_name") or self._name(serialized, kwargs, "llm")
+        self._start(run_id, parent_run_id, model, "llm", model=model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._llm_start(serialized, run_id, parent_run_id, kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._llm_start(serialized, run_id, parent_run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        from app.services.prompts import usage_from_result
+
+        s = self._spans.get(run_id)
+        prompt, completion, cached = usage_from_result(response)
+        model = s.attributes.get("model", "llm") if s else "llm"
+        for kind, n in (("prompt", prompt), ("completion", completion), ("cached", cached)):
+            if n:
+                LLM_TOKENS.inc(n, model=model, type=kind)
+        self._end(
+            run_id,
+            **{
+                "llm.prompt_tokens": prompt,
+                "llm.completion_tokens": completion,
+                "llm.cached_tokens": cached,
+            },
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+tracer = TracingCallbackHandler()
+
+
+def traced(config: Optional[dict] = None) -> dict:
+    """runnable config 에 tracing callback 추가."""
+    config = dict(config or {})
+    callbacks = config.get("callbacks")
+    if callbacks is None:
+        config["callbacks"] = [tracer]
+    elif isinstance(callbacks, list) and tracer not in callbacks:
+        config["callbacks"] = [*callbacks, tracer]
+    return config
@@ -0,0 +1,312 @@
+# backend/app/services/web_cache.py
+"""web_search(Tavily) 결과 캐시 + 로컬 snippet 전문 검색 인덱스 (SQLite FTS5).
+
+조회 순서 (query 는 공백/대소문자/유니코드 정규화 후 key):
+1. 같은 query 결과가 WEB_FRESH_TTL 이내 → 그대로 (fresh)
+   WEB_STALE_TTL 이내 → 그대로 반환 + 백그라운드 재조회 (stale-while-revalidate)
+   "오늘/최신/속보/뉴스" 같은 실시간성 query 는 WEB_REALTIME_TTL / WEB_REALTIME_STALE_TTL 기준
+2. 이전에 받아 둔 snippet 중 WEB_LOCAL_MAX_AGE 이내 것에서 FTS5 검색 →
+   query 토큰을 WEB_LOCAL_MIN_COVERAGE 이상 포함한 snippet 이 WEB_LOCAL_MIN_RESULTS 개 이상이면 로컬 답
+3. 그 외에는 Tavily 호출 후 결과/스니펫 저장
+"""
+import os, json, time, asyncio, hashlib, sqlite3, threading
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.services.cache import normalize_text
+from app.services.rerank import tokenize
+from app.services.telemetry import Counter
+
+WEB_CACHE_ENABLED = os.getenv("WEB_CACHE_ENABLED", "1") == "1"
+WEB_CACHE_PATH = os.getenv("WEB_CACHE_PATH", ".cache/web_cache.sqlite3")
+WEB_FRESH_TTL = float(os.getenv("WEB_FRESH_TTL", "900"))
+WEB_STALE_TTL = float(os.getenv("WEB_STALE_TTL", "86400"))
+WEB_REALTIME_TTL = float(os.getenv("WEB_REALTIME_TTL", "120"))
+WEB_REALTIME_STALE_TTL = float(os.getenv("WEB_REALTIME_STALE_TTL", "300"))
+WEB_REALTIME_HINTS = tuple(
+    x.strip()
+    for x in os.getenv("WEB_REALTIME_HINTS", "오늘,지금,실시간,속보,최신,뉴스,today,latest,breaking,news").split(",")
+    if x.strip()
+)
+WEB_LOCAL_ENABLED = os.getenv("WEB_LOCAL_ENABLED", "1") == "1"
+WEB_LOCAL_MAX_AGE = float(os.getenv("WEB_LOCAL_MAX_AGE", "21600"))  # 로컬 답에 쓸 snippet 최대 나이
+WEB_LOCAL_MIN_RESULTS = int(os.getenv("WEB_LOCAL_MIN_RESULTS", "2"))
+WEB_LOCAL_MIN_COVERAGE = float(os.getenv("WEB_LOCAL_MIN_COVERAGE", "0.6"))
+WEB_SNIPPETS_MAX = int(os.getenv("WEB_SNIPPETS_MAX", "50000"))
+
+LOOKUPS = Counter("crm_web_search_total", "web_search lookups by outcome")
+
+Fetch = Callable[[], Awaitable[dict]]
+
+
+def query_key(query: str) -> str:
+    return hashlib.sha256(normalize_text(query).encode("utf-8")).hexdigest()
+
+
+def is_realtime(query: str) -> bool:
+    q = query.lower()
+    return any(h in q for h in WEB_REALTIME_HINTS)
+
+
+def _fts_query(tokens: List[str]) -> str:
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in tokens)
+
+
+class _Store:
+    """결과/스니펫 SQLite (sync; to_thread 로 호출). 워커 간 공유 가능 (WAL)."""
+
+    def __init__(self, path: str):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self.fts = True
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # preload 후 fork 된 워커는 부모 연결을 쓰지 않고 새로 연다
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            if self.path != ":memory:":
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS web_results (
+                    key TEXT PRIMARY KEY, query TEXT NOT NULL,
+                    results TEXT NOT NULL, fetched_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS web_snippets (
+                    id INTEGER PRIMARY KEY, url TEXT UNIQUE, title TEXT, content TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_web_snippets_fetched ON web_snippets(fetched_at);
+                """
+            )
+            try:
+                # 한글은 조사가 붙어도 맞도록 음절 bigram 으로 미리 토큰화해 넣는다
+                self._db.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS web_snippets_fts USING fts5(tokens)"
+                )
+            except sqlite3.OperationalError as e:
+                self.fts = False
+                print("⚠️ sqlite FTS5 unavailable, web_search local index disabled:", e)
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, fetched_at FROM web_results WHERE key = ?", (key,)
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else (None, 0.0)
+
+    def put(self, key: str, query: str, raw: dict) -> None:
+        now = time.time()
+        results = [r for r in raw.get("results", []) if isinstance(r, dict)]
+        with self._lock:
+            conn = self._conn
+            conn.execute(
+                "INSERT OR REPLACE INTO web_results VALUES (?, ?, ?, ?)",
+                (key, query, json.dumps(raw, ensure_ascii=False), now),
+            )
+            for r in results:
+                content = r.get("content") or ""
+                if not content:
+                    continue
+                row = conn.execute(
+                    "SELECT id FROM web_snippets WHERE url = ?", (r.get("url"),)
+                ).fetchone() if r.get("url") else None
+                if row:
+                    conn.execute(
+                        "UPDATE web_snippets SET title = ?, content = ?, fetched_at = ? WHERE id = ?",
+                        (r.get("title"), content, now, row[0]),
+                    )
+                    snippet_id = row[0]
+                    if self.fts:
+                        conn.execute("DELETE FROM web_snippets_fts WHERE rowid = ?", (snippet_id,))
+                else:
+                    snippet_id = conn.execute(
+                        "INSERT INTO web_snippets (url, title, content, fetched_at) VALUES (?, ?, ?, ?)",
+                        (r.get("url"), r.get("title"), content, now),
+                    ).lastrowid
+                if self.fts:
+                    tokens = " ".join(tokenize(f"{r.get('title') or ''} {content}"))
+                    conn.execute(
+                        "INSERT INTO web_snippets_fts (rowid, tokens) VALUES (?, ?)",
+                        (snippet_id, tokens),
+                    )
+            conn.commit()
+
+    def search(self, query: str, max_age: float, limit: int = 10) -> List[dict]:
+        """FTS5 bm25 순 snippet (+ query 토큰 coverage)."""
+        tokens = sorted(set(tokenize(query)))
+        if not tokens or not self.fts:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.url, s.title, s.content, s.fetched_at, f.tokens"
+                " FROM web_snippets_fts f JOIN web_snippets s ON s.id = f.rowid"
+                " WHERE web_snippets_fts MATCH ? AND s.fetched_at >= ?"
+                " ORDER BY bm25(web_snippets_fts) LIMIT ?",
+                (_fts_query(tokens), time.time() - max_age, limit),
+            ).fetchall()
+        out = []
+        for url, title, content, fetched_at, indexed in rows:
+            have = set(indexed.split())
+            out.append({
+                "url": url,
+                "title": title,
+                "content": content,
+                "fetched_at": fetched_at,
+                "coverage": sum(1 for t in tokens if t in have) / len(tokens),
+            })
+        return out
+
+    def prune(self, max_age: float, max_snippets: int) -> None:
+        """max_age 보다 오래된 결과/스니펫 삭제 + 스니펫은 최근 max_snippets 개만 남긴다."""
+        cutoff = time.time() - max_age
+        with self._lock:
+            conn = self._conn
+            conn.execute("DELETE FROM web_results WHERE fetched_at < ?", (cutoff,))
+            conn.execute("DELETE FROM web_snippets WHERE fetched_at < ?", (cutoff,))
+            conn.execute(
+                "DELETE FROM web_snippets WHERE id NOT IN ("
+                " SELECT id FROM web_snippets ORDER BY fetched_at DESC, id DESC LIMIT ?)",
+                (max_snippets,),
+            )
+            if self.fts:
+                conn.execute(
+                    "DELETE FROM web_snippets_fts WHERE rowid NOT IN (SELECT id FROM web_snippets)"
+                )
+            conn.commit()
+
+
+class WebSearchCache:
+    def __init__(self, path: str = WEB_CACHE_PATH):
+        self._path = path
+        self._store: Optional[_Store] = None
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.metrics = {
+            "fresh": 0, "stale": 0, "local": 0, "live": 0,
+            "refreshes": 0, "errors": 0, "live_ms_total": 0.0,
+        }
+
+    @property
+    def store(self) -> _Store:
+        if self._store is None:
+            self._store = _Store(self._path)
+        return self._store
+
+    def fresh_ttl(self, query: str) -> float:
+        return min(WEB_FRESH_TTL, WEB_REALTIME_TTL) if is_realtime(query) else WEB_FRESH_TTL
+
+    def stale_ttl(self, query: str) -> float:
+        return min(WEB_STALE_TTL, WEB_REALTIME_STALE_TTL) if is_realtime(query) else WEB_STALE_TTL
+
+    def _record(self, outcome: str) -> None:
+        self.metrics[outcome] += 1
+        LOOKUPS.inc(outcome=outcome)
+
+    async def _live(self, key: str, query: str, fetch: Fetch) -> dict:
+        started = time.perf_counter()
+        raw = await fetch()
+        self.metrics["live_ms_total"] += (time.perf_counter() - started) * 1000
+        try:
+            await asyncio.to_thread(self.store.put, key, query, raw if isinstance(raw, dict) else {})
+        except Exception as e:
+            self.metrics["errors"] += 1
+            print("⚠️ web cache write failed:", e)
+        return raw
+
+    def _revalidate(self, key: str, query: str, fetch: Fetch) -> None:
+        if key in self._refreshing:
+            return
+
+        async def run():
+            try:
+                await self._live(key, query, fetch)
+                self.metrics["refreshes"] += 1
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print("⚠️ web search revalidate failed:", e)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(run())
+
+    async def search(self, query: str, fetch: Fetch) -> dict:
+        """Tavily 형식 dict ({"results": [...]}). 로컬/캐시 응답은 "cache" 키로 출처 표시."""
+        if not WEB_CACHE_ENABLED:
+            return await fetch()
+        key = query_key(query)
+        try:
+            raw, fetched_at = await asyncio.to_thread(self.store.get, key)
+        except Exception as e:
+            self.metrics["errors"] += 1
+            print("⚠️ web cache read failed:", e)
+            raw, fetched_at = None, 0.0
+
+        age = time.time() - fetched_at
+        if raw is not None and age <= self.fresh_ttl(query):
+            self._record("fresh")
+            return {**raw, "cache": "fresh"}
+        if raw is not None and age <= self.stale_ttl(query):
+            self._record("stale")
+            self._revalidate(key, query, fetch)
+            return {**raw, "cache": "stale"}
+
+        if WEB_LOCAL_ENABLED and not is_realtime(query):
+            try:
+                hits = await asyncio.to_thread(self.store.search, query, WEB_LOCAL_MAX_AGE)
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print("⚠️ web local index search failed:", e)
+                hits = []
+            good = [h for h in hits if h["coverage"] >= WEB_LOCAL_MIN_COVERAGE]
+            if len(good) >= WEB_LOCAL_MIN_RESULTS:
+                self._record("local")
+                return {
+                    "query": query,
+                    "results": [
+                        {"title": h["title"], "url": h["url"], "content": h["content"]} for h in good[:5]
+                    ],
+                    "cache": "local",
+                }
+
+        self._record("live")
+        return await self._live(key, query, fetch)
+
+    async def start(self) -> None:
+        """오래된 결과/스니펫 정리 (시작 시 1회)."""
+        if not WEB_CACHE_ENABLED:
+            return
+        try:
+            await asyncio.to_thread(
+                self.store.prune, max(WEB_STALE_TTL, WEB_LOCAL_MAX_AGE), WEB_SNIPPETS_MAX
+            )
+        except Exception as e:
+            print("⚠️ web cache prune failed:", e)
+
+    async def stop(self) -> None:
+        """진행 중 백그라운드 재조회는 취소 (다음 요청이 다시 stale 로 재조회)."""
+        tasks = list(self._refreshing.values())
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        m = self.metrics
+        lookups = m["fresh"] + m["stale"] + m["local"] + m["live"]
+        fetches = m["live"] + m["refreshes"]
+        return {
+            **{k: v for k, v in m.items() if k != "live_ms_total"},
+            "hit_rate": round((lookups - m["live"]) / lookups, 4) if lookups else 0.0,
+            "avg_live_ms": round(m["live_ms_total"] / fetches, 2) if fetches else 0.0,
+            "refreshing": len(self._refreshing),
+            "fts": self._store.fts if self._store is not None else None,
+        }
+
+
+web_cache = WebSearchCache()
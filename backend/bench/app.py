@@ -0,0 +1,26 @@
+# backend/bench/app.py
+"""fake 백엔드를 설치한 ASGI app — 멀티 워커 서버를 `bench.run --url` 로 측정할 때.
+
+    BENCH_LLM_LATENCY=lognormal:0.8:0.35 uvicorn bench.app:app --workers 4
+"""
+import os
+
+from bench.fakes import install
+
+install(
+    {
+        k: v
+        for k, v in {
+            "llm": os.getenv("BENCH_LLM_LATENCY"),
+            "search": os.getenv("BENCH_SEARCH_LATENCY"),
+            "tavily": os.getenv("BENCH_TAVILY_LATENCY"),
+            "blob": os.getenv("BENCH_BLOB_LATENCY"),
+            "slack": os.getenv("BENCH_SLACK_LATENCY"),
+            "azure_faults": os.getenv("BENCH_AZURE_FAULTS"),
+            "azure_fallback": os.getenv("BENCH_AZURE_FALLBACK"),
+        }.items()
+        if v
+    }
+)
+
+from main import app  # noqa: E402  install() 이후 import 해야 fake 가 쓰인다
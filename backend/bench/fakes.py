@@ -0,0 +1,453 @@
+# backend/bench/fakes.py
+"""벤치마크용 결정적 fake 백엔드.
+
+Azure OpenAI / Azure AI Search / Tavily / Blob / Slack 을 지연 분포만 흉내 내는
+로컬 구현으로 바꾼다. azure_faults 를 주면 LLM 은 실제 gateway 를 거쳐
+429/5xx 를 주입하는 fake Azure 엔드포인트로 간다. 체인/라우터는 첫 호출 때 레지스트리에서
+클라이언트를 만들므로 install() 은 첫 요청 전에만 호출하면 된다 (app import 순서와 무관).
+"""
+import os, json, math, time, random, asyncio, hashlib, datetime as dt
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import httpx
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict
+
+
+class Latency:
+    """지연 분포 (초).
+
+    spec: "fixed:<s>" | "uniform:<lo>:<hi>" | "normal:<mean>:<sd>" | "lognormal:<median>:<sigma>"
+    """
+
+    def __init__(self, spec: str = "fixed:0", seed: int = 0):
+        kind, *params = spec.split(":")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params] or [0.0]
+        self._rng = random.Random(seed)
+
+    def sample(self) -> float:
+        p, rng = self.params, self._rng
+        if self.kind == "uniform":
+            value = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = rng.gauss(p[0], p[1])
+        elif self.kind == "lognormal":
+            value = p[0] * math.exp(rng.gauss(0.0, p[1]))
+        else:
+            value = p[0]
+        return max(0.0, value)
+
+    async def wait(self) -> None:
+        await asyncio.sleep(self.sample())
+
+    def __repr__(self) -> str:
+        return f"Latency({self.spec!r})"
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+
+
+# ── LLM ───────────────────────────────────────────────────────────────────────
+def _fake_content(text: str, key: str) -> str:
+    """프롬프트 종류(template/issue/요약)에 맞는 응답 본문."""
+    if '"rationale"' in text:
+        return json.dumps(
+            {"templates": [{"copy": f"혜택을 확인해보세요 #{key}-{i}", "rationale": "벤치마크"} for i in range(3)]},
+            ensure_ascii=False,
+        )
+    if '"severity"' in text:
+        return json.dumps(
+            {
+                "title": f"벤치마크 이슈 {key}",
+                "severity": "Medium",
+                "tasks": {r: [f"{r} task {i}" for i in range(3)] for r in ("Dev", "PM", "Design")},
+            },
+            ensure_ascii=False,
+        )
+    return f"• 인사이트 {key}\n• 개선안 A\n• 개선안 B"
+
+
+class FakeChatModel(BaseChatModel):
+    """프롬프트 종류(template/issue/요약/agent)에 맞는 형태의 응답을 돌려주는 fake.
+
+    bind_tools 된 경우 ToolMessage 가 없으면 첫 번째 tool 을 호출한다 (agent 1 turn + 최종 답변).
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    latency: Latency
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [convert_to_openai_tool(t)["function"]["name"] for t in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        text = "\n".join(str(m.content) for m in messages)
+        last_human = next(
+            (str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), ""
+        )
+        key = _digest(last_human)
+        if self.tool_names and not any(isinstance(m, ToolMessage) for m in messages):
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": self.tool_names[0], "args": {"query": last_human}, "id": f"call_{key}"}
+                ],
+            )
+        else:
+            message = AIMessage(content=_fake_content(text, key))
+        prompt_tokens = len(text) // 4
+        completion_tokens = max(1, len(str(message.content)) // 4)
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency.sample())
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await self.latency.wait()
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+
+class FakeAzureOpenAI:
+    """Azure OpenAI chat completions 엔드포인트 흉내 (httpx MockTransport 핸들러).
+
+    실제 AzureChatOpenAI + LLM gateway 경로를 그대로 태우면서 deployment 별로
+    429(+Retry-After)/5xx 를 주입한다. spec: "east=429:0.3,500:0.1;west=ok"
+    """
+
+    def __init__(self, latency: Latency, spec: str, retry_after: float = 1.0, seed: int = 0):
+        self.latency, self.retry_after = latency, retry_after
+        self.faults: Dict[str, Dict[int, float]] = {}
+        for part in spec.split(";"):
+            name, _, rules = part.partition("=")
+            self.faults[name.strip()] = {
+                int(code): float(p)
+                for code, _, p in (r.partition(":") for r in rules.split(","))
+                if code.strip().isdigit()
+            }
+        self._rng = random.Random(seed)
+        self.calls: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def deployments(self) -> List[str]:
+        return list(self.faults)
+
+    def _count(self, deployment: str, outcome: str) -> None:
+        counts = self.calls.setdefault(deployment, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        deployment = request.url.path.split("/deployments/", 1)[-1].split("/", 1)[0]
+        await self.latency.wait()
+        for status, p in self.faults.get(deployment, {}).items():
+            if self._rng.random() < p:
+                self._count(deployment, str(status))
+                headers = {"retry-after": str(self.retry_after)} if status == 429 else {}
+                return httpx.Response(
+                    status, json={"error": {"code": str(status), "message": "injected"}}, headers=headers
+                )
+        self._count(deployment, "200")
+
+        body = json.loads(request.content)
+        messages = body.get("messages", [])
+        text = "\n".join(str(m.get("content") or "") for m in messages)
+        last_human = next(
+            (str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), ""
+        )
+        key = _digest(last_human)
+        if body.get("tools") and not any(m.get("role") == "tool" for m in messages):
+            tool = body["tools"][0]["function"]["name"]
+            args = json.dumps({"query": last_human}, ensure_ascii=False)
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {"id": f"call_{key}", "type": "function", "function": {"name": tool, "arguments": args}}
+                ],
+            }
+            finish = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": _fake_content(text, key)}
+            finish = "stop"
+        prompt_tokens = len(text) // 4
+        completion_tokens = max(1, len(str(message["content"] or "")) // 4)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        base = {"id": f"chatcmpl-{key}", "created": int(time.time()), "model": deployment}
+        if not body.get("stream"):
+            return httpx.Response(200, json={
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+                "usage": usage,
+            })
+
+        delta = dict(message)
+        if delta.get("tool_calls"):
+            delta["tool_calls"] = [{"index": 0, **tc} for tc in delta["tool_calls"]]
+        chunks = [
+            {"choices": [{"index": 0, "delta": delta, "finish_reason": None}]},
+            {"choices": [{"index": 0, "delta": {}, "finish_reason": finish}]},
+        ]
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunks.append({"choices": [], "usage": usage})
+        sse = "".join(
+            f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', **c}, ensure_ascii=False)}\n\n"
+            for c in chunks
+        )
+        return httpx.Response(
+            200, content=(sse + "data: [DONE]\n\n").encode("utf-8"),
+            headers={"content-type": "text/event-stream"},
+        )
+
+
+# ── Search / Web ──────────────────────────────────────────────────────────────
+class FakeRetriever(BaseRetriever):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    latency: Latency
+    source: str = "search"
+    k: int = 4
+
+    def _docs(self, query: str) -> List[Document]:
+        key = _digest(query)
+        return [
+            Document(
+                page_content=f"[{self.source}] {query} 관련 UX 리서치 요약 {i}: "
+                "모바일 결제 단계 이탈이 높고 로딩 지연이 전환율을 낮춤.",
+                metadata={"id": f"{self.source}-{key}-{i}"},
+            )
+            for i in range(self.k)
+        ]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        time.sleep(self.latency.sample())
+        return self._docs(query)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        await self.latency.wait()
+        return self._docs(query)
+
+
+class FakeTavily:
+    """TavilySearch.ainvoke(query) → {"results": [...]} 흉내."""
+
+    def __init__(self, latency: Latency, k: int = 3):
+        self.latency, self.k = latency, k
+
+    async def ainvoke(self, query: Any, config: Optional[dict] = None, **kwargs) -> dict:
+        await self.latency.wait()
+        q = query if isinstance(query, str) else json.dumps(query, ensure_ascii=False)
+        return {
+            "results": [
+                {"title": f"web {i}", "content": f"{q} 관련 기사 {i}", "url": f"https://example.com/{_digest(q)}/{i}"}
+                for i in range(self.k)
+            ]
+        }
+
+
+# ── Blob ──────────────────────────────────────────────────────────────────────
+class _FakeDownload:
+    def __init__(self, data: bytes, chunk: int = 1024 * 1024):
+        self._data, self._chunk = data, chunk
+
+    async def chunks(self):
+        for i in range(0, len(self._data), self._chunk):
+            yield self._data[i : i + self._chunk]
+
+    async def readall(self) -> bytes:
+        return self._data
+
+
+class FakeBlobClient:
+    def __init__(self, container: "FakeContainerClient", name: str):
+        self._c, self.blob_name = container, name
+        self.url = f"https://fake.blob.core.windows.net/{container.name}/{name}"
+
+    def _put(self, data: bytes, metadata: Optional[dict]) -> dict:
+        now = dt.datetime.now(dt.timezone.utc)
+        data = data if self._c.keep_data else b""
+        self._c.blobs[self.blob_name] = {"data": data, "metadata": metadata or {}, "last_modified": now}
+        return {"last_modified": now}
+
+    async def upload_blob(self, data, overwrite=False, content_settings=None, metadata=None, **kw):
+        await self._c.latency.wait()
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return self._put(bytes(data), metadata)
+
+    async def stage_block(self, block_id: str, data: bytes, **kw) -> None:
+        await self._c.latency.wait()
+        self._c.staged[(self.blob_name, block_id)] = bytes(data)
+
+    async def commit_block_list(self, block_list, content_settings=None, metadata=None, **kw):
+        await self._c.latency.wait()
+        data = b"".join(self._c.staged.pop((self.blob_name, b)) for b in block_list)
+        return self._put(data, metadata)
+
+    async def get_blob_properties(self, **kw):
+        await self._c.latency.wait()
+        blob = self._c.blobs[self.blob_name]
+        return SimpleNamespace(
+            name=self.blob_name, metadata=blob["metadata"], last_modified=blob["last_modified"]
+        )
+
+    async def download_blob(self, **kw) -> _FakeDownload:
+        await self._c.latency.wait()
+        return _FakeDownload(self._c.blobs[self.blob_name]["data"])
+
+
+class FakeContainerClient:
+    """in-memory async ContainerClient (BlobService / ingest 가 쓰는 메서드만)."""
+
+    def __init__(self, latency: Latency, name: str = "uploads", keep_data: bool = True):
+        self.latency, self.name = latency, name
+        self.keep_data = keep_data  # False 면 본문은 버리고 metadata 만 (업로드 벤치 RSS 왜곡 방지)
+        self.blobs: Dict[str, dict] = {}
+        self.staged: Dict[tuple, bytes] = {}
+
+    async def create_container(self, **kw) -> None:
+        return None
+
+    def get_blob_client(self, blob: str) -> FakeBlobClient:
+        return FakeBlobClient(self, blob)
+
+    async def upload_blob(self, name: str, data, **kw) -> dict:
+        return await self.get_blob_client(name).upload_blob(data, **kw)
+
+    async def list_blobs(self, name_starts_with: Optional[str] = None, include=None, **kw):
+        await self.latency.wait()
+        for name, blob in list(self.blobs.items()):
+            if not name_starts_with or name.startswith(name_starts_with):
+                yield SimpleNamespace(
+                    name=name, last_modified=blob["last_modified"], metadata=blob["metadata"]
+                )
+
+    async def close(self) -> None:
+        pass
+
+
+# ── Slack ─────────────────────────────────────────────────────────────────────
+class FakeSlack:
+    """httpx MockTransport 로 webhook 응답. rate_limit 비율만큼 429 + Retry-After."""
+
+    def __init__(self, latency: Latency, rate_limit: float = 0.0, seed: int = 0):
+        self.latency, self.rate_limit = latency, rate_limit
+        self._rng = random.Random(seed)
+        self.received = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await self.latency.wait()
+        if self._rng.random() < self.rate_limit:
+            return httpx.Response(429, headers={"Retry-After": "1"})
+        self.received += 1
+        return httpx.Response(200, text="ok")
+
+
+# ── 설치 ──────────────────────────────────────────────────────────────────────
+DEFAULT_PROFILE = {
+    "llm": "lognormal:0.8:0.35",
+    "search": "lognormal:0.08:0.3",
+    "tavily": "lognormal:0.6:0.4",
+    "blob": "lognormal:0.02:0.3",
+    "slack": "lognormal:0.15:0.3",
+    "slack_rate_limit": 0.0,
+    # 설정 시 FakeChatModel 대신 실제 gateway + fake Azure 엔드포인트 (예: "east=429:0.3;west=ok")
+    "azure_faults": None,
+    "azure_fallback": None,  # fallback deployment 이름 (예: "mini")
+}
+
+# app 설정 중 실제 Azure 를 가리키는 값 → 벤치마크에서는 더미
+FAKE_ENV = {
+    "AZURE_OPENAI_ENDPOINT": "https://fake.openai.azure.com",
+    "AZURE_OPENAI_KEY": "fake",
+    "AZURE_OPENAI_API_VERSION": "2024-10-21",
+    "AZURE_OPENAI_DEPLOYMENT": "fake",
+    "AZURE_STORAGE_CONN_STR": "DefaultEndpointsProtocol=https;AccountName=fake;AccountKey=ZmFrZQ==;EndpointSuffix=core.windows.net",
+    "AZURE_STORAGE_ACCOUNT": "fake",
+    "TAVILY_API_KEY": "fake",
+    "SLACK_WEBHOOK_URL": "https://hooks.slack.invalid/bench",
+    "VOC_AUTO_INGEST": "0",
+    "TELEMETRY_EXPORTER": "none",
+}
+
+
+def install(profile: Optional[dict] = None, seed: int = 0) -> dict:
+    """fake 클라이언트를 레지스트리에 등록. 반환: 사용한 fake 객체들 (검증/통계용)."""
+    profile = {**DEFAULT_PROFILE, **(profile or {})}
+    for key, value in FAKE_ENV.items():
+        os.environ.setdefault(key, value)
+
+    from app.services.clients import registry
+
+    slack = FakeSlack(Latency(profile["slack"], seed), profile["slack_rate_limit"], seed)
+    # 업로드 후 색인을 돌릴 때만 본문을 보관 (ingest 가 다시 내려받음)
+    container = FakeContainerClient(
+        Latency(profile["blob"], seed), keep_data=os.environ["VOC_AUTO_INGEST"] == "1"
+    )
+    azure = None
+    if profile["azure_faults"]:
+        # 실제 AzureChatOpenAI → 공유 ahttp 풀 → fake 엔드포인트 (gateway 재시도/breaker 검증용)
+        azure = FakeAzureOpenAI(Latency(profile["llm"], seed), profile["azure_faults"], seed=seed)
+        if profile["azure_fallback"]:
+            azure.faults.setdefault(profile["azure_fallback"], {})
+            os.environ["AZURE_OPENAI_FALLBACK_DEPLOYMENTS"] = profile["azure_fallback"]
+        os.environ["AZURE_OPENAI_DEPLOYMENTS"] = ",".join(
+            d for d in azure.deployments if d != profile["azure_fallback"]
+        )
+    else:
+        registry.override(
+            "chat_llm",
+            lambda temperature, max_tokens, callbacks=None, **kw: FakeChatModel(
+                latency=Latency(profile["llm"], seed), callbacks=callbacks
+            ),
+        )
+    registry.override(
+        "search_retriever",
+        lambda name, top_k=4, **kw: FakeRetriever(
+            latency=Latency(profile["search"], seed), source=name, k=top_k
+        ),
+    )
+    registry.override("tavily", lambda k, depth: FakeTavily(Latency(profile["tavily"], seed), k))
+    registry.override("blob_container", lambda: container)
+    registry.override("embeddings", lambda: DeterministicFakeEmbedding(size=256))
+
+    async def route(request: httpx.Request) -> httpx.Response:
+        if azure is not None and "/openai/deployments/" in request.url.path:
+            return await azure.handle(request)
+        return await slack.handle(request)
+
+    registry.override("ahttp", lambda: httpx.AsyncClient(transport=httpx.MockTransport(route)))
+    return {"slack": slack, "azure": azure, "container": container, "profile": profile}
@@ -0,0 +1,129 @@
+# backend/bench/relevance.py
+"""pdf_search 오프라인 relevance 벤치마크 — recall@k vs context 크기.
+
+    python -m bench.relevance                       # 기본 fixture, 20 trials
+    python -m bench.relevance --cutoffs 0.3,0.45,0.6 --noise 0.35 --out relevance.json
+
+fixture(bench/fixtures/relevance_corpus.json)의 chunk 에 대해 dense retriever 를 흉내 낸다:
+정답 chunk 1.0, 같은 주제 0.65, 목차/머리말/일반론 0.75, 나머지 0.3 + gaussian noise
+(소스별·trial 별 seed). 같은 후보로
+- baseline: pdf 상위 4 + search 상위 5 → RRF → 토큰 예산 (기존 동작)
+- rerank:   소스별 RETRIEVAL_CANDIDATES → RRF → BM25 재정렬 + 적응형 개수 + MMR → 토큰 예산
+을 비교한다. 중복 chunk(duplicate_of)는 원본과 같은 문서로 채점.
+"""
+import os, sys, json, random, argparse, statistics
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from app.services.prompts import CONTEXT_TOKEN_BUDGET, count_tokens
+from app.services.rerank import rerank, similarity, tokenize, RERANK_DUP_THRESHOLD
+from app.services.retrieval import apply_budget, rrf_fuse
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "relevance_corpus.json")
+_BASE = {"relevant": 1.0, "topic": 0.65, "boilerplate": 0.75, "other": 0.3}
+
+
+def _retrieve(query: dict, chunks: List[dict], source: str, depth: int, noise: float, seed: int):
+    rng = random.Random(f"{seed}:{source}:{query['question']}")
+    relevant = set(query["relevant"])
+    scored = []
+    for c in chunks:
+        cid = c.get("duplicate_of") or c["id"]
+        if cid in relevant:
+            base = _BASE["relevant"]
+        elif c["topic"] == query["topic"]:
+            base = _BASE["topic"]
+        elif c["topic"] in ("boilerplate", "generic"):
+            base = _BASE["boilerplate"]
+        else:
+            base = _BASE["other"]
+        scored.append((base + rng.gauss(0, noise), c))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [
+        Document(page_content=c["text"], metadata={"id": c["id"], "doc": c.get("duplicate_of") or c["id"]})
+        for _, c in scored[:depth]
+    ]
+
+
+def _score(docs: List[Document], relevant: set) -> dict:
+    ids = [d.metadata["doc"] for d in docs]
+    recall = {
+        f"recall@{k}": len(relevant & set(ids[:k])) / len(relevant) for k in (1, 3, 5)
+    }
+    rr = next((1 / (i + 1) for i, x in enumerate(ids) if x in relevant), 0.0)
+    token_sets = [set(tokenize(d.page_content)) for d in docs]
+    dups = sum(
+        1
+        for i in range(len(docs))
+        if any(similarity(token_sets[i], token_sets[j]) >= RERANK_DUP_THRESHOLD for j in range(i))
+    )
+    return {
+        **recall,
+        "context_recall": len(relevant & set(ids)) / len(relevant),
+        "mrr": rr,
+        "chunks": len(docs),
+        "tokens": sum(count_tokens(d.page_content) for d in docs),
+        "duplicates": dups,
+    }
+
+
+def evaluate(
+    data: dict,
+    trials: int,
+    noise: float,
+    candidates: int,
+    cutoff: Optional[float],
+    budget: int = CONTEXT_TOKEN_BUDGET,
+) -> dict:
+    """cutoff=None 이면 baseline (pdf 4 + search 5, 재정렬 없음)."""
+    rows = []
+    for seed in range(trials):
+        for q in data["queries"]:
+            depth = {"pdf": 4, "search": 5} if cutoff is None else {"pdf": candidates, "search": candidates}
+            ranked = {
+                s: _retrieve(q, data["chunks"], s, depth[s], noise, seed) for s in ("pdf", "search")
+            }
+            docs = rrf_fuse(ranked)
+            if cutoff is not None:
+                docs = rerank(q["question"], docs, cutoff=cutoff)
+            rows.append(_score(apply_budget(docs, budget), set(q["relevant"])))
+    return {k: round(statistics.mean(r[k] for r in rows), 4) for k in rows[0]}
+
+
+def _print(name: str, m: dict) -> None:
+    print(
+        f"{name:<16} r@1={m['recall@1']:.3f}  r@3={m['recall@3']:.3f}  r@5={m['recall@5']:.3f}  "
+        f"ctx_recall={m['context_recall']:.3f}  mrr={m['mrr']:.3f}  "
+        f"chunks={m['chunks']:.2f}  tokens={m['tokens']:.0f}  dups={m['duplicates']:.2f}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="pdf_search relevance benchmark (offline)")
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--trials", type=int, default=20, help="noise seeds per query")
+    parser.add_argument("--noise", type=float, default=0.3, help="simulated retriever score noise (sd)")
+    parser.add_argument("--candidates", type=int, default=20, help="per-source depth before rerank")
+    parser.add_argument("--cutoffs", default="0.3,0.45,0.6", help="RERANK_RELATIVE_CUTOFF values")
+    parser.add_argument("--out", help="write results JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.fixture) as f:
+        data = json.load(f)
+    print(f"📚 {len(data['chunks'])} chunks, {len(data['queries'])} queries, {args.trials} trials, noise={args.noise}")
+
+    results: Dict[str, dict] = {"baseline": evaluate(data, args.trials, args.noise, args.candidates, None)}
+    for cutoff in (float(x) for x in args.cutoffs.split(",") if x):
+        results[f"rerank@{cutoff:g}"] = evaluate(data, args.trials, args.noise, args.candidates, cutoff)
+    for name, m in results.items():
+        _print(name, m)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"📝 results → {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
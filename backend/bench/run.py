@@ -0,0 +1,258 @@
+# backend/bench/run.py
+"""오프라인 부하 테스트.
+
+    # in-process (fake 백엔드, Azure 토큰 소모 없음)
+    python -m bench.run --scenarios templates,research,issues,voc --concurrency 1,8,32 \
+        --requests 200 --out bench-results.json
+
+    # 이미 떠 있는 서버 (예: `uvicorn bench.app:app --workers 4`) 대상
+    python -m bench.run --url http://127.0.0.1:8000 --pid 12345
+
+    # LLM gateway 장애 주입: 실제 AzureChatOpenAI 경로로 deployment 별 429/5xx
+    python -m bench.run --scenarios research --azure-faults "east=429:0.3;west=500:0.1" --azure-fallback mini
+
+    # 회귀 비교: p95 가 threshold 이상 늘거나 RPS 가 threshold 이상 줄면 exit 1
+    python -m bench.run --compare baseline.json bench-results.json --threshold 0.10
+"""
+import os, sys, json, time, asyncio, argparse, platform, contextlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+SCENARIOS = ("templates", "research", "issues", "voc")
+
+
+# ── 요청 생성 ──────────────────────────────────────────────────────────────────
+def _request(scenario: str, i: int, voc_size: int) -> Tuple[str, str, dict]:
+    """(method, path, httpx kwargs). i 로 입력을 바꿔 응답 캐시 hit 를 피한다."""
+    if scenario == "templates":
+        return "POST", "/api/templates", {
+            "json": {
+                "business_desc": "온라인 패션 커머스",
+                "funnel_stage": "재구매",
+                "tone": "친근한",
+                "insight": f"장바구니 이탈 고객 세그먼트 #{i}",
+            }
+        }
+    if scenario == "research":
+        return "POST", "/api/research", {"json": {"question": f"결제 단계 이탈 원인은? ({i})"}}
+    if scenario == "issues":
+        return "POST", "/api/issues", {"json": {"question": f"온보딩 튜토리얼 이탈 증가 #{i}"}}
+    if scenario == "voc":
+        body = (f"VOC {i}: 결제 오류가 자주 발생합니다.\n" * (voc_size // 40 + 1))[:voc_size]
+        return "POST", "/api/voc", {
+            "files": {"file": (f"bench_{i}_voc.txt", body.encode("utf-8"), "text/plain")}
+        }
+    raise ValueError(f"unknown scenario: {scenario}")
+
+
+# ── 측정 ──────────────────────────────────────────────────────────────────────
+def percentile(values: List[float], q: float) -> float:
+    """nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(q / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def rss_mb(pid: Optional[int] = None) -> float:
+    """프로세스 RSS (MB). Linux /proc, 없으면 getrusage 최대치."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid is None:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    return 0.0
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    scenario: str,
+    concurrency: int,
+    requests: int,
+    voc_size: int,
+    offset: int,
+    rss: Callable[[], float],
+) -> dict:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = iter(range(offset, offset + requests))
+
+    async def worker():
+        for i in counter:
+            method, path, kwargs = _request(scenario, i, voc_size)
+            started = time.perf_counter()
+            try:
+                resp = await client.request(method, path, **kwargs)
+                code = str(resp.status_code)
+            except Exception as e:
+                code = type(e).__name__
+            elapsed = time.perf_counter() - started
+            statuses[code] = statuses.get(code, 0) + 1
+            if code.startswith("2"):
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    ok = len(latencies)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": ok,
+        "errors": requests - ok,
+        "statuses": statuses,
+        "rps": round(ok / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(sum(latencies) / ok * 1000, 1) if ok else 0.0,
+        "rss_mb": rss(),
+    }
+
+
+@contextlib.asynccontextmanager
+async def _client(args):
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as c:
+            yield c, (lambda: sum(rss_mb(p) for p in args.pid) if args.pid else 0.0)
+        return
+
+    # in-process: fake 설치 → app import → lifespan 안에서 ASGI 로 직접 호출
+    from bench.fakes import install
+
+    profile = {k: v for k, v in (("llm", args.llm), ("search", args.search), ("tavily", args.tavily), ("blob", args.blob), ("slack", args.slack)) if v}
+    profile.update(azure_faults=args.azure_faults, azure_fallback=args.azure_fallback)
+    install(profile, seed=args.seed)
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as c:
+            yield c, rss_mb
+
+
+async def run(args) -> dict:
+    levels = [int(c) for c in args.concurrency.split(",")]
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    results = []
+    async with _client(args) as (client, rss):
+        offset = 0
+        for scenario in scenarios:
+            # warm-up (import 지연, 커넥션 풀 등은 측정에서 제외)
+            await run_level(client, scenario, 1, args.warmup, args.voc_size, offset, rss)
+            offset += args.warmup
+            for level in levels:
+                result = await run_level(
+                    client, scenario, level, args.requests, args.voc_size, offset, rss
+                )
+                offset += args.requests
+                results.append(result)
+                _print_row(result)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.url or "in-process",
+            "profile": None if args.url else {
+                "llm": args.llm, "search": args.search, "tavily": args.tavily,
+                "blob": args.blob, "slack": args.slack,
+                "azure_faults": args.azure_faults, "azure_fallback": args.azure_fallback,
+            },
+            "gateway": None if args.url or not args.azure_faults else _gateway_stats(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def _gateway_stats() -> dict:
+    from app.services import llm_gateway
+
+    stats = llm_gateway.stats()
+    for name, d in stats["deployments"].items():
+        print(f"gateway {name:<10} state={d['state']:<9} ok={d['ok']:<5} throttled={d['throttled']:<5} error={d['error']:<5} opened={d['opened']}")
+    return stats
+
+
+def _print_row(r: dict) -> None:
+    print(
+        f"{r['scenario']:<10} c={r['concurrency']:<4} ok={r['ok']:<5} err={r['errors']:<4} "
+        f"rps={r['rps']:<8} p50={r['p50_ms']:<8} p95={r['p95_ms']:<8} p99={r['p99_ms']:<8} "
+        f"rss={r['rss_mb']}MB"
+    )
+
+
+# ── 회귀 비교 ──────────────────────────────────────────────────────────────────
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """회귀가 없으면 True."""
+    base = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    ok = True
+    print(f"{'scenario':<10} {'c':<4} {'p95 base→cur':<24} {'rps base→cur':<24} verdict")
+    for r in current["results"]:
+        b = base.get((r["scenario"], r["concurrency"]))
+        if b is None:
+            continue
+        p95_delta = (r["p95_ms"] - b["p95_ms"]) / b["p95_ms"] if b["p95_ms"] else 0.0
+        rps_delta = (r["rps"] - b["rps"]) / b["rps"] if b["rps"] else 0.0
+        regressed = p95_delta > threshold or rps_delta < -threshold
+        ok &= not regressed
+        print(
+            f"{r['scenario']:<10} {r['concurrency']:<4} "
+            f"{b['p95_ms']:>8}→{r['p95_ms']:<8}({p95_delta:+.0%})  "
+            f"{b['rps']:>8}→{r['rps']:<8}({rps_delta:+.0%})  "
+            f"{'REGRESSION' if regressed else 'ok'}"
+        )
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CRM backend offline benchmark")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=100, help="requests per level")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--voc-size", type=int, default=256 * 1024, help="bytes per VOC upload")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--url", help="benchmark a running server instead of in-process")
+    parser.add_argument("--pid", type=int, action="append", default=[], help="worker pid(s) for RSS (with --url)")
+    parser.add_argument("--cache", choices=("on", "off"), default="off", help="LLM response cache (in-process)")
+    parser.add_argument("--seed", type=int, default=0)
+    for name in ("llm", "search", "tavily", "blob", "slack"):
+        parser.add_argument(f"--{name}", help=f"{name} latency, e.g. lognormal:0.8:0.35 | fixed:0.1")
+    parser.add_argument("--azure-faults", help="route LLM calls through the gateway to fake Azure deployments, e.g. 'east=429:0.3,500:0.05;west=ok'")
+    parser.add_argument("--azure-fallback", help="fake fallback deployment name (used by pdf_search summarization)")
+    parser.add_argument("--out", help="write results JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        return 0 if compare(baseline, current, args.threshold) else 1
+
+    if not args.url and args.cache == "off":
+        os.environ.setdefault("LLM_CACHE_BACKEND", "off")
+        os.environ.setdefault("WEB_CACHE_ENABLED", "0")  # web_search 도 매번 (fake) Tavily 호출
+    report = asyncio.run(run(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📝 results → {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# backend/gunicorn.conf.py
+"""운영 서버 프로필: gunicorn -c gunicorn.conf.py main:app
+
+- 워커 수: WEB_CONCURRENCY 가 없으면 (cgroup 기준) CPU × WORKERS_PER_CORE,
+  메모리(WORKER_MEMORY_MB 당 1개)와 MAX_WORKERS 로 상한
+- PRELOAD_APP=1 (기본): master 에서 앱 + 무거운 LangChain/Azure 모듈을 import 한 뒤
+  gc.freeze() 하고 fork → 프롬프트/템플릿 객체와 모듈 코드는 copy-on-write 로 공유.
+  LLM·HTTP 클라이언트는 워커 lifespan(warm-up)에서 워커별로 만든다
+- 워커가 2개 이상이면 응답 캐시/job 저장소를 워커 간 공유 SQLite 로 (직접 지정한 값이 우선)
+- SIGTERM: app.server.DrainingUvicornWorker 가 진행 중 요청/스트림/LLM 호출을 마무리 후 종료
+"""
+import os, gc, math
+
+_DEFAULT_SHM = "/dev/shm" if os.access("/dev/shm", os.W_OK) else ".cache"
+
+
+def _cpu_count() -> int:
+    """cgroup v2 CPU quota → affinity → os.cpu_count 순."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _memory_mb() -> int:
+    """cgroup v2 memory.max → /proc/meminfo MemTotal. 알 수 없으면 0."""
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            value = f.read().strip()
+        if value != "max":
+            return int(value) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def auto_workers() -> int:
+    # async 워커 하나가 많은 동시 요청(LLM 대기)을 처리하므로 sync 용 2n+1 대신 코어당 1개가 기본
+    n = _cpu_count() * float(os.getenv("WORKERS_PER_CORE", "1"))
+    memory = _memory_mb()
+    if memory:
+        n = min(n, memory // int(os.getenv("WORKER_MEMORY_MB", "512")))
+    return int(max(1, min(n, int(os.getenv("MAX_WORKERS", "8")))))
+
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY") or auto_workers())
+worker_class = "app.server.DrainingUvicornWorker"
+preload_app = os.getenv("PRELOAD_APP", "1") == "1"
+
+# 가장 긴 요청(RESEARCH_TIMEOUT 90s 스트림)이 끝날 시간 + lifespan 종료 여유(SHUTDOWN_RESERVE)
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "120"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))  # heartbeat 없는 워커 재시작
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+# 장시간 운영 시 메모리 누적 방지 (0 = 끄기). 재시작도 drain 을 거친다
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0")) or max_requests // 10
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+
+# 워커 간 공유 상태 (import 전에 env 로 넘겨야 모듈 설정에 반영된다)
+os.environ.setdefault("DRAIN_TIMEOUT", str(int(os.getenv("SHUTDOWN_RESERVE", "20")) // 2))
+if workers > 1:
+    os.environ.setdefault("LLM_CACHE_BACKEND", "sqlite")
+    os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_DEFAULT_SHM, "crm", "llm_cache.sqlite3"))
+    os.environ.setdefault("JOB_STORE_PATH", ".cache/jobs.sqlite3")  # GET /api/jobs/{id} 를 어느 워커가 받아도 조회
+
+
+def when_ready(server):
+    if preload_app:
+        from app.services import health
+
+        for failure in health.preload():
+            server.log.warning("preload import failed (%s)", failure)
+        # 이후 생성 객체만 GC 대상 → 워커의 GC 가 공유 페이지를 건드려 복사되지 않게
+        gc.collect()
+        gc.freeze()
+    llm = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    server.log.info(
+        "workers=%d (cpu=%d, memory=%dMB) preload=%s cache=%s — LLM concurrency %d/worker, %d total",
+        workers, _cpu_count(), _memory_mb(), preload_app,
+        os.getenv("LLM_CACHE_BACKEND", "memory"), llm, llm * workers,
+    )
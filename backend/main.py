@@ -1,8 +1,75 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import templates, research, issue, voc
+from app.api import templates, research, issue, voc, jobs as jobs_api
+from app.services import (
+    cache,
+    db,
+    feedback,
+    health,
+    lifecycle,
+    llm_gateway,
+    llm_limits,
+    prompts,
+    rerank,
+    retrieval,
+    singleflight,
+    structured,
+    telemetry,
+)
+from app.services.clients import registry
+from app.services.jobs import JOB_MODE, jobs
+from app.services.ingest import ingestor
+from app.services.issue_store import issue_store
+from app.services.web_cache import web_cache
+from app.services.bulk import bulk
+from app.services.notify import outbox
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    blob = registry.blob_service()
+    if os.getenv("AZURE_STORAGE_CONN_STR"):
+        blob.start_refresh()  # 최신 PDF 인덱스 주기 재동기화
+    if JOB_MODE == "inprocess":
+        await jobs.start()  # external 모드는 `python -m app.services.jobs` 워커가 처리
+    await outbox.start()  # Slack 알림 sender (spool 에 남은 건 재전송)
+    telemetry.start_export()  # TELEMETRY_EXPORTER=otlp 이면 주기적으로 span 전송
+    try:
+        await db.init_db()
+    except Exception as e:
+        print("⚠️ db init failed (template logs / A/B feedback disabled):", e)
+    db.log_writer.start()  # 템플릿 생성 로그 배치 insert
+    await feedback.top_copies.start()  # 퍼널/톤별 상위 카피 warm-up
+    await issue_store.start()  # 최근 이슈로 중복 탐지 인덱스 구성
+    await web_cache.start()  # 만료된 web_search 결과/스니펫 정리
+    await bulk.start()  # 보관 기간이 지난 대량 생성 run 정리
+    await health.start()  # 체인/클라이언트 warm-up (STARTUP_WARMUP)
+    yield
+    # 워커 종료: 새 job 을 받지 않고 진행 중 LLM 호출/job/스트림을 DRAIN_TIMEOUT 안에서 마무리
+    lifecycle.drain.begin()
+    await lifecycle.drain.wait()
+    await health.stop()
+    await issue_store.stop()
+    await web_cache.stop()  # 백그라운드 재조회 취소
+    await feedback.top_copies.stop()
+    await db.log_writer.stop()  # 남은 로그 flush
+    await db.close_db()
+    await jobs.stop()
+    await outbox.stop()  # 남은 알림 flush
+    await telemetry.stop_export()
+    await ingestor.drain()  # 진행 중인 업로드 색인 마무리
+    await blob.stop_refresh()
+    # 종료 시 공유 커넥션 풀 정리
+    await registry.aclose()
+
 
-app = FastAPI(title="CRM")
+app = FastAPI(title="CRM", lifespan=lifespan)
+
+# route / chain / tool / retriever span + latency histogram
+app.add_middleware(telemetry.TelemetryMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,3 +87,88 @@ app.include_router(templates.router, prefix="/api/templates", tags=["templates"]
 app.include_router(research.router, prefix="/api/research", tags=["research"])
 app.include_router(issue.router, prefix="/api/issues", tags=["issues"])
 app.include_router(voc.router, prefix="/api/voc", tags=["voc"])
+app.include_router(jobs_api.router, prefix="/api/jobs", tags=["jobs"])
+
+
+telemetry.register_gauge(
+    "crm_llm_in_flight", "LLM calls holding a slot", lambda: llm_limits.stats()["in_flight"]
+)
+telemetry.register_gauge(
+    "crm_llm_waiting", "Requests waiting for an LLM slot", lambda: llm_limits.stats()["waiting"]
+)
+telemetry.register_gauge(
+    "crm_llm_gateway_open_circuits",
+    "LLM deployments with an open circuit breaker",
+    llm_gateway.open_circuits,
+)
+telemetry.register_gauge(
+    "crm_in_flight",
+    "In-flight streams / LLM calls / jobs in this worker",
+    lambda: lifecycle.drain.total,
+)
+telemetry.register_gauge(
+    "crm_slack_outbox_depth", "Queued Slack notifications", lambda: outbox.stats()["queue_depth"]
+)
+
+
+@app.get("/health/live", tags=["ops"])
+async def liveness():
+    """liveness probe — 외부 의존성과 무관."""
+    return health.liveness()
+
+
+@app.get("/health/ready", tags=["ops"])
+async def readiness():
+    """readiness probe — 의존성별 상태. warm-up 중이거나 필수 의존성 실패면 503."""
+    ready, body = await health.readiness()
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(
+        telemetry.render_metrics(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/api/cache/stats", tags=["ops"])
+async def cache_stats():
+    """체인별 응답 캐시 hit/miss 통계."""
+    return await cache.stats()
+
+
+@app.get("/api/llm/stats", tags=["ops"])
+async def llm_stats():
+    """LLM 동시성 슬롯 + deployment 별 breaker/latency/throttle 상태 + 구조화 출력 수리/재요청 비율."""
+    return {"limits": llm_limits.stats(), "gateway": llm_gateway.stats(), "structured": structured.stats()}
+
+
+@app.get("/api/retrieval/stats", tags=["ops"])
+async def retrieval_stats():
+    """소스별 retrieval latency + 재정렬 후보/채택/중복 제거 수 + web_search 캐시 적중."""
+    return {"sources": retrieval.stats(), "rerank": rerank.stats(), "web": web_cache.stats()}
+
+
+@app.get("/api/singleflight/stats", tags=["ops"])
+async def singleflight_stats():
+    """group 별 실제 실행 수 / 진행 중 호출에 합류한 (중복 제거된) 수."""
+    return singleflight.stats()
+
+
+@app.get("/api/tokens/stats", tags=["ops"])
+async def token_stats():
+    """체인별 prompt/completion/cached 토큰 사용량."""
+    return prompts.stats()
+
+
+@app.get("/api/notify/stats", tags=["ops"])
+async def notify_stats():
+    """Slack outbox 전송/재시도/유실 통계."""
+    return outbox.stats()
+
+
+@app.get("/api/feedback/stats", tags=["ops"])
+async def feedback_stats():
+    """템플릿 로그 writer + 상위 카피 캐시 통계."""
+    return {"log_writer": db.log_writer.stats(), "top_copies": feedback.top_copies.stats()}
@@ -0,0 +1,25 @@
+# backend/tests/conftest.py
+"""테스트 공통 설정: 외부 서비스 대신 bench.fakes 의 더미 값, 파일 저장소는 임시 디렉터리.
+
+app 모듈은 import 시점에 env 를 읽으므로 여기서 먼저 채운다.
+"""
+import os, sys, tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from bench.fakes import FAKE_ENV  # noqa: E402
+
+_TMP = tempfile.mkdtemp(prefix="crm-tests-")
+for key, value in {
+    **FAKE_ENV,
+    "DATABASE_URL": f"sqlite+aiosqlite:///{_TMP}/crm.sqlite3",
+    "LLM_CACHE_BACKEND": "memory",
+    "WEB_CACHE_PATH": f"{_TMP}/web_cache.sqlite3",
+    "BULK_STORE_PATH": f"{_TMP}/bulk_runs.sqlite3",
+    "INGEST_STATE_PATH": f"{_TMP}/ingest_state.sqlite3",
+    "STARTUP_WARMUP": "off",
+}.items():
+    os.environ.setdefault(key, value)
+
@@ -0,0 +1,69 @@
+# backend/tests/test_bench_smoke.py
+"""bench.run 스모크: in-process fake 백엔드로 전 시나리오를 낮은 동시성으로 한 바퀴."""
+import os, json
+
+import pytest
+
+from app.chains import issue_chain, research_chain, template_chain
+from app.services.clients import registry
+from app.services.lifecycle import drain
+from bench import run as bench_run
+from bench.fakes import FAKE_ENV
+
+_CHAIN_CACHES = (
+    issue_chain.get_issue_chain,
+    research_chain.get_summary_chain,
+    research_chain.get_executor,
+    template_chain.get_template_chain,
+    template_chain.get_template_stream_chain,
+)
+
+
+@pytest.fixture
+def isolated(monkeypatch):
+    """install() 이 건드리는 레지스트리/env, lifespan 종료가 켠 drain, fake 로 만든 체인 캐시를 테스트 뒤 되돌린다."""
+    monkeypatch.setattr(registry, "_overrides", {})
+    monkeypatch.setattr(drain, "draining", False)
+    monkeypatch.setattr(drain, "started_at", drain.started_at)
+    monkeypatch.setattr(registry, "_clients", {})
+    for key in (*FAKE_ENV, "AZURE_OPENAI_DEPLOYMENTS", "AZURE_OPENAI_FALLBACK_DEPLOYMENTS"):
+        if key in os.environ:
+            monkeypatch.setenv(key, os.environ[key])
+        else:
+            monkeypatch.delenv(key, raising=False)
+    for cached in _CHAIN_CACHES:
+        cached.cache_clear()
+    yield
+    for cached in _CHAIN_CACHES:
+        cached.cache_clear()
+
+
+def test_all_scenarios_run_without_errors(isolated, tmp_path, capsys):
+    out = tmp_path / "bench.json"
+    argv = [
+        "--scenarios", ",".join(bench_run.SCENARIOS),
+        "--concurrency", "1,2",
+        "--requests", "4",
+        "--warmup", "1",
+        "--voc-size", "2048",
+        "--cache", "on",
+        "--out", str(out),
+    ]
+    for name in ("llm", "search", "tavily", "blob", "slack"):
+        argv += [f"--{name}", "fixed:0"]
+
+    assert bench_run.main(argv) == 0
+
+    report = json.loads(out.read_text())
+    results = report["results"]
+    assert [(r["scenario"], r["concurrency"]) for r in results] == [
+        (s, c) for s in bench_run.SCENARIOS for c in (1, 2)
+    ]
+    for r in results:
+        assert (r["ok"], r["errors"]) == (4, 0), r["statuses"]
+        assert r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"]
+    assert report["meta"]["target"] == "in-process"
+    assert "templates  c=2" in capsys.readouterr().out
+
+    # 같은 결과끼리 비교하면 회귀 없음
+    assert bench_run.main(["--compare", str(out), str(out)]) == 0
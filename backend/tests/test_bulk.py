@@ -0,0 +1,190 @@
+# backend/tests/test_bulk.py
+"""대량 생성: 셀 단위 오류 격리, 이어서 실행(resume), no_cache, CSV/422 경로."""
+import json, asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import templates
+from app.services.bulk import BulkRunner
+
+CELLS = [{"tone": t} for t in ("친근한", "단호한", "유쾌한")]
+
+
+def _run(runner, cells, work, fresh=False, run_id="run-1"):
+    async def collect():
+        return [line async for line in runner.run("template", cells, work, 2, run_id, fresh=fresh)]
+
+    return asyncio.run(collect())
+
+
+def _work(fail=(), calls=None):
+    async def work(cell):
+        if calls is not None:
+            calls.append(cell["tone"])
+        if cell["tone"] in fail:
+            raise RuntimeError(f"{cell['tone']} failed")
+        return {"templates": [cell["tone"]]}
+
+    return work
+
+
+def test_failing_cell_does_not_abort_run(tmp_path):
+    runner = BulkRunner(str(tmp_path / "bulk.sqlite3"))
+
+    lines = _run(runner, CELLS, _work(fail={"단호한"}))
+
+    run, *cells, done = lines
+    assert run == {"type": "run", "run_id": "run-1", "total": 3, "resumed": 0, "pending": 3}
+    by_tone = {c["tone"]: c for c in cells}
+    assert by_tone["단호한"] == {"type": "cell", "index": 1, "tone": "단호한", "ok": False, "error": "단호한 failed"}
+    assert by_tone["친근한"]["ok"] and by_tone["유쾌한"]["templates"] == ["유쾌한"]
+    assert (done["succeeded"], done["failed"]) == (2, 1)
+
+
+def test_resume_reruns_only_failed_and_missing_cells(tmp_path):
+    runner = BulkRunner(str(tmp_path / "bulk.sqlite3"))
+    _run(runner, CELLS, _work(fail={"단호한"}))
+    runner.store.open("run-1", "template", CELLS)  # 중간에 끊긴 run: 마지막 셀 결과가 없음
+    runner.store._conn.execute("DELETE FROM bulk_cells WHERE run_id = 'run-1' AND idx = 2")
+    runner.store._conn.commit()
+    calls = []
+
+    run, *cells, done = _run(runner, CELLS, _work(calls=calls))
+
+    assert sorted(calls) == sorted(["단호한", "유쾌한"])
+    assert (run["resumed"], run["pending"]) == (1, 2)
+    assert cells[0] == {"type": "cell", "index": 0, "tone": "친근한", "ok": True,
+                        "templates": ["친근한"], "resumed": True}
+    assert (done["succeeded"], done["failed"]) == (3, 0)
+    attempts = {i: r["attempts"] for i, r in runner.store.results("run-1").items()}
+    assert attempts == {0: 1, 1: 2, 2: 1}
+
+
+def test_fresh_run_clears_previous_cells(tmp_path):
+    runner = BulkRunner(str(tmp_path / "bulk.sqlite3"))
+    _run(runner, CELLS, _work())
+    calls = []
+
+    run, *_ = _run(runner, CELLS, _work(calls=calls), fresh=True)
+
+    assert run["resumed"] == 0
+    assert len(calls) == 3
+
+
+def test_progress_reports_pending_and_failed_cells(tmp_path):
+    runner = BulkRunner(str(tmp_path / "bulk.sqlite3"))
+    _run(runner, CELLS, _work(fail={"유쾌한"}))
+
+    progress = asyncio.run(runner.progress("run-1"))
+
+    assert (progress["succeeded"], progress["failed"], progress["pending"]) == (2, 1, 0)
+    assert progress["cells"][2] == {"index": 2, "tone": "유쾌한", "ok": False, "error": "유쾌한 failed"}
+    assert asyncio.run(runner.progress("missing")) is None
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """/api/templates 라우터 + 임시 bulk 저장소 + fake 생성 (tone 이 "실패" 면 예외)."""
+    calls = []
+
+    async def generate(inputs, no_cache=False):
+        calls.append((inputs, no_cache))
+        if inputs["tone"] == "실패":
+            raise RuntimeError("LLM Error")
+        return [{"copy": f"{inputs['funnel_stage']}/{inputs['tone']}", "rationale": "r"}], True
+
+    monkeypatch.setattr(templates, "bulk", BulkRunner(str(tmp_path / "bulk.sqlite3")))
+    monkeypatch.setattr(templates, "_generate", generate)
+    monkeypatch.setattr(templates, "log_generation", lambda *a, **kw: None)
+    app = FastAPI()
+    app.include_router(templates.router, prefix="/api/templates")
+    with TestClient(app) as client:
+        client.calls = calls
+        yield client
+
+
+def _lines(resp):
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+def test_matrix_streams_every_cell_and_resume_replays_them(api):
+    matrix = {"business_desc": "커머스", "segments": ["VIP", "휴면"], "funnel_stages": ["Retention"], "tones": ["친근한", "실패"]}
+
+    run, *cells, done = _lines(api.post("/api/templates/bulk", json=matrix))
+
+    assert run["total"] == 4 and len(cells) == 4
+    assert {(c["segment"], c["tone"], c["ok"]) for c in cells} == {
+        ("VIP", "친근한", True), ("VIP", "실패", False), ("휴면", "친근한", True), ("휴면", "실패", False),
+    }
+    assert "[타깃 세그먼트: VIP]" in api.calls[0][0]["insight"]
+    assert (done["succeeded"], done["failed"]) == (2, 2)
+
+    api.calls.clear()
+    run2, *cells2, _ = _lines(api.post(f"/api/templates/bulk/{run['run_id']}/resume"))
+
+    assert run2["resumed"] == 2
+    assert sum(1 for c in cells2 if c.get("resumed")) == 2
+    assert [inputs["tone"] for inputs, _ in api.calls] == ["실패", "실패"]  # 실패한 셀만 다시
+
+    progress = api.get(f"/api/templates/bulk/{run['run_id']}").json()
+    assert (progress["total"], progress["succeeded"], progress["failed"]) == (4, 2, 2)
+
+
+def test_no_cache_clears_previous_cells(api):
+    matrix = {"business_desc": "커머스", "funnel_stages": ["Retention"], "tones": ["친근한", "단호한"]}
+    _lines(api.post("/api/templates/bulk", json=matrix))
+    api.calls.clear()
+
+    run, *cells, _ = _lines(api.post("/api/templates/bulk", json={**matrix, "no_cache": True}))
+
+    assert run["resumed"] == 0
+    assert not any(c.get("resumed") for c in cells)
+    assert [no_cache for _, no_cache in api.calls] == [True, True]
+
+
+def test_csv_body_becomes_segments(api):
+    body = "segment,insight,tone\nVIP,재구매 감소,\n휴면,,단호한\n,무시되는 줄,\n"
+
+    run, *cells, _ = _lines(api.post(
+        "/api/templates/bulk",
+        content=body.encode("utf-8-sig"),
+        headers={"content-type": "text/csv"},
+        params={"business_desc": "커머스", "insight": "공통", "funnel_stages": "Retention", "tones": "친근한,유쾌한"},
+    ))
+
+    assert run["total"] == 3  # VIP × 2 tone, 휴면은 지정 tone 1개
+    got = {(c["segment"], c["tone"], c["insight"]) for c in cells}
+    assert got == {("VIP", "친근한", "재구매 감소"), ("VIP", "유쾌한", "재구매 감소"), ("휴면", "단호한", "공통")}
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"json": {"business_desc": ""}},  # 검증 실패
+        {"json": {"business_desc": "커머스", "segments": ["VIP"]}},  # tones 없음
+        {"content": "segment\nVIP\n".encode("cp949") + "휴면".encode("cp949"), "headers": {"content-type": "text/csv"}},
+    ],
+)
+def test_invalid_matrix_is_422(api, kwargs):
+    assert api.post("/api/templates/bulk", **kwargs).status_code == 422
+    assert api.calls == []
+
+
+def test_too_many_cells_is_422(api, monkeypatch):
+    monkeypatch.setattr(templates, "TEMPLATE_BULK_MAX_CELLS", 3)
+    matrix = {"business_desc": "커머스", "funnel_stages": ["A", "B"], "tones": ["x", "y"]}
+
+    resp = api.post("/api/templates/bulk", json=matrix)
+
+    assert resp.status_code == 422
+    assert "TEMPLATE_BULK_MAX_CELLS" in resp.json()["detail"]
+
+
+def test_unknown_run_is_404(api):
+    assert api.get("/api/templates/bulk/nope").status_code == 404
+    assert api.post("/api/templates/bulk/nope/resume").status_code == 404
@@ -0,0 +1,103 @@
+# backend/tests/test_cache.py
+"""응답 캐시: 유사도 인덱스(numpy) / semantic hit / stats 가 이벤트 루프를 막지 않는지."""
+import asyncio, threading
+
+import numpy as np
+import pytest
+
+from app.services.cache import MISSING, MemoryBackend, ResponseCache, SemanticIndex
+
+
+def _vec(seed: int, dim: int = 32) -> list:
+    return np.random.default_rng(seed).normal(size=dim).tolist()
+
+
+def test_index_search_matches_brute_force_cosine():
+    index = SemanticIndex(max_entries=200)
+    vectors = {f"k{i}": _vec(i) for i in range(150)}  # 64 → 128 → 200 으로 늘어남
+    for k, v in vectors.items():
+        index.add(k, v)
+    query = _vec(999)
+
+    key, score = index.search(query)
+
+    cos = {
+        k: float(np.dot(v, query) / (np.linalg.norm(v) * np.linalg.norm(query))) for k, v in vectors.items()
+    }
+    assert key == max(cos, key=cos.get)
+    assert score == pytest.approx(cos[key], abs=1e-5)
+
+
+def test_index_evicts_oldest_and_reuses_discarded_slots():
+    index = SemanticIndex(max_entries=3)
+    for i in range(4):
+        index.add(f"k{i}", _vec(i))
+
+    assert len(index) == 3
+    assert index.search(_vec(0))[0] != "k0"  # 가장 먼저 넣은 것부터 밀려남
+    assert index.search(_vec(3)) == ("k3", pytest.approx(1.0, abs=1e-5))
+
+    index.discard("k3")
+    assert index.search(_vec(3))[0] != "k3"
+    index.add("k4", _vec(4))
+    assert len(index) == 3
+    assert index.search(_vec(1))[0] == "k1"  # 빈 자리를 재사용, 남은 항목은 그대로
+
+
+def test_index_ignores_zero_and_mismatched_vectors():
+    index = SemanticIndex()
+    index.add("zero", [0.0] * 8)
+    assert len(index) == 0
+    index.add("k", _vec(1, dim=8))
+    assert index.search(_vec(1, dim=16)) == (None, 0.0)
+
+
+def test_semantic_hit_runs_search_off_the_event_loop(monkeypatch):
+    vectors = {"결제 오류": [1.0, 0.0, 0.1], "결제 에러": [1.0, 0.0, 0.12], "배송 지연": [0.0, 1.0, 0.0]}
+
+    async def embed(text):
+        return vectors[text]
+
+    threads = []
+    search = SemanticIndex.search
+
+    def spy(self, vec):
+        threads.append(threading.current_thread())
+        return search(self, vec)
+
+    monkeypatch.setattr(SemanticIndex, "search", spy)
+    cache = ResponseCache("t", "v1", backend=MemoryBackend(), embed=embed, threshold=0.95, text_key="q")
+
+    async def scenario():
+        await cache.set({"q": "결제 오류"}, "answer")
+        return await cache.get({"q": "결제 에러"}), await cache.get({"q": "배송 지연"})
+
+    similar, other = asyncio.run(scenario())
+
+    assert similar == "answer"
+    assert other is MISSING
+    assert cache.semantic_hits == 1
+    assert threads and all(t is not threading.main_thread() for t in threads)
+
+
+def test_stats_counts_blocking_backend_in_a_thread():
+    class SlowBackend(MemoryBackend):
+        blocking = True
+
+        def __len__(self):
+            self.counted_in = threading.current_thread()
+            return super().__len__()
+
+    backend = SlowBackend()
+    cache = ResponseCache("t", "v1", backend=backend)
+
+    async def scenario():
+        await cache.set({"q": 1}, "a")
+        await cache.get({"q": 1})
+        return await cache.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["size"] == 1
+    assert stats["hits"] == 1
+    assert backend.counted_in is not threading.main_thread()
@@ -0,0 +1,71 @@
+# backend/tests/test_ingest.py
+"""VOC ingestion: 다운로드 실패 시 임시 파일 정리 / embedding 동시 실행 상한."""
+import asyncio, os, tempfile
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import ingest
+from app.services.clients import registry
+
+
+class _BrokenStream:
+    async def chunks(self):
+        yield b"first chunk"
+        raise ConnectionError("connection reset")
+
+
+class _Blob:
+    def __init__(self, fail_on: str):
+        self.fail_on = fail_on
+
+    async def download_blob(self):
+        if self.fail_on == "download":
+            raise ConnectionError("blob unavailable")
+        return _BrokenStream()
+
+
+@pytest.fixture
+def tmpdir_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return lambda: os.listdir(tmp_path)
+
+
+@pytest.mark.parametrize("fail_on", ["download", "chunks"])
+def test_download_failure_removes_temp_file(tmpdir_files, monkeypatch, fail_on):
+    container = SimpleNamespace(get_blob_client=lambda name: _Blob(fail_on))
+    monkeypatch.setattr(registry, "blob_service", lambda: SimpleNamespace(client=container))
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(ingest.Ingestor(sink=object())._download("voc.txt"))
+
+    assert tmpdir_files() == []
+
+
+def test_embedding_batches_are_bounded(monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_EMBED_BATCH", 2)
+    monkeypatch.setattr(ingest, "INGEST_EMBED_CONCURRENCY", 3)
+    running, peak, uploaded = 0, 0, []
+
+    class Embeddings:
+        async def aembed_documents(self, texts):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return [[float(len(t))] for t in texts]
+
+    class SearchClient:
+        async def merge_or_upload_documents(self, documents):
+            uploaded.extend(documents)
+
+    monkeypatch.setattr(registry, "embeddings", lambda: Embeddings())
+    monkeypatch.setattr(registry, "search_client", lambda: SearchClient())
+    chunks = [f"chunk {i}" * (i + 1) for i in range(20)]
+
+    asyncio.run(ingest.AzureSearchSink().upsert([f"id{i}" for i in range(20)], chunks, "voc.txt"))
+
+    assert peak == 3
+    assert [d[ingest.INDEX_KEY_FIELD] for d in uploaded] == [f"id{i}" for i in range(20)]
+    assert all(d[ingest.INDEX_VECTOR_FIELD] == [float(len(c))] for d, c in zip(uploaded, chunks))
@@ -0,0 +1,113 @@
+# backend/tests/test_issue_store.py
+"""이슈 중복 탐지: 어떤 요청이 기존 이슈에 합쳐지고 어떤 요청은 새로 만드는지."""
+import asyncio
+
+import pytest
+
+from app.services import db
+from app.services.issue_store import IssueStore
+
+ISSUE = {"title": "결제 실패", "severity": "High", "tasks": {"Dev": ["PG 타임아웃 점검"], "PM": [], "Design": []}}
+
+
+def _run(scenario):
+    async def wrapped():
+        await db.init_db()
+        try:
+            return await scenario()
+        finally:
+            await db.close_db()  # 엔진은 이벤트 루프마다 새로
+
+    return asyncio.run(wrapped())
+
+
+async def _create(store: IssueStore, question: str, answer: str = "") -> dict:
+    existing, reservation = await store.dedupe((question, answer or question))
+    assert existing is None
+    return await store.save(ISSUE, question, answer or question, reservation)
+
+
+async def _merged_into(store: IssueStore, question: str, answer: str = ""):
+    existing, reservation = await store.dedupe((question, answer or question))
+    if reservation is not None:
+        store.release(reservation)
+    return existing["id"] if existing else None
+
+
+@pytest.mark.parametrize(
+    "question, merged",
+    [
+        ("결제 단계에서 카드 결제가 자주 실패합니다", True),  # 같은 문장
+        ("  결제 단계에서   카드 결제가 자주 실패합니다 ", True),  # 공백만 다름
+        ("결제 단계에서 카드 결제가 자주 실패합니다!", False),  # 문장부호
+        ("결제 단계에서 카드 결제가 가끔 실패합니다", False),  # 한 단어 다름
+        ("결제 단계에서 간편결제가 자주 실패합니다", False),  # 비슷한 다른 문제
+    ],
+)
+def test_exact_mode_merges_only_same_normalized_insight(question, merged):
+    store = IssueStore(exact=True)
+
+    async def scenario():
+        first = await _create(store, "결제 단계에서 카드 결제가 자주 실패합니다")
+        return first["id"], await _merged_into(store, question)
+
+    first_id, merged_id = _run(scenario)
+
+    assert (merged_id == first_id) is merged
+    assert merged_id in (None, first_id)
+
+
+def test_minhash_mode_merges_near_identical_but_not_related_insights():
+    store = IssueStore(exact=False, threshold=0.9)
+    answer = "카드 결제 승인 단계에서 PG 응답이 늦어 결제 실패가 늘었다는 리서치 결과"
+
+    async def scenario():
+        first = await _create(store, "결제 단계에서 카드 결제가 자주 실패합니다", answer)
+        return first["id"], {
+            "punctuation": await _merged_into(store, "결제 단계에서 카드 결제가 자주 실패합니다!", answer),
+            "related": await _merged_into(
+                store, "결제 단계에서 간편결제 버튼이 안 보입니다", "간편결제 버튼 노출 위치에 대한 리서치 결과"
+            ),
+            "unrelated": await _merged_into(store, "배송 조회 화면이 느립니다", "배송 조회 API 지연"),
+        }
+
+    first_id, merged = _run(scenario)
+
+    assert merged == {"punctuation": first_id, "related": None, "unrelated": None}
+
+
+def test_merge_counts_duplicates_and_concurrent_same_requests_share_one_issue():
+    store = IssueStore(exact=True)
+    question = "회원가입 인증 문자가 오지 않습니다"
+
+    async def scenario():
+        first, reservation = await store.dedupe((question,))
+        waiter = asyncio.create_task(store.dedupe((question,)))
+        await asyncio.sleep(0)
+        assert not waiter.done()  # 먼저 온 생성 결과를 기다린다
+        created = await store.save(ISSUE, question, question, reservation)
+        merged, _ = await waiter
+        return created, merged, await store.get(created["id"])
+
+    created, merged, stored = _run(scenario)
+
+    assert merged["id"] == created["id"]
+    assert merged["merged"] is True
+    assert stored["duplicates"] == 1
+    assert store.stats()["mode"] == "exact"
+
+
+def test_released_reservation_lets_waiter_create():
+    store = IssueStore(exact=True)
+
+    async def scenario():
+        _, reservation = await store.dedupe(("알림 설정이 저장되지 않습니다",))
+        waiter = asyncio.create_task(store.dedupe(("알림 설정이 저장되지 않습니다",)))
+        await asyncio.sleep(0)
+        store.release(reservation)  # 먼저 온 생성이 실패
+        return await waiter
+
+    existing, reservation = _run(scenario)
+
+    assert existing is None
+    assert reservation is not None
@@ -0,0 +1,167 @@
+# backend/tests/test_jobs.py
+"""JobStore 멱등 키: 같은 키는 같은 job, 동시 생성 경합, 실패 job 재생성 / JobQueue 통계."""
+import asyncio, threading
+
+from app.services.jobs import JobQueue, JobStore
+
+
+class _RaceConn:
+    """멱등 키 SELECT 직후 다른 워커가 같은 키로 job 을 만든 상황을 재현."""
+
+    def __init__(self, conn, other: JobStore):
+        self._conn, self._other, self._raced = conn, other, False
+
+    def execute(self, sql, params=()):
+        cur = self._conn.execute(sql, params)
+        if not self._raced and sql.startswith("SELECT * FROM jobs WHERE kind = ?"):
+            self._raced = True
+            self._other.create(*params[:1], {"by": "other"}, params[1])
+        return cur
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_same_key_returns_existing_job(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+
+    first, created1 = store.create("issue", {"q": 1}, "key-1")
+    again, created2 = store.create("issue", {"q": 2}, "key-1")
+    other_kind, created3 = store.create("research", {"q": 1}, "key-1")
+
+    assert (created1, created2, created3) == (True, False, True)
+    assert again["id"] == first["id"]
+    assert again["payload"] == {"q": 1}
+    assert other_kind["id"] != first["id"]
+
+
+def test_concurrent_create_with_same_key_returns_winner(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    worker_a, worker_b = JobStore(path), JobStore(path)
+    worker_a._conn = _RaceConn(worker_a._conn, worker_b)
+
+    job, created = worker_a.create("issue", {"by": "a"}, "key-1")  # IntegrityError 가 아니라 기존 job
+
+    assert created is False
+    assert job["payload"] == {"by": "other"}
+    assert worker_b.get(job["id"])["status"] == "queued"
+
+
+def test_failed_job_is_recreated_even_when_racing(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    worker_a, worker_b = JobStore(path), JobStore(path)
+    failed, _ = worker_a.create("issue", {"n": 0}, "key-1")
+    worker_a.claim(failed["id"])
+    worker_a.finish(failed["id"], error="boom")
+
+    retried, created = worker_a.create("issue", {"n": 1}, "key-1")
+    assert created is True
+    assert retried["id"] != failed["id"]
+    assert worker_a.get(failed["id"]) is None
+
+    worker_a.claim(retried["id"])
+    worker_a.finish(retried["id"], error="boom again")
+    worker_a._conn = _RaceConn(worker_a._conn, worker_b)  # B 가 먼저 실패 job 을 재생성
+    job, created = worker_a.create("issue", {"n": 2}, "key-1")
+
+    assert created is False
+    assert job["status"] == "queued"
+    assert job["payload"] == {"by": "other"}
+
+
+def test_many_threads_same_key_single_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    stores = [JobStore(path) for _ in range(8)]
+    results, errors = [], []
+
+    def create(store):
+        try:
+            results.append(store.create("issue", {}, "same-key"))
+        except Exception as e:  # pragma: no cover - 실패 시 원인 표시
+            errors.append(e)
+
+    threads = [threading.Thread(target=create, args=(s,)) for s in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len({job["id"] for job, _ in results}) == 1
+    assert sum(created for _, created in results) == 1
+
+
+def test_stats_counts_run_off_the_event_loop(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    queue = JobQueue(store)  # start() 전 = external 모드처럼 큐 없이 store 를 센다
+    for i in range(3):
+        store.create("issue", {"n": i}, None)
+    store.claim()
+    loop_thread = []
+    count = store.count
+
+    def tracked(status):
+        loop_thread.append(threading.current_thread() is threading.main_thread())
+        return count(status)
+
+    store.count = tracked
+
+    stats = asyncio.run(queue.stats())
+
+    assert (stats["queue_depth"], stats["running"]) == (2, 1)
+    assert loop_thread == [False, False]
+
+
+def test_watch_releases_events_in_external_mode_and_on_disconnect(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.jobs.JOB_POLL_INTERVAL", 0.01)
+    path = str(tmp_path / "jobs.sqlite3")
+    queue, worker = JobQueue(JobStore(path)), JobStore(path)  # 실행은 다른 프로세스의 store
+    done, _ = worker.create("issue", {}, None)
+    left, _ = worker.create("issue", {}, None)
+
+    async def scenario():
+        statuses = []
+
+        async def finish_later():
+            await asyncio.sleep(0.03)
+            worker.claim(done["id"])
+            worker.finish(done["id"], {"ok": True})
+
+        finisher = asyncio.create_task(finish_later())
+        async for job in queue.watch(done["id"]):
+            statuses.append(job["status"])
+        await finisher
+
+        stream = queue.watch(left["id"])
+        assert (await stream.__anext__())["status"] == "queued"
+        assert left["id"] in queue._events
+        await stream.aclose()  # 클라이언트가 먼저 끊음
+        return statuses
+
+    assert asyncio.run(scenario()) == ["queued", "succeeded"]
+    assert queue._events == {}
+
+
+def test_watch_is_woken_by_inprocess_run(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.jobs.JOB_POLL_INTERVAL", 5)
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), workers=1)
+
+    async def handler(payload):
+        await asyncio.sleep(0.01)
+        return {"n": payload["n"]}
+
+    queue.register("issue", handler)
+
+    async def scenario():
+        await queue.start()
+        try:
+            job = await queue.submit("issue", {"n": 1})
+            seen = [j["status"] async for j in queue.watch(job["id"])]
+        finally:
+            await queue.stop()
+        return seen
+
+    statuses = asyncio.run(asyncio.wait_for(scenario(), 2))  # polling(5s) 이 아니라 알림으로 깨어남
+
+    assert statuses[-1] == "succeeded"
+    assert queue._events == {}
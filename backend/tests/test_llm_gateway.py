@@ -0,0 +1,125 @@
+# backend/tests/test_llm_gateway.py
+"""LLM gateway: 실제 AzureChatOpenAI → fake Azure 엔드포인트(429/5xx/400 주입)."""
+import time, asyncio
+
+import httpx
+import pytest
+
+from app.services import llm_gateway
+from app.services.llm_limits import LLMUnavailableError
+from bench.fakes import FakeAzureOpenAI, Latency
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    """spec("east=500:1;west=ok") → (GatewayChatModel, fake 엔드포인트)."""
+    monkeypatch.setattr(llm_gateway, "LLM_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(llm_gateway, "_deployments", {})
+
+    def build(spec: str, retry_after: float = 1.0):
+        azure = FakeAzureOpenAI(Latency("fixed:0"), spec, retry_after=retry_after)
+        monkeypatch.setenv("AZURE_OPENAI_DEPLOYMENTS", ",".join(azure.deployments))
+        llm = llm_gateway.build_chat_llm(
+            0.0, 64, http_async_client=httpx.AsyncClient(transport=httpx.MockTransport(azure.handle))
+        )
+        return llm, azure
+
+    return build
+
+
+def _state(name: str) -> llm_gateway.Deployment:
+    return llm_gateway._deployments[name]
+
+
+def test_429_blocks_deployment_for_retry_after_and_fails_over(gateway):
+    llm, azure = gateway("east=429:1;west=ok", retry_after=5)
+
+    reply = asyncio.run(llm.ainvoke("결제 오류"))
+
+    assert reply.content
+    assert azure.calls["east"] == {"429": 1}
+    east = _state("east")
+    assert east.metrics["throttled"] == 1
+    assert east.blocked_until - time.monotonic() == pytest.approx(5, abs=0.5)
+    assert not east.available(time.monotonic())
+
+
+def test_429_longer_than_max_wait_surfaces_retry_after(gateway, monkeypatch):
+    monkeypatch.setattr(llm_gateway, "LLM_RETRY_MAX_WAIT", 1.0)
+    llm, _ = gateway("east=429:1", retry_after=30)
+
+    with pytest.raises(LLMUnavailableError) as info:
+        asyncio.run(llm.ainvoke("결제 오류"))
+
+    assert info.value.retry_after >= 29
+
+
+def test_5xx_fails_over_to_healthy_deployment(gateway):
+    llm, azure = gateway("east=500:1;west=ok")
+
+    for _ in range(3):
+        assert asyncio.run(llm.ainvoke("배송 지연")).content
+
+    assert azure.calls["west"]["200"] == 3
+    assert _state("east").metrics["error"] >= 1
+    assert _state("west").state == "closed"
+
+
+def test_breaker_opens_then_half_open_probe_closes_it(gateway, monkeypatch):
+    monkeypatch.setattr(llm_gateway, "LLM_BREAKER_THRESHOLD", 2)
+    monkeypatch.setattr(llm_gateway, "LLM_BREAKER_COOLDOWN", 0.2)
+    monkeypatch.setattr(llm_gateway, "LLM_RETRY_MAX_WAIT", 0.0)
+    llm, azure = gateway("east=500:1")
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(llm.ainvoke("로그인 실패"))
+    east = _state("east")
+    assert east.state == "open"
+    assert east.metrics["opened"] == 1
+    calls = sum(azure.calls["east"].values())
+
+    # cooldown 중에는 엔드포인트를 부르지 않는다
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(llm.ainvoke("로그인 실패"))
+    assert sum(azure.calls["east"].values()) == calls
+
+    time.sleep(0.25)
+    assert east.available(time.monotonic())
+    assert east.state == "half_open"
+
+    azure.faults["east"] = {}  # 복구
+    assert asyncio.run(llm.ainvoke("로그인 실패")).content
+    assert east.state == "closed"
+    assert east.failures == 0
+
+
+def test_half_open_probe_failure_reopens(gateway, monkeypatch):
+    monkeypatch.setattr(llm_gateway, "LLM_BREAKER_THRESHOLD", 1)
+    monkeypatch.setattr(llm_gateway, "LLM_BREAKER_COOLDOWN", 0.1)
+    monkeypatch.setattr(llm_gateway, "LLM_RETRY_MAX_WAIT", 0.0)
+    llm, _ = gateway("east=503:1")
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(llm.ainvoke("x"))
+    time.sleep(0.15)
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(llm.ainvoke("x"))
+
+    assert _state("east").state == "open"
+
+
+def test_400_is_raised_without_tripping_breaker(gateway):
+    llm, azure = gateway("east=400:1")
+
+    for _ in range(llm_gateway.LLM_BREAKER_THRESHOLD + 2):
+        with pytest.raises(Exception) as info:
+            asyncio.run(llm.ainvoke("bad prompt"))
+        assert not isinstance(info.value, LLMUnavailableError)
+
+    east = _state("east")
+    assert east.state == "closed"
+    assert east.failures == 0
+    assert azure.calls["east"] == {"400": llm_gateway.LLM_BREAKER_THRESHOLD + 2}  # 재시도 없음
+
+    azure.faults["east"] = {}
+    assert asyncio.run(llm.ainvoke("good prompt")).content
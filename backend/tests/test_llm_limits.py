@@ -0,0 +1,113 @@
+# backend/tests/test_llm_limits.py
+"""LLM 슬롯/deadline: 스트리밍 중 멈춘 호출도 deadline 에 끊기고 슬롯을 돌려준다."""
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from app.chains import research_chain, template_chain
+from app.services import llm_limits
+from app.services.llm_limits import LLMTimeoutError, deadline_after, until_deadline
+
+
+class Stalled:
+    """처음 몇 개를 내보낸 뒤 멈추는 astream."""
+
+    def __init__(self, *items):
+        self.items, self.closed = items, False
+
+    async def astream(self, inputs, config=None):
+        try:
+            for item in self.items:
+                yield item
+            await asyncio.sleep(3600)
+        finally:
+            self.closed = True
+
+
+def test_until_deadline_bounds_each_item():
+    stalled = Stalled("a", "b")
+
+    async def scenario():
+        got = []
+        with pytest.raises(LLMTimeoutError):
+            async for item in until_deadline(stalled.astream(None), deadline_after(0.05), 0.05):
+                got.append(item)
+        return got
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 2)) == ["a", "b"]
+    assert stalled.closed
+
+
+def test_until_deadline_passes_through_finished_stream():
+    async def short():
+        for i in range(3):
+            yield i
+
+    async def scenario():
+        return [x async for x in until_deadline(short(), deadline_after(5))]
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+
+def _events(stream):
+    async def run():
+        events = []
+        with pytest.raises(LLMTimeoutError):
+            async for event, _ in stream:
+                events.append(event)
+        return events
+
+    return run()
+
+
+def test_research_fast_stream_stalled_completion_hits_deadline(monkeypatch):
+    monkeypatch.setattr(research_chain, "RESEARCH_TIMEOUT", 0.05)
+    monkeypatch.setattr(research_chain, "RESEARCH_ROUTER", "rules")
+    monkeypatch.setattr(research_chain, "get_summary_chain", lambda: Stalled("첫 토큰"))
+
+    async def docs(question, route):
+        return route, [Document(page_content="결제 오류 문서")]
+
+    monkeypatch.setattr(research_chain, "_fast_docs", docs)
+
+    async def scenario():
+        stream, release = await research_chain.stream_answer("결제 오류 원인", fresh=True)
+        return await _events(stream), release
+
+    events, _ = asyncio.run(asyncio.wait_for(scenario(), 2))
+
+    assert events == ["route", "retrieval", "token"]
+    assert stats_in_flight() == 0  # 슬롯 반환
+
+
+def test_template_stream_stalled_completion_hits_deadline(monkeypatch):
+    monkeypatch.setattr(llm_limits, "LLM_TIMEOUT", 0.05)
+    monkeypatch.setattr(template_chain, "get_template_stream_chain", lambda: Stalled({"templates": []}))
+    inputs = {"business_desc": "커머스", "funnel_stage": "재구매", "tone": "친근한", "insight": "이탈"}
+
+    async def scenario():
+        stream, _ = await template_chain.stream_templates(inputs, fresh=True)
+        return await _events(stream)
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 2)) == []
+    assert stats_in_flight() == 0
+
+
+def stats_in_flight() -> int:
+    return llm_limits.stats()["in_flight"]
+
+
+def test_in_flight_counts_held_slots_and_idempotent_release():
+    async def scenario():
+        first = await llm_limits.acquire_slot()
+        second = await llm_limits.acquire_slot()
+        held = stats_in_flight()
+        first()
+        first()  # 두 번 불러도 한 번만 반환
+        after_one = stats_in_flight()
+        second()
+        return held, after_one
+
+    assert asyncio.run(scenario()) == (2, 1)
+    assert stats_in_flight() == 0
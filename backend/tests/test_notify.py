@@ -0,0 +1,133 @@
+# backend/tests/test_notify.py
+"""Slack outbox: 단건 digest 합치기, 배치는 메시지 1건, sender 오류 격리, spool."""
+import json, time, asyncio
+
+import httpx
+import pytest
+
+from app.services import notify
+from app.services.clients import registry
+
+
+@pytest.fixture
+def slack(monkeypatch):
+    """webhook 으로 보낸 text 목록."""
+    sent = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content)["text"])
+        return httpx.Response(200, text="ok")
+
+    monkeypatch.setattr(registry, "_overrides", {"ahttp": lambda: httpx.AsyncClient(transport=httpx.MockTransport(handle))})
+    monkeypatch.setattr(registry, "_clients", {})
+    monkeypatch.setattr(notify, "SLACK_DIGEST_WINDOW", 0.05)
+    return sent
+
+
+def _issue(i: int) -> dict:
+    return {"title": f"이슈 {i}", "severity": "High", "tasks": {"BE": [f"작업 {i}"]}}
+
+
+def _outbox(tmp_path=None) -> notify.SlackOutbox:
+    return notify.SlackOutbox("https://hooks.slack.invalid/x", str(tmp_path / "outbox.sqlite3") if tmp_path else "")
+
+
+def test_singles_in_window_are_merged_into_one_digest(slack):
+    outbox = _outbox()
+
+    async def scenario():
+        for i in range(3):
+            await outbox.enqueue([_issue(i)])
+        await outbox.stop()
+
+    asyncio.run(scenario())
+
+    assert len(slack) == 1
+    assert slack[0].startswith("*🗂️ 이슈 3건 생성*")
+    assert outbox.metrics["issues_sent"] == 3
+
+
+def test_batch_is_one_message_and_not_mixed_with_singles(slack, monkeypatch):
+    monkeypatch.setattr(notify, "SLACK_DIGEST_MAX", 50)
+    outbox = _outbox()
+    batch = [_issue(i) for i in range(100)]  # SLACK_DIGEST_MAX 보다 커도 나누지 않는다
+
+    async def scenario():
+        await outbox.enqueue([_issue("a")])
+        await outbox.enqueue(batch)
+        await outbox.enqueue([_issue("b")])
+        await outbox.stop()
+
+    asyncio.run(scenario())
+
+    assert len(slack) == 3
+    single_a, digest, single_b = slack
+    assert digest.startswith("*🗂️ 이슈 100건 생성*")
+    assert "이슈 a" not in digest and "이슈 b" not in digest
+    assert single_a.startswith("*이슈 a*") and single_b.startswith("*이슈 b*")
+    assert outbox.metrics["messages_sent"] == 3 and outbox.metrics["issues_sent"] == 102
+
+
+def test_sender_survives_errors_and_stop_does_not_hang(slack, monkeypatch):
+    outbox = _outbox()
+    real_format = notify.format_message
+
+    def flaky(issues):
+        if issues[0]["title"] == "이슈 0":
+            raise ValueError("bad issue")
+        return real_format(issues)
+
+    monkeypatch.setattr(notify, "format_message", flaky)
+
+    async def scenario():
+        await outbox.enqueue([_issue(0), _issue(1)])
+        await outbox.enqueue([_issue(2), _issue(3)])
+        started = time.perf_counter()
+        await outbox.stop(timeout=5)
+        return time.perf_counter() - started
+
+    assert asyncio.run(scenario()) < 1
+    assert len(slack) == 1
+    assert outbox.metrics["dropped"] == 2 and outbox.metrics["errors"] == 1
+    assert outbox.metrics["issues_sent"] == 2
+
+
+def test_spool_failure_is_counted_and_sender_keeps_running(slack, tmp_path, monkeypatch):
+    outbox = _outbox(tmp_path)
+    remove, calls = outbox._spool.remove, []
+
+    def locked_once(ids):
+        calls.append(ids)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        remove(ids)
+
+    monkeypatch.setattr(outbox._spool, "remove", locked_once)
+
+    async def scenario():
+        await outbox.enqueue([_issue(0)])
+        await asyncio.sleep(0.1)
+        await outbox.enqueue([_issue(1)])
+        await outbox.stop(timeout=5)
+
+    asyncio.run(scenario())
+
+    assert len(slack) == 2  # 첫 배치 spool 정리 실패 후에도 sender 는 계속
+    assert outbox.metrics["errors"] == 1
+    assert outbox._task is None
+    assert [len(issues) for _, issues in outbox._spool.pending()] == [1]  # 못 지운 행은 다음 기동 때 재전송
+
+
+def test_spool_keeps_batch_as_one_row_and_reads_legacy_rows(tmp_path):
+    spool = notify._Spool(str(tmp_path / "outbox.sqlite3"))
+    spool.add([_issue(0), _issue(1)])
+    spool._conn.execute(  # 이전 형식: 이슈 dict 1건
+        "INSERT INTO slack_outbox (payload, created_at, owner) VALUES (?, 0, NULL)",
+        (json.dumps(_issue(2)),),
+    )
+    spool._conn.commit()
+
+    rows = spool.pending()
+
+    assert [len(issues) for _, issues in rows] == [2, 1]
+    assert rows[1][1][0]["title"] == "이슈 2"
@@ -0,0 +1,120 @@
+# backend/tests/test_retrieval.py
+"""hybrid retrieval: RRF 융합 / 중복 제거 / 토큰 예산 / 소스 실패 격리."""
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services import retrieval
+from app.services.prompts import count_tokens
+from app.services.retrieval import apply_budget, hybrid_retrieve, rrf_fuse
+
+
+def _doc(i, text=None, **meta) -> Document:
+    return Document(page_content=text or f"문서 {i} 본문", metadata={"id": i, **meta})
+
+
+def test_rrf_sums_ranks_across_sources():
+    ranked = {
+        "pdf": [_doc("a"), _doc("b"), _doc("c")],
+        "search": [_doc("c"), _doc("b"), _doc("d")],
+    }
+
+    fused = rrf_fuse(ranked, k=60)
+
+    # b: 1/62 + 1/62, c: 1/63 + 1/61 (근소하게 b 보다 큼), a: 1/61, d: 1/63
+    assert [d.metadata["id"] for d in fused] == ["c", "b", "a", "d"]
+
+
+def test_rrf_weights_shift_order():
+    ranked = {"pdf": [_doc("a")], "search": [_doc("b")]}
+
+    assert [d.metadata["id"] for d in rrf_fuse(ranked, {"search": 0.5})] == ["a", "b"]
+    assert [d.metadata["id"] for d in rrf_fuse(ranked, {"pdf": 0.5})] == ["b", "a"]
+
+
+def test_rrf_dedupes_by_id_then_body_and_skips_empty():
+    same_body = "  결제   오류 재현 절차 "
+    ranked = {
+        "pdf": [
+            Document(page_content=same_body),
+            _doc("x"),
+            _doc("x", text="같은 id, 다른 본문"),  # 같은 소스 안 중복 → 첫 rank 만
+            Document(page_content="   "),
+        ],
+        "search": [Document(page_content="결제 오류 재현 절차")],  # 공백만 다른 본문 → 같은 문서
+    }
+
+    fused = rrf_fuse(ranked, k=60)
+
+    assert len(fused) == 2
+    assert fused[0].page_content == same_body  # 두 소스 점수 합산으로 1등
+    assert fused[1].metadata["id"] == "x"
+
+
+def test_budget_keeps_fused_order_and_skips_docs_that_overflow():
+    small, big = "짧은 문서", "아주 긴 문서 " * 200
+    docs = [_doc(1, small), _doc(2, big), _doc(3, small)]
+    budget = 2 * count_tokens(small) + 4
+
+    kept = apply_budget(docs, budget)
+
+    assert [d.metadata["id"] for d in kept] == [1, 3]
+    assert sum(count_tokens(d.page_content) for d in kept) <= budget
+
+
+def test_budget_always_keeps_first_doc():
+    kept = apply_budget([_doc(1, "긴 문서 " * 100), _doc(2)], 5)
+
+    assert [d.metadata["id"] for d in kept] == [1]
+
+
+def test_hybrid_retrieve_isolates_failing_and_slow_sources(monkeypatch):
+    monkeypatch.setattr(retrieval, "_latency", type(retrieval._latency)(retrieval._latency.default_factory))
+
+    async def ok(query):
+        return [_doc("a"), _doc("b")]
+
+    async def broken(query):
+        raise RuntimeError("search down")
+
+    async def slow(query):
+        await asyncio.sleep(1)
+        return [_doc("z")]
+
+    docs, timings = asyncio.run(
+        hybrid_retrieve(
+            "q", {"pdf": ok, "search": broken, "web": slow},
+            token_budget=1000, timeout=0.05, rerank_docs=False,
+        )
+    )
+
+    assert [d.metadata["id"] for d in docs] == ["a", "b"]
+    assert set(timings) == {"pdf", "search", "web"}
+    stats = retrieval.stats()
+    assert stats["search"]["errors"] == 1
+    assert stats["web"]["errors"] == 1
+    assert stats["pdf"]["errors"] == 0
+
+
+@pytest.mark.parametrize("budget", [1, 40, 10_000])
+def test_hybrid_retrieve_applies_token_budget(budget):
+    async def source(query):
+        return [_doc(i, f"문서 {i} " * 10) for i in range(10)]
+
+    docs, _ = asyncio.run(hybrid_retrieve("q", {"pdf": source}, token_budget=budget, rerank_docs=False))
+
+    assert docs
+    assert len(docs) == 1 or sum(count_tokens(d.page_content) for d in docs) <= budget
+
+
+def test_retrieval_budget_matches_prompt_context_budget():
+    from app.chains.research_chain import format_docs
+
+    docs = [_doc(i, f"문서 {i} 내용 " * 40) for i in range(50)]
+
+    kept = apply_budget(docs)  # 기본값 = CONTEXT_TOKEN_BUDGET
+
+    assert 1 < len(kept) < len(docs)
+    # 같은 예산이라 프롬프트 조립 단계에서 다시 잘리지 않는다
+    assert format_docs(kept) == "\n\n".join(d.page_content for d in kept)
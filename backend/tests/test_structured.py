@@ -0,0 +1,116 @@
+# backend/tests/test_structured.py
+"""structured_chain: 로컬 수리 → 재요청 → response_format 거절 시 fallback."""
+import json, asyncio
+from typing import Any, List
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import ConfigDict
+
+from app.chains.template_chain import TEMPLATE_OUTPUT
+from app.services import structured
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class ScriptedChat(BaseChatModel):
+    """응답(문자열 또는 예외)을 순서대로 돌려주고, 받은 response_format 을 기록."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    script: List[Any]
+    formats: List[Any] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.formats.append(kwargs.get("response_format"))
+        reply = self.script.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+
+def _copies(n: int, copy: str = "혜택을 확인해보세요") -> str:
+    return json.dumps({"templates": [{"copy": f"{copy} {i}", "rationale": "r"} for i in range(n)]}, ensure_ascii=False)
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    monkeypatch.setattr(structured, "STRUCTURED_OUTPUT", "json_object")
+    monkeypatch.setattr(structured, "STRUCTURED_REASK", 1)
+    monkeypatch.setattr(structured, "_format_rejected", False)
+    monkeypatch.setattr(structured, "_stats", {})
+    prompt = ChatPromptTemplate.from_messages([("human", "{q}")])
+
+    def build(*script):
+        llm = ScriptedChat(script=list(script), formats=[])
+        return structured.structured_chain(prompt, llm, TEMPLATE_OUTPUT), llm
+
+    return build
+
+
+def _outcomes() -> dict:
+    return structured.stats()["schemas"]["template"]
+
+
+def test_valid_output_passes_with_json_object_format(chain):
+    run, llm = chain(_copies(3))
+
+    assert len(run.invoke({"q": "x"})) == 3
+    assert llm.formats == [{"type": "json_object"}]
+    assert _outcomes()["valid"] == 1
+
+
+def test_broken_json_is_repaired_locally(chain):
+    fenced = "```json\n" + _copies(4)[:-2] + ",]}\n``` 참고하세요"
+    run, llm = chain(fenced)
+
+    items = asyncio.run(run.ainvoke({"q": "x"}))
+
+    assert [i["copy"] for i in items] == [f"혜택을 확인해보세요 {i}" for i in range(3)]
+    assert len(llm.formats) == 1  # 재요청 없음
+    assert _outcomes()["repaired"] == 1
+
+
+def test_schema_violation_reasks_once(chain):
+    run, llm = chain(_copies(2), _copies(3))
+
+    assert len(run.invoke({"q": "x"})) == 3
+    assert len(llm.formats) == 2
+    assert _outcomes()["reasked"] == 1
+    assert _outcomes()["reask_calls"] == 1
+
+
+def test_reask_failure_raises(chain):
+    run, _ = chain(_copies(1), _copies(2))
+
+    with pytest.raises(structured.StructuredOutputError):
+        asyncio.run(run.ainvoke({"q": "x"}))
+    assert _outcomes()["failed"] == 1
+
+
+def test_rejected_response_format_falls_back_to_prompt_only(chain):
+    run, llm = chain(BadRequest("Invalid parameter: 'response_format' is not supported"), _copies(3), _copies(3))
+
+    assert len(run.invoke({"q": "x"})) == 3
+    assert len(asyncio.run(run.ainvoke({"q": "y"}))) == 3
+
+    assert llm.formats == [{"type": "json_object"}, None, None]  # 거절 뒤로는 붙이지 않음
+    assert structured.stats()["mode"] == "off (rejected)"
+
+
+def test_other_400_is_not_retried(chain):
+    run, llm = chain(BadRequest("content_filter"), _copies(3))
+
+    with pytest.raises(BadRequest):
+        run.invoke({"q": "x"})
+    assert len(llm.formats) == 1
+    assert structured._format_rejected is False
@@ -0,0 +1,148 @@
+# backend/tests/test_telemetry.py
+"""tracing: span 계층/오류, OTLP 변환·전송, ASGI 미들웨어, LangChain callback."""
+import json, asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+
+from app.services import telemetry
+from app.services.clients import registry
+from app.services.telemetry import (
+    InMemoryExporter,
+    OtlpHttpExporter,
+    TelemetryMiddleware,
+    annotate,
+    render_metrics,
+    span,
+    traced,
+)
+
+
+@pytest.fixture
+def exporter():
+    previous = telemetry.get_exporter()
+    exporter = InMemoryExporter()
+    telemetry.set_exporter(exporter)
+    yield exporter
+    telemetry.set_exporter(previous)
+
+
+def test_nested_spans_share_trace_and_record_errors(exporter):
+    with span("outer", "chain", step=1) as outer:
+        with span("inner", "retriever") as inner:
+            annotate(documents=3)
+        with pytest.raises(ValueError):
+            with span("failing", "tool"):
+                raise ValueError("bad input")
+
+    inner_, failing, outer_ = exporter.spans  # 끝난 순서대로 export
+    assert (inner_, outer_) == (inner, outer)
+    assert inner.trace_id == failing.trace_id == outer.trace_id
+    assert inner.parent_id == failing.parent_id == outer.span_id
+    assert outer.parent_id is None
+    assert inner.attributes == {"documents": 3}
+    assert failing.error == "bad input" and outer.error is None
+    assert telemetry.current_span() is None
+    assert 'crm_span_duration_seconds_count{kind="retriever",name="inner"}' in render_metrics()
+
+
+def test_otlp_span_shape(exporter):
+    with span("llm call", "llm", model="gpt", tokens=12, ratio=0.5, cached=True):
+        pass
+    with pytest.raises(RuntimeError):
+        with span("step"):
+            raise RuntimeError()
+
+    ok, failed = (s.to_otlp() for s in exporter.spans)
+
+    assert ok["kind"] == 3 and failed["kind"] == 1  # CLIENT / INTERNAL
+    assert len(ok["traceId"]) == 32 and len(ok["spanId"]) == 16
+    assert int(ok["endTimeUnixNano"]) >= int(ok["startTimeUnixNano"])
+    attrs = {a["key"]: a["value"] for a in ok["attributes"]}
+    assert attrs == {
+        "crm.kind": {"stringValue": "llm"},
+        "model": {"stringValue": "gpt"},
+        "tokens": {"intValue": "12"},
+        "ratio": {"doubleValue": 0.5},
+        "cached": {"boolValue": True},
+    }
+    assert ok["status"] == {"code": 1}
+    assert failed["status"] == {"code": 2, "message": "RuntimeError"}
+
+
+def test_otlp_exporter_posts_batch_and_counts_drops(monkeypatch):
+    posted = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        posted.append((str(request.url), json.loads(request.content)))
+        return httpx.Response(200 if len(posted) == 1 else 503)
+
+    monkeypatch.setattr(registry, "_overrides", {"ahttp": lambda: httpx.AsyncClient(transport=httpx.MockTransport(handle))})
+    monkeypatch.setattr(registry, "_clients", {})
+    monkeypatch.setattr(telemetry, "TELEMETRY_MAX_BUFFER", 3)
+    otlp = OtlpHttpExporter("http://collector:4318/")
+    telemetry.set_exporter(otlp)
+    try:
+        for i in range(5):
+            with span(f"s{i}"):
+                pass
+    finally:
+        telemetry.set_exporter(telemetry.NoopExporter())
+
+    assert otlp.dropped == 2  # 버퍼 상한 초과분은 오래된 것부터 버림
+    asyncio.run(otlp.flush())
+    asyncio.run(otlp.flush())  # 비었으면 전송하지 않음
+
+    assert len(posted) == 1
+    url, body = posted[0]
+    assert url == "http://collector:4318/v1/traces"
+    resource = body["resourceSpans"][0]
+    assert resource["resource"]["attributes"][0]["value"]["stringValue"] == telemetry.OTEL_SERVICE_NAME
+    assert [s["name"] for s in resource["scopeSpans"][0]["spans"]] == ["s2", "s3", "s4"]
+
+
+def test_middleware_names_server_span_by_route_and_continues_trace(exporter):
+    app = FastAPI()
+    app.add_middleware(TelemetryMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        with span("lookup", "retriever"):
+            annotate(item=item_id)
+        return {"id": item_id}
+
+    trace_id, parent_id = "ab" * 16, "cd" * 8
+    with TestClient(app) as client:
+        resp = client.get("/items/7", headers={"traceparent": f"00-{trace_id}-{parent_id}-01"})
+        client.get("/missing")
+
+    assert resp.status_code == 200
+    child, server, missing = exporter.spans
+    assert server.name == "GET /items/{item_id}"
+    assert server.kind == "server"
+    assert (server.trace_id, server.parent_id) == (trace_id, parent_id)
+    assert server.attributes["http.status_code"] == 200
+    assert server.attributes["http.route"] == "/items/{item_id}"
+    assert child.parent_id == server.span_id and child.attributes == {"item": 7}
+    assert missing.name == "GET unmatched" and missing.attributes["http.status_code"] == 404
+    assert 'crm_http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"}' in render_metrics()
+
+
+def test_langchain_callback_nests_llm_under_chain_and_request(exporter):
+    llm = FakeListChatModel(responses=["답변"])
+    chain = RunnableLambda(lambda q: [("human", q)], name="prep") | llm
+
+    with span("POST /api/research", "server") as request:
+        reply = asyncio.run(chain.ainvoke("질문", config=traced()))
+
+    assert reply.content == "답변"
+    by_name = {s.name: s for s in exporter.spans}
+    sequence = next(s for s in exporter.spans if s.kind == "chain" and s.parent_id == request.span_id)
+    llm_span = exporter.by_kind("llm")[0]
+    assert by_name["prep"].parent_id == sequence.span_id
+    assert llm_span.parent_id == sequence.span_id
+    assert llm_span.trace_id == request.trace_id
@@ -0,0 +1,60 @@
+# backend/tests/test_template_cache.py
+"""template 응답 캐시 key 에 A/B few-shot 지문이 들어가는지."""
+import asyncio, itertools
+
+import pytest
+
+from app.api import templates
+from app.chains.template_chain import cache_payload
+from app.services.feedback import top_copies
+
+INPUTS = {"business_desc": "온라인 서점", "funnel_stage": "Retention", "tone": "친근", "insight": "재방문 감소"}
+
+
+def _row(copy: str, clicks: int) -> dict:
+    return {"copy": copy, "rationale": "", "sends": 1000, "opens": 0, "clicks": clicks, "ctr": clicks / 1000, "score": 0.1}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """LLM 대신 호출 순번이 들어간 카피를 돌려준다."""
+    counter = itertools.count()
+
+    async def fake(chain, inputs, *args, **kwargs):
+        n = next(counter)
+        return [{"copy": f"카피 {n}-{i}", "rationale": ""} for i in range(3)]
+
+    monkeypatch.setattr(templates, "ainvoke_limited", fake)
+    monkeypatch.setattr(top_copies, "_data", {})
+    return counter
+
+
+def test_fingerprint_tracks_selected_examples(monkeypatch):
+    monkeypatch.setattr(top_copies, "_data", {})
+    metrics = dict(top_copies.metrics)
+    empty = cache_payload(INPUTS)
+    top_copies._data[("Retention", "친근")] = [_row("다시 만나요", 30)]
+    one = cache_payload(INPUTS)
+    top_copies._data[("Retention", "친근")] = [_row("다시 만나요", 45)]  # CTR 변화도 프롬프트를 바꾼다
+
+    assert empty["top_examples"] == ""
+    assert len({empty["top_examples"], one["top_examples"], cache_payload(INPUTS)["top_examples"]}) == 3
+    assert cache_payload({**INPUTS, "tone": "격식"})["top_examples"] == ""  # 다른 그룹은 영향 없음
+    assert top_copies.metrics == metrics  # fingerprint 는 hits/misses 를 세지 않음
+
+
+def test_new_ab_examples_bypass_previous_cached_result(llm):
+    inputs = {**INPUTS, "insight": "캐시 key 테스트"}
+
+    async def scenario():
+        first, computed1 = await templates._generate(inputs)
+        again, computed2 = await templates._generate(inputs)
+        top_copies._data[("Retention", "친근")] = [_row("다시 만나요", 30)]  # A/B 결과 수집 후 refresh
+        fresh, computed3 = await templates._generate(inputs)
+        return (first, again, fresh), (computed1, computed2, computed3)
+
+    (first, again, fresh), computed = asyncio.run(scenario())
+
+    assert computed == (True, False, True)
+    assert again == first
+    assert fresh != first
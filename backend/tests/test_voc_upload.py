@@ -0,0 +1,122 @@
+# backend/tests/test_voc_upload.py
+"""VOC 업로드: staged block 업로드 → commit (fake ContainerClient)."""
+import io, asyncio, hashlib
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.api import voc
+from app.services.blob import BlobService
+from app.services.clients import registry
+from bench.fakes import FakeBlobClient, FakeContainerClient, Latency
+
+
+@pytest.fixture
+def container(monkeypatch):
+    """fake 컨테이너 + 동시에 진행 중인 stage_block 수 기록."""
+    container = FakeContainerClient(Latency("fixed:0.005"), keep_data=True)
+    container.in_flight = container.max_in_flight = container.staged_calls = 0
+    stage_block = FakeBlobClient.stage_block
+
+    async def tracked(self, block_id, data, **kw):
+        c = self._c
+        c.staged_calls += 1
+        c.in_flight += 1
+        c.max_in_flight = max(c.max_in_flight, c.in_flight)
+        try:
+            await stage_block(self, block_id, data, **kw)
+        finally:
+            c.in_flight -= 1
+
+    monkeypatch.setattr(FakeBlobClient, "stage_block", tracked)
+    monkeypatch.setattr(registry, "_overrides", {"blob_container": lambda: container})
+    monkeypatch.setattr(registry, "_clients", {})
+    monkeypatch.setattr(voc, "VOC_AUTO_INGEST", False)
+    return container
+
+
+def _reader(data: bytes):
+    stream = io.BytesIO(data)
+
+    async def read(n: int) -> bytes:
+        return stream.read(n)
+
+    return read
+
+
+def test_large_file_is_staged_in_blocks_and_committed_in_order(container):
+    data = bytes(range(256)) * 41  # 10496 바이트 → 1024 바이트 블록 11개
+    service = BlobService(container)
+
+    blob, sha = asyncio.run(
+        service.upload_stream("big_voc.pdf", _reader(data), "application/pdf", chunk_size=1024, concurrency=3)
+    )
+
+    stored = container.blobs["big_voc.pdf"]
+    assert stored["data"] == data
+    assert sha == hashlib.sha256(data).hexdigest()
+    assert stored["metadata"] == {"content_sha256": sha}
+    assert container.staged_calls == 11
+    assert 1 < container.max_in_flight <= 3  # 병렬이지만 concurrency 를 넘지 않는다
+    assert container.staged == {}  # 모든 블록이 commit 됨
+    assert blob.url.endswith("/uploads/big_voc.pdf")
+
+
+def test_small_file_uses_single_put(container):
+    data = b"VOC text"
+    service = BlobService(container)
+
+    _, sha = asyncio.run(service.upload_stream("small_voc.txt", _reader(data), "text/plain", chunk_size=1024))
+
+    assert container.staged_calls == 0
+    assert container.blobs["small_voc.txt"]["data"] == data
+    assert container.blobs["small_voc.txt"]["metadata"] == {"content_sha256": sha}
+
+
+def test_exact_chunk_size_file_is_still_single_put(container):
+    data = b"x" * 1024
+
+    asyncio.run(BlobService(container).upload_stream("edge_voc.txt", _reader(data), "text/plain", chunk_size=1024))
+
+    assert container.staged_calls == 0
+    assert container.blobs["edge_voc.txt"]["data"] == data
+
+
+def test_upload_one_streams_file_and_returns_public_url(container, monkeypatch):
+    monkeypatch.setattr("app.services.blob.BLOB_CHUNK_SIZE", 1024)
+    monkeypatch.setattr(BlobService.upload_stream, "__defaults__", (1024, 2))
+    data = "배송 지연 문의\n".encode() * 300
+    file = UploadFile(io.BytesIO(data), filename="march_voc.txt")
+
+    url = asyncio.run(voc._upload_one(file))
+
+    assert url == f"https://{voc.AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{voc.AZURE_CONTAINER_NAME}/march_voc.txt"
+    assert container.blobs["march_voc.txt"]["data"] == data
+    assert container.staged_calls == -(-len(data) // 1024)
+    assert file.file.closed
+
+
+@pytest.mark.parametrize("name", ["march.txt", "march_voc.docx"])
+def test_upload_one_rejects_bad_filename(container, name):
+    with pytest.raises(HTTPException) as info:
+        asyncio.run(voc._upload_one(UploadFile(io.BytesIO(b"x"), filename=name)))
+
+    assert info.value.status_code == 400
+    assert container.blobs == {}
+
+
+def test_failed_block_aborts_without_commit(container, monkeypatch):
+    async def broken(self, block_id, data, **kw):
+        raise ConnectionError("stage failed")
+
+    monkeypatch.setattr(FakeBlobClient, "stage_block", broken)
+    monkeypatch.setattr(BlobService.upload_stream, "__defaults__", (1024, 2))
+    file = UploadFile(io.BytesIO(b"y" * 5000), filename="april_voc.pdf")
+
+    with pytest.raises(HTTPException) as info:
+        asyncio.run(voc._upload_one(file))
+
+    assert info.value.status_code == 500
+    assert "stage failed" in info.value.detail
+    assert container.blobs == {}
+    assert file.file.closed
@@ -0,0 +1,195 @@
+# backend/tests/test_web_cache.py
+"""web_search 캐시: fresh / stale(+재조회) / local(FTS5) / live, coverage 기준, 정리(prune)."""
+import time, asyncio
+
+import pytest
+
+from app.services import web_cache as wc
+from bench.fakes import FakeTavily, Latency
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(wc, "WEB_CACHE_ENABLED", True)
+    monkeypatch.setattr(wc, "WEB_LOCAL_ENABLED", True)
+    cache = wc.WebSearchCache(str(tmp_path / "web.sqlite3"))
+    if not cache.store.fts:
+        pytest.skip("sqlite FTS5 unavailable")
+    return cache
+
+
+class CountingTavily(FakeTavily):
+    def __init__(self):
+        super().__init__(Latency("fixed:0"))
+        self.calls = []
+
+    async def ainvoke(self, query, config=None, **kwargs):
+        self.calls.append(query)
+        return await super().ainvoke(query, config, **kwargs)
+
+
+def _search(cache, tavily, query):
+    return cache.search(query, lambda: tavily.ainvoke(query))
+
+
+def _age(cache, query, seconds):
+    """저장된 결과/스니펫을 seconds 만큼 과거로."""
+    conn = cache.store._conn
+    conn.execute("UPDATE web_results SET fetched_at = fetched_at - ? WHERE key = ?", (seconds, wc.query_key(query)))
+    conn.execute("UPDATE web_snippets SET fetched_at = fetched_at - ?", (seconds,))
+    conn.commit()
+
+
+def test_same_query_is_live_then_fresh(cache):
+    tavily = CountingTavily()
+
+    async def scenario():
+        first = await _search(cache, tavily, "결제 오류 해결 방법")
+        second = await _search(cache, tavily, "  결제 오류   해결 방법 ")  # 정규화 후 같은 key
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert "cache" not in first
+    assert second["cache"] == "fresh"
+    assert second["results"] == first["results"]
+    assert len(tavily.calls) == 1
+    assert cache.metrics["live"] == 1 and cache.metrics["fresh"] == 1
+
+
+def test_stale_result_is_served_and_revalidated_in_background(cache):
+    tavily = CountingTavily()
+    query = "배송 지연 보상 정책"
+
+    async def scenario():
+        await _search(cache, tavily, query)
+        _age(cache, query, wc.WEB_FRESH_TTL + 1)
+        stale = await _search(cache, tavily, query)
+        await asyncio.gather(*cache._refreshing.values())
+        again = await _search(cache, tavily, query)
+        return stale, again
+
+    stale, again = asyncio.run(scenario())
+
+    assert stale["cache"] == "stale"
+    assert again["cache"] == "fresh"  # 재조회가 결과를 갱신
+    assert len(tavily.calls) == 2
+    assert cache.metrics["refreshes"] == 1
+
+
+def test_expired_result_goes_live(cache):
+    tavily = CountingTavily()
+    query = "회원 탈퇴 절차"
+
+    async def scenario():
+        await _search(cache, tavily, query)
+        _age(cache, query, wc.WEB_STALE_TTL + wc.WEB_LOCAL_MAX_AGE + 1)
+        return await _search(cache, tavily, query)
+
+    assert "cache" not in asyncio.run(scenario())
+    assert len(tavily.calls) == 2
+
+
+def test_similar_query_is_answered_from_local_snippets(cache):
+    tavily = CountingTavily()
+
+    async def scenario():
+        await _search(cache, tavily, "모바일 결제 오류 해결 방법")
+        return await _search(cache, tavily, "결제 오류 해결")
+
+    local = asyncio.run(scenario())
+
+    assert local["cache"] == "local"
+    assert len(local["results"]) >= wc.WEB_LOCAL_MIN_RESULTS
+    assert all("결제 오류" in r["content"] for r in local["results"])
+    assert len(tavily.calls) == 1
+
+
+def test_low_coverage_and_realtime_queries_go_live(cache):
+    tavily = CountingTavily()
+
+    async def scenario():
+        await _search(cache, tavily, "모바일 결제 오류 해결 방법")
+        low = await _search(cache, tavily, "결제 화면 디자인 가이드 사례")  # 토큰 일부만 겹침
+        realtime = await _search(cache, tavily, "결제 오류 최신")  # 실시간 query 는 로컬 답 금지
+        return low, realtime
+
+    low, realtime = asyncio.run(scenario())
+
+    assert "cache" not in low
+    assert "cache" not in realtime
+    assert len(tavily.calls) == 3
+
+
+def test_realtime_query_uses_short_stale_window(cache):
+    tavily = CountingTavily()
+    query = "오늘 속보 뉴스"
+
+    async def scenario():
+        await _search(cache, tavily, query)
+        _age(cache, query, wc.WEB_REALTIME_TTL + 1)
+        stale = await _search(cache, tavily, query)  # 실시간 stale 창 안 → stale + 재조회
+        await asyncio.gather(*cache._refreshing.values())
+        _age(cache, query, 20 * 3600)  # 일반 query 라면 아직 WEB_STALE_TTL 이내
+        expired = await _search(cache, tavily, query)
+        return stale, expired
+
+    stale, expired = asyncio.run(scenario())
+
+    assert stale["cache"] == "stale"
+    assert "cache" not in expired
+    assert len(tavily.calls) == 3
+    assert cache.metrics["live"] == 2
+
+
+def test_old_snippets_are_not_used_for_local_answers(cache):
+    tavily = CountingTavily()
+
+    async def scenario():
+        await _search(cache, tavily, "모바일 결제 오류 해결 방법")
+        _age(cache, "모바일 결제 오류 해결 방법", wc.WEB_LOCAL_MAX_AGE + 1)
+        return await _search(cache, tavily, "결제 오류 해결")
+
+    assert "cache" not in asyncio.run(scenario())
+
+
+def _counts(store):
+    conn = store._conn
+    return tuple(
+        conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+        for t in ("web_results", "web_snippets", "web_snippets_fts")
+    )
+
+
+def test_prune_drops_old_rows_and_keeps_newest_snippets(cache):
+    store = cache.store
+    for i in range(6):
+        store.put(f"k{i}", f"q{i}", {"results": [{"url": f"https://x/{i}", "title": f"t{i}", "content": f"본문 {i}"}]})
+    conn = store._conn
+    # k0, k1 은 오래됨 / 나머지는 k2 < k3 < k4 < k5 순으로 최근
+    for i in range(6):
+        conn.execute("UPDATE web_results SET fetched_at = ? WHERE key = ?", (time.time() - (1000 if i < 2 else 10 - i), f"k{i}"))
+        conn.execute("UPDATE web_snippets SET fetched_at = ? WHERE url = ?", (time.time() - (1000 if i < 2 else 10 - i), f"https://x/{i}"))
+    conn.commit()
+    assert _counts(store) == (6, 6, 6)
+
+    store.prune(max_age=100, max_snippets=3)
+
+    assert _counts(store) == (4, 3, 3)
+    urls = {r[0] for r in conn.execute("SELECT url FROM web_snippets")}
+    assert urls == {"https://x/3", "https://x/4", "https://x/5"}
+    fts_ids = {r[0] for r in conn.execute("SELECT rowid FROM web_snippets_fts")}
+    assert fts_ids == {r[0] for r in conn.execute("SELECT id FROM web_snippets")}
+
+
+def test_prune_by_age_alone(cache):
+    store = cache.store
+    store.put("old", "q", {"results": [{"url": "https://x/old", "title": "t", "content": "오래된 본문"}]})
+    store._conn.execute("UPDATE web_snippets SET fetched_at = 0")
+    store._conn.execute("UPDATE web_results SET fetched_at = 0")
+    store._conn.commit()
+    store.put("new", "q2", {"results": [{"url": "https://x/new", "title": "t", "content": "새 본문"}]})
+
+    store.prune(max_age=100, max_snippets=1000)
+
+    assert _counts(store) == (1, 1, 1)